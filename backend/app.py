@@ -1,9 +1,13 @@
-from flask import Flask
+import atexit
+from flask import Flask, g, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 from visualSearchBackend.services.config import get_config
 from visualSearchBackend.services.gemini_service import init_gemini
 from visualSearchBackend.routes import api_bp
+from visualSearchBackend.services.download_tracker import init_download_tracker
+from sharedBackend.http_client import http_client
+from sharedBackend.metrics import start_request, finish_request
 
 
 
@@ -19,12 +23,37 @@ def create_app():
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     
 
-    from lessonPlanBackend import lessons_bp
+    from lessonPlanBackend import lessons_bp, lesson_library
     from reinforcedLearningBackend  import mochi_bp
+    from sharedBackend import shared_bp, metrics_bp
 
     app.register_blueprint(api_bp, url_prefix='/api')
     app.register_blueprint(lessons_bp)
     app.register_blueprint(mochi_bp)
+    app.register_blueprint(shared_bp)
+    app.register_blueprint(metrics_bp)
+
+    @app.before_request
+    def start_metrics():
+        g.metrics_started = start_request()
+
+    @app.after_request
+    def record_metrics(response):
+        # Route template, not the raw path, so /api/images/<digest> stays one series
+        rule = request.url_rule
+        timing = finish_request(
+            g.get('metrics_started'), request.method, rule.rule if rule else None,
+            response.status_code, response.content_length
+        )
+        if timing:
+            response.headers['Server-Timing'] = timing
+        return response
+
+    # Pooled keep-alive sessions live as long as the process
+    atexit.register(http_client.close)
+
+    if app.config.get('UNSPLASH_ACCESS_KEY'):
+        init_download_tracker(app)
 
     # from quizzes import quizzes_bp
     # app.register_blueprint(quizzes_bp)
@@ -34,7 +63,11 @@ def create_app():
             init_gemini()
         except Exception as e:
             print(f"Error initializing Gemini: {e}")
-            
+
+    # Popular topics: map the prebuilt bundle now, build missing / stale lessons in the background
+    lesson_library.load()
+    lesson_library.start()
+
 
     return app
 
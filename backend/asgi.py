@@ -0,0 +1,91 @@
+"""
+ASGI entry point for the Gemini/Unsplash-bound endpoints.
+
+Serves the same routes and request/response contracts as app.py, but as async
+views on an event loop (async Gemini clients + a pooled httpx client), so an
+upstream round trip no longer pins a worker thread:
+
+    hypercorn "asgi:create_asgi_app()" --bind 0.0.0.0:5000 --workers 2
+    uvicorn asgi:create_asgi_app --factory --host 0.0.0.0 --port 5000
+"""
+
+from quart import Quart, g, request
+from quart_cors import cors
+from dotenv import load_dotenv
+from visualSearchBackend.services.config import get_config
+from visualSearchBackend.services.gemini_service import init_gemini
+from visualSearchBackend.services.download_tracker import init_download_tracker
+from sharedBackend.async_http import close_async_client
+from sharedBackend.blob_store import request_base_url
+from sharedBackend.metrics import start_request, finish_request
+
+
+load_dotenv()
+
+def create_asgi_app():
+    app = Quart(__name__)
+    config_obj = get_config()
+    app.config.from_object(config_obj)
+
+    app = cors(app, allow_origin="*")
+
+    from visualSearchBackend.async_routes import async_api_bp
+    from lessonPlanBackend.async_routes import async_lessons_bp
+    from lessonPlanBackend import lesson_library
+    from reinforcedLearningBackend.async_routes import async_mochi_bp
+    from sharedBackend.async_routes import async_shared_bp, async_metrics_bp
+
+    app.register_blueprint(async_api_bp, url_prefix='/api')
+    app.register_blueprint(async_lessons_bp)
+    app.register_blueprint(async_mochi_bp)
+    app.register_blueprint(async_shared_bp)
+    app.register_blueprint(async_metrics_bp)
+
+    @app.before_request
+    async def remember_base_url():
+        # Lets generated image URLs point back at this host (see sharedBackend.blob_store)
+        request_base_url.set(request.host_url)
+
+    @app.before_request
+    async def start_metrics():
+        g.metrics_started = start_request()
+
+    @app.after_request
+    async def record_metrics(response):
+        rule = request.url_rule
+        timing = finish_request(
+            g.get('metrics_started'), request.method, rule.rule if rule else None,
+            response.status_code, response.content_length
+        )
+        if timing:
+            response.headers['Server-Timing'] = timing
+        return response
+
+    @app.after_serving
+    async def close_http_client():
+        await close_async_client()
+
+    if app.config.get('UNSPLASH_ACCESS_KEY'):
+        init_download_tracker(app)
+
+    try:
+        # Never None: init_gemini would fall back to Flask's current_app, which Quart doesn't set
+        init_gemini(app.config.get('GEMINI_API_KEY') or '')
+    except Exception as e:
+        print(f"Error initializing Gemini: {e}")
+
+    # Popular topics: map the prebuilt bundle now, build missing / stale lessons in the background
+    lesson_library.load()
+    lesson_library.start()
+
+    return app
+
+if __name__ == '__main__':
+    import asyncio
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config as HypercornConfig
+
+    hypercorn_config = HypercornConfig()
+    hypercorn_config.bind = ["0.0.0.0:5000"]
+    print("Starting async Mochi server on http://localhost:5000")
+    asyncio.run(serve(create_asgi_app(), hypercorn_config))
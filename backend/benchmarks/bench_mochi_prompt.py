@@ -0,0 +1,100 @@
+"""
+Before/after benchmark for the Mochi chat prompt.
+
+    cd backend && python -m benchmarks.bench_mochi_prompt            # offline: build time + estimated tokens
+    cd backend && python -m benchmarks.bench_mochi_prompt --live     # + count_tokens and generate_content latency
+
+"before" replays MOCHI_INSTRUCTIONS as a user turn plus a canned model reply
+on every call (the old build_chat_contents); "after" sends only the history,
+memory note and clip to the model built once with system_instruction.
+--live needs GEMINI_API_KEY and sends a short text turn in place of audio.
+"""
+
+import os
+import sys
+import time
+import timeit
+import statistics
+import google.generativeai as genai
+from reinforcedLearningBackend.chat_config import ChatConfig
+from reinforcedLearningBackend.chat_prompt import MOCHI_INSTRUCTIONS, SYSTEM_PROMPT, build_chat_contents
+
+HISTORY = [
+    {"role": "child", "text": "Hi Mochi! My name is Ava."},
+    {"role": "mochi", "text": "Hi Ava! It's so nice to meet you!"},
+    {"role": "child", "text": "I like dinosaurs and the color pink."},
+    {"role": "mochi", "text": "Pink dinosaurs? That sounds amazing!"},
+    {"role": "child", "text": "Do you know what a twicewatops is?"},
+    {"role": "mochi", "text": "A triceratops! It has three horns. Try saying 'trrr'!"},
+]
+MEMORY = "The child's name is Ava. They like dinosaurs, the color pink."
+TEXT_TURN = {"text": "(The child says:) What is my name and what do I like?"}
+
+
+def legacy_chat_contents(past_messages, audio_part):
+    """The pre-change prompt shape, kept here only for comparison."""
+    contents = [
+        {"role": "user", "parts": [{"text": MOCHI_INSTRUCTIONS + "\nIMPORTANT: Refer to the previous chat history to answer questions about the child's name or interests."}]},
+        {"role": "model", "parts": [{"text": "I will remember the child's details from our conversation history!"}]}
+    ]
+    for msg in past_messages[-6:]:
+        contents.append({
+            "role": "user" if msg['role'] == 'child' else "model",
+            "parts": [{"text": msg['text']}]
+        })
+    contents.append({
+        "role": "user",
+        "parts": [{"text": "Please listen to this and answer based on what we've talked about before."}, audio_part]
+    })
+    return contents
+
+
+def text_chars(contents):
+    return sum(len(part.get("text", "")) for content in contents for part in content["parts"])
+
+
+def offline(number=20000):
+    before = legacy_chat_contents(HISTORY, TEXT_TURN)
+    after = build_chat_contents(HISTORY, TEXT_TURN, MEMORY)
+    before_us = timeit.timeit(lambda: legacy_chat_contents(HISTORY, TEXT_TURN), number=number) / number * 1e6
+    after_us = timeit.timeit(lambda: build_chat_contents(HISTORY, TEXT_TURN, MEMORY), number=number) / number * 1e6
+
+    print(f"{'':>8} {'contents chars':>15} {'~tokens (chars/4)':>18} {'build us':>9}")
+    print(f"{'before':>8} {text_chars(before):>15} {text_chars(before) // 4:>18} {before_us:>9.2f}")
+    print(f"{'after':>8} {text_chars(after):>15} {text_chars(after) // 4:>18} {after_us:>9.2f}")
+    print(f"system_instruction: {len(SYSTEM_PROMPT)} chars (~{len(SYSTEM_PROMPT) // 4} tokens), "
+          f"billed per turn unless context caching is on")
+
+
+def timed_turns(model, contents, turns):
+    latencies = []
+    for _ in range(turns):
+        started = time.perf_counter()
+        model.generate_content(contents)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.median(latencies), max(latencies)
+
+
+def live(turns=5):
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        print("--live needs GEMINI_API_KEY")
+        return
+    genai.configure(api_key=api_key)
+
+    before_model = genai.GenerativeModel(ChatConfig.MODEL)
+    after_model = genai.GenerativeModel(ChatConfig.MODEL, system_instruction=SYSTEM_PROMPT)
+    before = legacy_chat_contents(HISTORY, TEXT_TURN)
+    after = build_chat_contents(HISTORY, TEXT_TURN, MEMORY)
+
+    print(f"{'':>8} {'input tokens':>13} {'p50 ms':>8} {'max ms':>8}")
+    for label, model, contents in (("before", before_model, before), ("after", after_model, after)):
+        tokens = model.count_tokens(contents).total_tokens
+        p50, worst = timed_turns(model, contents, turns)
+        print(f"{label:>8} {tokens:>13} {p50:>8.0f} {worst:>8.0f}")
+
+
+if __name__ == '__main__':
+    offline()
+    if '--live' in sys.argv:
+        live()
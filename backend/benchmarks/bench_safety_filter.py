@@ -0,0 +1,49 @@
+"""
+Micro-benchmark: compiled safety filter vs the old per-term substring scan.
+
+    cd backend && python -m benchmarks.bench_safety_filter
+
+The substring scan grows with the number of terms; the compiled trie regex
+stays roughly flat because it makes one pass over the query.
+"""
+
+import random
+import string
+import timeit
+from sharedBackend.safety_filter import SafetyFilter, DEFAULT_BLOCKLIST
+
+QUERIES = [
+    "a happy golden retriever puppy playing in the park with a red ball",
+    "can you show me a swordfish swimming in warm water near the award winning aquarium",
+    "dinosaurs and volcanoes and a big red fire truck driving past the farm",
+]
+
+
+def synthetic_terms(count, seed=7):
+    rng = random.Random(seed)
+    terms = list(DEFAULT_BLOCKLIST)
+    while len(terms) < count:
+        terms.append(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))))
+    return terms
+
+
+def substring_scan(terms):
+    def check(query):
+        normalized = query.lower().strip()
+        return any(word in normalized for word in terms)
+    return check
+
+
+def main(sizes=(15, 100, 1000, 5000), number=2000):
+    print(f"{'terms':>6} {'substring us/query':>20} {'compiled us/query':>19}")
+    for size in sizes:
+        terms = synthetic_terms(size)
+        old = substring_scan(terms)
+        new = SafetyFilter(terms=terms).is_blocked
+        old_us = timeit.timeit(lambda: [old(q) for q in QUERIES], number=number) / (number * len(QUERIES)) * 1e6
+        new_us = timeit.timeit(lambda: [new(q) for q in QUERIES], number=number) / (number * len(QUERIES)) * 1e6
+        print(f"{size:>6} {old_us:>20.2f} {new_us:>19.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""
+Offline stand-ins for Gemini and Unsplash, used by benchmarks/load_test.py.
+
+    FakeUpstreamServer  local HTTP server for the REST calls:
+                          POST /v1beta/models/<model>:generateContent  (lesson images)
+                          GET  /search/photos, GET /photos/<id>/download  (Unsplash)
+    FakeGenaiClient     google.genai Client (visual search summaries and images)
+    FakeLegacyGenai     google.generativeai module (lesson text, Mochi chat, Files API)
+
+Each upstream takes an UpstreamProfile: latency in ms with +/- jitter, an error
+rate, and (for images) the payload size. Image bytes get a random prefix so
+the content-addressed blob store writes each one like a fresh generation.
+"""
+
+import os
+import re
+import json
+import time
+import base64
+import random
+import asyncio
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+GENERATE_PATH_RE = re.compile(r'^/v1beta/models/(?P<model>[^/:]+):generateContent$')
+ITEM_COUNT_RE = re.compile(r'Generate exactly (\d+) items')
+TOPIC_RE = re.compile(r'lesson about "([^"]*)"')
+# 15 bytes -> 20 base64 chars with no padding, so it can be prepended to an encoded body
+PREFIX_BYTES = 15
+
+
+class UpstreamError(Exception):
+    def __init__(self, message, code=503):
+        super().__init__(message)
+        self.code = code
+
+
+class UpstreamProfile:
+    def __init__(self, latency_ms=0.0, jitter=0.2, error_rate=0.0, image_bytes=256 * 1024, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.image_bytes = image_bytes
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._image_body = None
+        self._image_body_b64 = None
+
+    def delay(self):
+        with self._lock:
+            spread = self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency_ms * (1 + spread)) / 1000
+
+    def fails(self):
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _body(self):
+        if self._image_body is None:
+            with self._lock:
+                if self._image_body is None:
+                    body = b'\x89PNG\r\n\x1a\n' + os.urandom(max(0, self.image_bytes - PREFIX_BYTES - 8))
+                    self._image_body_b64 = base64.b64encode(body).decode('ascii')
+                    self._image_body = body
+        return self._image_body
+
+    def image(self):
+        """Fresh-looking PNG-ish bytes of roughly image_bytes."""
+        return os.urandom(PREFIX_BYTES) + self._body()
+
+    def image_b64(self):
+        # The shared body is encoded once; only the random prefix changes per response
+        self._body()
+        return base64.b64encode(os.urandom(PREFIX_BYTES)).decode('ascii') + self._image_body_b64
+
+
+# --- HTTP stand-in for the REST endpoints ---------------------------------
+
+def unsplash_results(query, base_url, count=10):
+    slug = re.sub(r'[^a-z0-9]+', '-', query.lower()).strip('-') or 'photo'
+    return {"total": count, "total_pages": 1, "results": [{
+        "id": f"{slug}-{index}",
+        "alt_description": f"{query} {index}",
+        "urls": {"regular": f"https://images.example/{slug}/{index}.jpg"},
+        "user": {"name": "Offline Photographer", "links": {"html": "https://unsplash.example/@offline"}},
+        "links": {"download_location": f"{base_url}/photos/{slug}-{index}/download"}
+    } for index in range(count)]}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _fail_or_wait(self, profile):
+        time.sleep(profile.delay())
+        if profile.fails():
+            self._send_json(503, {"error": {"code": 503, "message": "offline stand-in: injected failure"}})
+            return True
+        return False
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        match = GENERATE_PATH_RE.match(urlparse(self.path).path)
+        if not match:
+            return self._send_json(404, {"error": "unknown path"})
+        profile = self.server.profiles['gemini_image']
+        if self._fail_or_wait(profile):
+            return
+        self._send_json(200, {"candidates": [{"content": {"parts": [
+            {"inlineData": {"mimeType": "image/png", "data": profile.image_b64()}}
+        ]}}]})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        profile = self.server.profiles['unsplash']
+        if self._fail_or_wait(profile):
+            return
+        if url.path == '/search/photos':
+            query = parse_qs(url.query).get('query', ['photo'])[0]
+            host, port = self.server.server_address[:2]
+            return self._send_json(200, unsplash_results(query, f"http://{host}:{port}"), {
+                'X-Ratelimit-Limit': '100000', 'X-Ratelimit-Remaining': '99999'
+            })
+        if url.path.startswith('/photos/') and url.path.endswith('/download'):
+            return self._send_json(200, {"url": "https://images.example/download"})
+        self._send_json(404, {"error": "unknown path"})
+
+
+class FakeUpstreamServer:
+    """Serves the Gemini REST image endpoint and the Unsplash API on 127.0.0.1."""
+
+    def __init__(self, gemini_image, unsplash, port=0):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.profiles = {'gemini_image': gemini_image, 'unsplash': unsplash}
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fake-upstreams', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# --- SDK stand-ins ---------------------------------------------------------
+
+def _lesson_json(prompt):
+    count_match = ITEM_COUNT_RE.search(prompt)
+    topic_match = TOPIC_RE.search(prompt)
+    count = int(count_match.group(1)) if count_match else 5
+    topic = topic_match.group(1) if topic_match else 'animals'
+    return json.dumps({
+        "title": f"Learn About {topic}",
+        "description": f"A fun lesson about {topic}.",
+        "items": [{"name": f"{topic} friend {index + 1}",
+                   "spokenText": f"This is {topic} friend number {index + 1}. Can you wave hello?"}
+                  for index in range(count)]
+    })
+
+
+def _chat_json():
+    return json.dumps({
+        "transcription": "Hi Mochi, what is your favorite color?",
+        "mood": "HAPPY",
+        "mochiResponse": "I love pink, like cherry blossoms! What color do you like best?"
+    })
+
+
+def _prompt_text(contents):
+    if isinstance(contents, str):
+        return contents
+    texts = []
+    for content in contents or []:
+        for part in content.get('parts', []) if isinstance(content, dict) else []:
+            if isinstance(part, dict) and 'text' in part:
+                texts.append(part['text'])
+    return '\n'.join(texts)
+
+
+def _chunks(text, size=24):
+    return [SimpleNamespace(text=text[start:start + size]) for start in range(0, len(text), size)]
+
+
+class FakeGenerativeModel:
+    """google.generativeai.GenerativeModel: lesson JSON, or Mochi's reply when built with a system prompt."""
+
+    def __init__(self, profile, model_name, system_instruction=None, **options):
+        self.profile = profile
+        self.model_name = model_name
+        self.is_chat = system_instruction is not None
+
+    def _reply(self, contents):
+        if self.profile.fails():
+            raise UpstreamError(f"{self.model_name}: offline stand-in injected failure")
+        return _chat_json() if self.is_chat else _lesson_json(_prompt_text(contents))
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        time.sleep(self.profile.delay())
+        text = self._reply(contents)
+        return iter(_chunks(text)) if stream else SimpleNamespace(text=text)
+
+    async def generate_content_async(self, contents, generation_config=None, stream=False, **kwargs):
+        await asyncio.sleep(self.profile.delay())
+        text = self._reply(contents)
+        if not stream:
+            return SimpleNamespace(text=text)
+
+        async def chunks():
+            for chunk in _chunks(text):
+                yield chunk
+        return chunks()
+
+
+class FakeLegacyGenai:
+    """The parts of the google.generativeai module the backend touches."""
+
+    def __init__(self, text_profile, chat_profile):
+        self.text_profile = text_profile
+        self.chat_profile = chat_profile
+
+    def configure(self, api_key=None, **kwargs):
+        pass
+
+    def GenerativeModel(self, model_name, system_instruction=None, **options):
+        profile = self.chat_profile if system_instruction is not None else self.text_profile
+        return FakeGenerativeModel(profile, model_name, system_instruction, **options)
+
+    def upload_file(self, stream, mime_type=None, **kwargs):
+        stream.read()
+        return SimpleNamespace(name=f"files/offline-{random.getrandbits(32):08x}", uri="https://files.example/audio")
+
+    def delete_file(self, name):
+        pass
+
+
+class _FakeModels:
+    def __init__(self, summary_profile, image_profile):
+        self.summary_profile = summary_profile
+        self.image_profile = image_profile
+
+    def _respond(self, model, contents):
+        if 'image' in model:
+            profile = self.image_profile
+            if profile.fails():
+                raise UpstreamError(f"{model}: offline stand-in injected failure")
+            return SimpleNamespace(candidates=[SimpleNamespace(finish_reason="STOP", content=SimpleNamespace(parts=[
+                SimpleNamespace(thought=False, text="A Happy Picture", inline_data=None),
+                SimpleNamespace(thought=False, text=None, inline_data=SimpleNamespace(data=profile.image()))
+            ]))])
+        if self.summary_profile.fails():
+            raise UpstreamError(f"{model}: offline stand-in injected failure")
+        return SimpleNamespace(text="puppy")
+
+    def _profile(self, model):
+        return self.image_profile if 'image' in model else self.summary_profile
+
+    def generate_content(self, model, contents, config=None):
+        time.sleep(self._profile(model).delay())
+        return self._respond(model, contents)
+
+
+class _FakeAsyncModels(_FakeModels):
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.sleep(self._profile(model).delay())
+        return self._respond(model, contents)
+
+
+class FakeGenaiClient:
+    """google.genai Client with .models and .aio.models."""
+
+    def __init__(self, summary_profile, image_profile):
+        self.models = _FakeModels(summary_profile, image_profile)
+        self.aio = SimpleNamespace(models=_FakeAsyncModels(summary_profile, image_profile))
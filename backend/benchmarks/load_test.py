@@ -0,0 +1,231 @@
+"""
+Offline load test: drives create_app() through the real routes with Gemini and
+Unsplash replaced by local stand-ins (benchmarks/fake_upstreams.py), so no
+quota is spent and it runs without network access.
+
+    cd backend && python -m benchmarks.load_test
+    cd backend && python -m benchmarks.load_test --scenarios lesson,chat --concurrency 1,8,32 --requests 200
+    cd backend && python -m benchmarks.load_test --gemini-latency 900 --image-latency 4000 --error-rate 0.05
+
+Per scenario and concurrency level it prints p50/p95/p99 latency, requests per
+second, non-2xx count and the process's peak RSS during that level. Every
+request uses a fresh topic / query unless --cache-hits is given, so caches
+don't hide the upstream path. Client-side rate limits are off by default
+(--keep-rate-limits to measure them too); circuit breakers stay on, and their
+state is printed at the end.
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from .fake_upstreams import FakeGenaiClient, FakeLegacyGenai, FakeUpstreamServer, UpstreamProfile
+
+SCENARIOS = ('lesson', 'chat', 'visual-search', 'generate-content')
+CHAT_AUDIO = b'\x1a\x45\xdf\xa3' + b'\x00' * 16 * 1024  # WebM magic + 16 KB of "speech"
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def current_rss_bytes():
+    """Resident set size from /proc (Linux); falls back to the lifetime peak elsewhere."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RssSampler:
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = current_rss_bytes()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+def configure_environment(args, upstream_base, workdir):
+    """Must run before the app is imported: the config classes read os.environ at import."""
+    defaults = {
+        "GEMINI_API_KEY": "offline-benchmark",
+        "VITE_UNSPLASH_ACCESS_KEY": "offline-benchmark",
+        "GEMINI_API_BASE": upstream_base,
+        "UNSPLASH_API_BASE": upstream_base,
+        "MOCHI_CACHE_DIR": workdir,
+        "IMAGE_CACHE_ENABLED": "false",
+        # The stand-in images are random bytes, not decodable PNGs
+        "IMAGE_VARIANTS_ENABLED": "false",
+        # No background warmer competing with the measured requests
+        "LESSON_LIBRARY_ENABLED": "false",
+        "FLASK_DEBUG": "false",
+        "CHAT_SESSION_BACKEND": "memory",
+    }
+    if not args.keep_rate_limits:
+        defaults["RATE_LIMITS"] = ""
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+@lru_cache(maxsize=1)
+def search_subjects():
+    # Imported lazily: nothing from the app may load before configure_environment()
+    from visualSearchBackend.services.keyword_extractor import KID_VOCABULARY, MODIFIERS
+    return sorted(KID_VOCABULARY - MODIFIERS)
+
+
+def search_query(n):
+    """
+    A visual-search query with different keywords for every n. extract_keywords
+    drops digits, so "puppy 1" and "puppy 2" would share one cache entry.
+    """
+    subjects = search_subjects()
+    return f"{subjects[n % len(subjects)]} and {subjects[n // len(subjects) % len(subjects)]}"
+
+
+def make_request(client, scenario, n):
+    if scenario == 'lesson':
+        return client.post('/api/generate-lesson', json={"topic": f"ocean animals {n}", "item_count": 4})
+    if scenario == 'chat':
+        return client.post('/api/chat-with-mochi', data={
+            "audio": (io.BytesIO(CHAT_AUDIO), 'clip.webm', 'audio/webm'),
+            "duration": "3"
+        }, content_type='multipart/form-data')
+    if scenario == 'visual-search':
+        return client.post('/api/visual-search', json={"query": search_query(n)})
+    return client.post('/api/generate-content', json={"query": f"a rainbow castle {n}"})
+
+
+def run_level(app, scenario, concurrency, total, cache_hits):
+    latencies = []
+    failures = 0
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        nonlocal failures
+        client = app.test_client()
+        while True:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                return
+            started = time.perf_counter()
+            response = make_request(client, scenario, n % 4 if cache_hits else n)
+            response.get_data()
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if not 200 <= response.status_code < 300:
+                    failures += 1
+
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='load') as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+        wall = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "failures": failures,
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "peak_rss_mb": rss.peak / (1024 * 1024)
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated levels')
+    parser.add_argument('--requests', type=int, default=100, help='requests per scenario and level')
+    parser.add_argument('--gemini-latency', type=float, default=300, help='text, chat and summary ms')
+    parser.add_argument('--image-latency', type=float, default=1500, help='image generation ms')
+    parser.add_argument('--unsplash-latency', type=float, default=120, help='ms')
+    parser.add_argument('--jitter', type=float, default=0.2, help='+/- fraction of the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of upstream calls that fail')
+    parser.add_argument('--image-bytes', type=int, default=256 * 1024)
+    parser.add_argument('--cache-hits', action='store_true', help='reuse 4 inputs so caches answer')
+    parser.add_argument('--keep-rate-limits', action='store_true', help='keep RATE_LIMITS from the environment')
+    parser.add_argument('--seed', type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenario(s): {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+
+    def profile(latency, offset, **extra):
+        return UpstreamProfile(latency, args.jitter, args.error_rate, seed=args.seed + offset, **extra)
+
+    text = profile(args.gemini_latency, 1)
+    chat = profile(args.gemini_latency, 2)
+    summary = profile(args.gemini_latency, 3)
+    image = profile(args.image_latency, 4, image_bytes=args.image_bytes)
+    unsplash = profile(args.unsplash_latency, 5)
+
+    server = FakeUpstreamServer(image, unsplash).start()
+    with tempfile.TemporaryDirectory(prefix='mochi-load-') as workdir:
+        configure_environment(args, server.base_url, workdir)
+
+        from app import create_app
+        from sharedBackend.gemini_registry import gemini
+        app = create_app()
+        # After create_app: init_gemini may switch keys, which drops installed clients
+        gemini.use(client=FakeGenaiClient(summary, image), legacy=FakeLegacyGenai(text, chat))
+
+        print(f"Upstreams: gemini {args.gemini_latency:g} ms, images {args.image_latency:g} ms / "
+              f"{args.image_bytes // 1024} KB, unsplash {args.unsplash_latency:g} ms, "
+              f"jitter ±{args.jitter:.0%}, errors {args.error_rate:.1%}")
+        print(f"{'scenario':<17} {'conc':>5} {'reqs':>6} {'non-2xx':>8} {'rps':>8} "
+              f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak RSS MB':>12}")
+        try:
+            for scenario in scenarios:
+                for concurrency in levels:
+                    result = run_level(app, scenario, concurrency, args.requests, args.cache_hits)
+                    print(f"{scenario:<17} {concurrency:>5} {result['requests']:>6} {result['failures']:>8} "
+                          f"{result['rps']:>8.1f} {result['p50']:>9.1f} {result['p95']:>9.1f} "
+                          f"{result['p99']:>9.1f} {result['peak_rss_mb']:>12.1f}")
+            health = app.test_client().get('/api/health').get_json() or {}
+            for name, state in sorted((health.get('circuits') or {}).items()):
+                print(f"circuit {name}: {state['state']} (opened {state['times_opened']}x, "
+                      f"short-circuited {state['short_circuited']})")
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1 @@
-from .routes import lessons_bp
+from .routes import lessons_bp, lesson_library
@@ -0,0 +1,271 @@
+"""
+Async (Quart) versions of the lesson endpoints for the ASGI app in asgi.py.
+Same URLs, request bodies and responses as routes.py; only the I/O is awaited.
+"""
+
+import copy
+import json
+import asyncio
+from quart import Blueprint, Response, request, jsonify
+from sharedBackend.async_http import get_async_client
+from sharedBackend.blob_store import image_reference, request_base_url
+from sharedBackend.gemini_registry import gemini
+from sharedBackend.circuit_breaker import CircuitOpen, circuit_breakers
+from sharedBackend.metrics import count_fallback, stage, upstream_timer
+from sharedBackend.rate_limiter import RateLimited, rate_limits
+from sharedBackend.image_cache import get_image_cache
+from .lesson_config import LessonConfig
+from .routes import (
+    GEMINI_API_KEY, lesson_plan_cache, lesson_plan_key, build_image_request, extract_inline_image,
+    build_item_image_prompt, build_lesson_prompt, parse_lesson_json, validate_lesson_request, drop_unsafe_items,
+    lesson_generation_config, lesson_batches, parse_batch_request, batch_accepted, chunk_text, prefetch_limit,
+    lesson_response, library_lesson
+)
+from .batch_jobs import BatchRejected
+from .lesson_stream import ImagePrefetcher, ItemNameStream
+
+async_lessons_bp = Blueprint('lessons', __name__, url_prefix='/api')
+
+
+async def generate_image_async(prompt: str) -> str:
+    cache = get_image_cache()
+    if cache:
+        # SQLite and blob writes are quick but still blocking, so keep them off the loop
+        cached = await asyncio.to_thread(cache.get, LessonConfig.IMAGE_MODEL, prompt)
+        if cached:
+            return await asyncio.to_thread(image_reference, cached.data, cached.mime_type)
+
+    if not GEMINI_API_KEY:
+        count_fallback('blank_lesson_image', 'unconfigured')
+        return ''
+    url, payload = build_image_request(prompt)
+    try:
+        circuit_breakers.check('gemini', LessonConfig.IMAGE_MODEL)
+        await rate_limits.acquire_async('gemini', LessonConfig.IMAGE_MODEL)
+        with circuit_breakers.guard('gemini', LessonConfig.IMAGE_MODEL), upstream_timer('gemini_image', LessonConfig.IMAGE_MODEL):
+            response = await get_async_client().post(url, json=payload, timeout=LessonConfig.IMAGE_TIMEOUT)
+            rate_limits.observe('gemini', LessonConfig.IMAGE_MODEL, status=response.status_code, headers=response.headers)
+            response.raise_for_status()
+        image = extract_inline_image(response.json())
+        if image:
+            mime, image_bytes = image
+            if cache:
+                await asyncio.to_thread(cache.put, LessonConfig.IMAGE_MODEL, prompt, mime, image_bytes)
+            return await asyncio.to_thread(image_reference, image_bytes, mime)
+        count_fallback('blank_lesson_image', 'no_image')
+        return ''
+    except (RateLimited, CircuitOpen) as e:
+        count_fallback('blank_lesson_image', e)
+        print(f"Image generation skipped: {e}")
+        return ''
+    except Exception as e:
+        count_fallback('blank_lesson_image', e)
+        print(f"Image generation error: {e}")
+        return ''
+
+
+def _image_task_factory(topic: str):
+    """name -> task generating that item's image, at most LessonConfig.IMAGE_CONCURRENCY running at a time."""
+    limit = asyncio.Semaphore(max(1, LessonConfig.IMAGE_CONCURRENCY))
+
+    async def one(prompt):
+        async with limit:
+            return await generate_image_async(prompt)
+
+    return lambda name: asyncio.ensure_future(one(build_item_image_prompt(topic, name)))
+
+
+def _limited_image_tasks(topic: str, items: list):
+    """One task per item, at most LessonConfig.IMAGE_CONCURRENCY running at a time."""
+    start = _image_task_factory(topic)
+    return [start(item['name']) for item in items]
+
+
+async def stream_lesson_text_async(topic: str, item_count, on_item_name) -> str:
+    names = ItemNameStream()
+    parts = []
+    response = await gemini.model(LessonConfig.TEXT_MODEL).generate_content_async(
+        build_lesson_prompt(topic, item_count), generation_config=lesson_generation_config(), stream=True
+    )
+    async for chunk in response:
+        text = chunk_text(chunk)
+        parts.append(text)
+        for _, name in names.feed(text):
+            on_item_name(name)
+    return ''.join(parts)
+
+
+async def generate_lesson_plan_async(topic: str, item_count, on_item_name=None) -> dict:
+    async def fetch():
+        circuit_breakers.check('gemini', LessonConfig.TEXT_MODEL)
+        await rate_limits.acquire_async('gemini', LessonConfig.TEXT_MODEL)
+        try:
+            with circuit_breakers.guard('gemini', LessonConfig.TEXT_MODEL), upstream_timer('gemini_text', LessonConfig.TEXT_MODEL):
+                if on_item_name:
+                    text = await stream_lesson_text_async(topic, item_count, on_item_name)
+                else:
+                    response = await gemini.model(LessonConfig.TEXT_MODEL).generate_content_async(
+                        build_lesson_prompt(topic, item_count), generation_config=lesson_generation_config()
+                    )
+                    text = response.text
+        except Exception as e:
+            rate_limits.observe_error('gemini', LessonConfig.TEXT_MODEL, e)
+            raise
+        return parse_lesson_json(text, topic)
+
+    plan, _ = await lesson_plan_cache.get_or_compute_async(lesson_plan_key(topic, item_count), fetch)
+    return drop_unsafe_items(copy.deepcopy(plan))
+
+
+async def generate_lesson_with_images_async(topic: str, item_count):
+    """Async twin of generate_lesson_with_images: (lesson_plan, images in item order)."""
+    if not LessonConfig.PIPELINED_IMAGES:
+        lesson_content = await generate_lesson_plan_async(topic, item_count)
+        return lesson_content, await asyncio.gather(*_limited_image_tasks(topic, lesson_content.get('items', [])))
+
+    prefetcher = ImagePrefetcher(_image_task_factory(topic), prefetch_limit(item_count))
+    tasks = []
+    try:
+        lesson_content = await generate_lesson_plan_async(topic, item_count, on_item_name=prefetcher.start)
+        tasks = [prefetcher.take(item['name']) for item in lesson_content.get('items', [])]
+        for task in prefetcher.leftovers():
+            task.cancel()
+        return lesson_content, await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks + prefetcher.leftovers():
+            task.cancel()
+        raise
+
+
+async def read_lesson_request():
+    topic, item_count, error = validate_lesson_request(await request.get_json())
+    if error:
+        message, status = error
+        return topic, item_count, (jsonify({'success': False, 'error': message}), status)
+    return topic, item_count, None
+
+
+@async_lessons_bp.route('/generate-lesson', methods=['POST'])
+async def generate_lesson():
+    try:
+        topic, item_count, error = await read_lesson_request()
+        if error:
+            return error
+
+        # Decoded straight from the mmapped bundle; no I/O worth a thread hop
+        lesson = library_lesson(topic, item_count)
+        if lesson is None:
+            lesson_content, images = await generate_lesson_with_images_async(topic, item_count)
+            lesson = lesson_response(topic, lesson_content, images)
+
+        with stage('serialize'):
+            return jsonify({'success': True, **lesson})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@async_lessons_bp.route('/generate-lesson-stream', methods=['POST'])
+async def generate_lesson_stream():
+    try:
+        topic, item_count, error = await read_lesson_request()
+        if error:
+            return error
+        lesson_content = await generate_lesson_plan_async(topic, item_count)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    items = lesson_content.get('items', [])
+    base_url = request_base_url.get()
+
+    async def events():
+        request_base_url.set(base_url)
+        yield json.dumps({
+            'type': 'lesson',
+            'title': lesson_content.get('title', f'Learn About {topic}'),
+            'description': lesson_content.get('description', ''),
+            'itemCount': len(items)
+        }) + '\n'
+
+        tasks = _limited_image_tasks(topic, items)
+        indexes = {task: index for index, task in enumerate(tasks)}
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = indexes[task]
+                    yield json.dumps({
+                        'type': 'item',
+                        'index': index,
+                        'name': items[index]['name'],
+                        'spokenText': items[index]['spokenText'],
+                        'image': task.result()
+                    }) + '\n'
+            yield json.dumps({'type': 'done'}) + '\n'
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return Response(events(), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@async_lessons_bp.route('/generate-lesson-content', methods=['POST'])
+async def generate_lesson_content():
+    try:
+        topic, item_count, error = await read_lesson_request()
+        if error:
+            return error
+
+        lesson_data = await generate_lesson_plan_async(topic, item_count)
+
+        return jsonify({
+            'success': True,
+            'title': lesson_data.get('title', f'Learn About {topic}'),
+            'description': lesson_data.get('description', ''),
+            'items': lesson_data.get('items', [])
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@async_lessons_bp.route('/lessons/batch', methods=['POST'])
+async def create_lesson_batch():
+    # The batch runs on the shared worker pools in batch_jobs.py, same as the Flask app
+    try:
+        entries, with_images = parse_batch_request(await request.get_json(silent=True))
+        job = await asyncio.to_thread(lesson_batches.submit, entries, with_images, request_base_url.get())
+    except BatchRejected as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+
+    status_url = f"/api/lessons/batch/{job.id}"
+    return jsonify(batch_accepted(job, status_url)), 202, {'Location': status_url}
+
+
+@async_lessons_bp.route('/lessons/batch/<job_id>', methods=['GET'])
+async def get_lesson_batch(job_id):
+    snapshot = await asyncio.to_thread(lesson_batches.get, job_id)
+    if snapshot is None:
+        return jsonify({'success': False, 'error': 'Unknown batch job'}), 404
+    return jsonify({'success': True, **snapshot})
+
+
+@async_lessons_bp.route('/lessons/batch/<job_id>', methods=['DELETE'])
+async def cancel_lesson_batch(job_id):
+    snapshot = lesson_batches.cancel(job_id)
+    if snapshot is None:
+        return jsonify({'success': False, 'error': 'Unknown batch job'}), 404
+    return jsonify({'success': True, **snapshot})
+
+
+@async_lessons_bp.route('/health', methods=['GET'])
+async def health_check():
+    return jsonify({
+        'status': 'degraded' if circuit_breakers.any_open() else 'ok',
+        'gemini_configured': GEMINI_API_KEY is not None,
+        'circuits': circuit_breakers.stats()
+    })
@@ -0,0 +1,284 @@
+"""
+Batch lesson generation for POST /api/lessons/batch.
+
+A job is a list of topics. Each topic goes through the same steps as
+/generate-lesson (generate_lesson_plan, then one generate_image_with_rest_api
+call per item), but the work runs on two process-wide pools shared by every
+job: a small one for the text model and a larger one for images. A pacer
+spaces upstream calls across all jobs, so a 200-topic curriculum can't starve
+interactive requests.
+
+Jobs are kept in memory for polling and written to BATCH_DIR/<job_id>.json as
+each topic finishes, so finished curricula survive a restart.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from sharedBackend.blob_store import request_base_url
+from sharedBackend.rate_limiter import PRIORITY_BATCH, request_priority
+
+logger = logging.getLogger(__name__)
+
+JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+FINISHED = ('done', 'failed', 'rejected', 'cancelled')
+
+
+class BatchRejected(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class RequestPacer:
+    """Spaces call starts evenly so at most `per_minute` begin per minute, across all threads."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class BatchJob:
+    def __init__(self, entries, with_images, base_url):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.finished_at = None
+        self.with_images = with_images
+        self.base_url = base_url
+        self.cancelled = False
+        self.images_total = 0
+        self.images_done = 0
+        self.lock = threading.Lock()
+        # entries: [(topic, item_count, error or None)]
+        self.lessons = [{
+            "index": index,
+            "topic": topic,
+            "itemCount": item_count,
+            "status": "rejected" if error else "pending",
+            **({"error": error} if error else {})
+        } for index, (topic, item_count, error) in enumerate(entries)]
+
+    @property
+    def finished(self):
+        return all(lesson["status"] in FINISHED for lesson in self.lessons)
+
+    def status(self):
+        if self.finished:
+            return "cancelled" if self.cancelled else "done"
+        if all(lesson["status"] in ("pending", "rejected") for lesson in self.lessons):
+            return "queued"
+        return "running"
+
+    def to_dict(self):
+        with self.lock:
+            lessons = json.loads(json.dumps(self.lessons))
+            counts = {}
+            for lesson in lessons:
+                counts[lesson["status"]] = counts.get(lesson["status"], 0) + 1
+            finished = sum(counts.get(status, 0) for status in FINISHED)
+            return {
+                "jobId": self.id,
+                "status": self.status(),
+                "createdAt": self.created_at,
+                "finishedAt": self.finished_at,
+                "progress": {
+                    "topics": len(lessons),
+                    "finished": finished,
+                    "byStatus": counts,
+                    "imagesDone": self.images_done,
+                    "imagesTotal": self.images_total,
+                    "percent": round(100 * finished / len(lessons), 1) if lessons else 100.0
+                },
+                "lessons": lessons
+            }
+
+
+class LessonBatchManager:
+    def __init__(self, plan_fn, image_fn, image_prompt_fn, text_workers=2, image_workers=4,
+                 requests_per_minute=60, max_jobs=50, directory=None):
+        self.plan_fn = plan_fn
+        self.image_fn = image_fn
+        self.image_prompt_fn = image_prompt_fn
+        self.text_workers = max(1, text_workers)
+        self.image_workers = max(1, image_workers)
+        self.max_jobs = max_jobs
+        self.directory = directory
+        self.pacer = RequestPacer(requests_per_minute)
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._text_pool = None
+        self._image_pool = None
+
+    def _pools(self):
+        # Created on the first job so importing the blueprint starts no threads
+        with self._lock:
+            if self._text_pool is None:
+                self._text_pool = ThreadPoolExecutor(self.text_workers, thread_name_prefix='batch-lesson')
+                self._image_pool = ThreadPoolExecutor(self.image_workers, thread_name_prefix='batch-image')
+        return self._text_pool, self._image_pool
+
+    def submit(self, entries, with_images=True, base_url=None):
+        """entries: [(topic, item_count, error or None)]. Returns the new BatchJob."""
+        job = BatchJob(entries, with_images, base_url)
+        with self._lock:
+            if len(self._jobs) >= self.max_jobs:
+                for job_id in [job_id for job_id, old in self._jobs.items() if old.finished]:
+                    del self._jobs[job_id]
+                    if len(self._jobs) < self.max_jobs:
+                        break
+            if len(self._jobs) >= self.max_jobs:
+                raise BatchRejected('Too many batch jobs running, try again later', 429)
+            self._jobs[job.id] = job
+
+        text_pool, _ = self._pools()
+        for lesson in job.lessons:
+            if lesson["status"] == "pending":
+                text_pool.submit(self._run_topic, job, lesson)
+        if job.finished:
+            self._finish(job)
+        else:
+            self._persist(job)
+        return job
+
+    def get(self, job_id):
+        """Job snapshot as a dict (from memory, else from disk), or None."""
+        if not JOB_ID_RE.match(job_id or ''):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self._load(job_id)
+
+    def cancel(self, job_id):
+        """Stops topics that haven't started; work already running finishes. Returns the snapshot or None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with job.lock:
+            job.cancelled = True
+        return job.to_dict()
+
+    def _run_topic(self, job, lesson):
+        with job.lock:
+            if job.cancelled:
+                lesson["status"] = "cancelled"
+            else:
+                lesson["status"] = "generating"
+        if lesson["status"] == "cancelled":
+            return self._topic_finished(job)
+
+        self.pacer.wait()
+        # Upstream rate limits serve interactive requests before batch work
+        request_priority.set(PRIORITY_BATCH)
+        try:
+            plan = self.plan_fn(lesson["topic"], lesson["itemCount"])
+        except Exception as e:
+            logger.error(f"Batch {job.id}: lesson '{lesson['topic']}' failed: {e}")
+            with job.lock:
+                lesson["status"], lesson["error"] = "failed", str(e)
+            return self._topic_finished(job)
+
+        items = [{"name": item["name"], "spokenText": item["spokenText"], "image": ""} for item in plan.get("items", [])]
+        with job.lock:
+            lesson["title"] = plan.get("title", f"Learn About {lesson['topic']}")
+            lesson["description"] = plan.get("description", "")
+            lesson["items"] = items
+            illustrate = job.with_images and items and not job.cancelled
+            if illustrate:
+                lesson["status"], lesson["imagesPending"] = "illustrating", len(items)
+                job.images_total += len(items)
+            else:
+                lesson["status"] = "done"
+        if not illustrate:
+            return self._topic_finished(job)
+
+        _, image_pool = self._pools()
+        for item in items:
+            image_pool.submit(self._run_image, job, lesson, item, self.image_prompt_fn(lesson["topic"], item["name"]))
+
+    def _run_image(self, job, lesson, item, prompt):
+        image = ''
+        if not job.cancelled:
+            self.pacer.wait()
+            request_base_url.set(job.base_url)
+            request_priority.set(PRIORITY_BATCH)
+            try:
+                image = self.image_fn(prompt)
+            except Exception as e:
+                logger.error(f"Batch {job.id}: image for '{item['name']}' failed: {e}")
+        with job.lock:
+            item["image"] = image
+            job.images_done += 1
+            lesson["imagesPending"] -= 1
+            if lesson["imagesPending"]:
+                return
+            del lesson["imagesPending"]
+            lesson["status"] = "done"
+        self._topic_finished(job)
+
+    def _topic_finished(self, job):
+        if job.finished:
+            self._finish(job)
+        else:
+            self._persist(job)
+
+    def _finish(self, job):
+        with job.lock:
+            if job.finished_at is None:
+                job.finished_at = time.time()
+        logger.info(f"📚 Batch {job.id} finished ({len(job.lessons)} topics)")
+        self._persist(job)
+
+    def _persist(self, job):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(job.to_dict(), f)
+            os.replace(tmp_path, os.path.join(self.directory, f"{job.id}.json"))
+        except OSError as e:
+            logger.error(f"Batch {job.id}: could not save results: {e}")
+
+    def _load(self, job_id):
+        if not self.directory:
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{job_id}.json"), 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Saved mid-run by a process that has since stopped
+        if snapshot.get("status") in ("queued", "running"):
+            snapshot["status"] = "interrupted"
+        return snapshot
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "jobs": len(jobs),
+            "running": sum(1 for job in jobs if not job.finished),
+            "images_done": sum(job.images_done for job in jobs)
+        }
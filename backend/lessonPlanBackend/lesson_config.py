@@ -1,10 +1,11 @@
 import os
 from dotenv import load_dotenv
+from sharedBackend.shared_config import SharedConfig
 
 load_dotenv()
 
 class LessonConfig:
-    GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+    GEMINI_API_KEY = SharedConfig.GEMINI_API_KEY
 
     TEXT_MODEL = os.environ.get(
         "GEMINI_TEXT_MODEL",
@@ -17,3 +18,43 @@ class LessonConfig:
     )
 
     IMAGE_TIMEOUT = int(os.environ.get("IMAGE_TIMEOUT", 60))
+
+    # REST endpoint for image generation (benchmarks point this at a local stand-in)
+    GEMINI_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com").rstrip('/')
+
+    # Max number of item illustrations generated at the same time per lesson
+    IMAGE_CONCURRENCY = int(os.environ.get("IMAGE_CONCURRENCY", 5))
+
+    # /generate-lesson streams the text plan and starts each item's image as soon as its name is parsed
+    PIPELINED_IMAGES = os.environ.get("LESSON_PIPELINED_IMAGES", "true").lower() == "true"
+
+    # Ask the text model for schema-constrained JSON (turn off for models without JSON mode)
+    STRUCTURED_OUTPUT = os.environ.get("LESSON_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+    # Parsed lesson plans (title/description/items) per (topic, item_count, model)
+    LESSON_CACHE_TTL = int(os.environ.get("LESSON_CACHE_TTL", 6 * 3600))
+    LESSON_CACHE_MAX_ENTRIES = int(os.environ.get("LESSON_CACHE_MAX_ENTRIES", 512))
+
+    # POST /api/lessons/batch: worker pools shared by every batch job in the process
+    BATCH_MAX_TOPICS = int(os.environ.get("LESSON_BATCH_MAX_TOPICS", 200))
+    BATCH_TEXT_WORKERS = int(os.environ.get("LESSON_BATCH_TEXT_WORKERS", 2))
+    BATCH_IMAGE_WORKERS = int(os.environ.get("LESSON_BATCH_IMAGE_WORKERS", 4))
+    # Upstream calls per minute across all batch jobs (0 = no limit beyond the pools)
+    BATCH_REQUESTS_PER_MINUTE = int(os.environ.get("LESSON_BATCH_REQUESTS_PER_MINUTE", 60))
+    BATCH_MAX_JOBS = int(os.environ.get("LESSON_BATCH_MAX_JOBS", 50))
+    BATCH_DIR = os.environ.get("LESSON_BATCH_DIR", os.path.join(SharedConfig.CACHE_DIR, "lesson_batches"))
+
+    # Warm lesson library (lessonPlanBackend/lesson_library.py): popular topics built ahead of time,
+    # images included, and served by /generate-lesson from an mmapped bundle that survives restarts
+    LIBRARY_ENABLED = os.environ.get("LESSON_LIBRARY_ENABLED", "true").lower() == "true"
+    LIBRARY_TOPICS = os.environ.get(
+        "LESSON_LIBRARY_TOPICS",
+        "animals,colors,shapes,fruits,vegetables,numbers,farm animals,ocean animals,dinosaurs,vehicles,insects,weather"
+    )
+    # Requests for a library topic with a different item_count are generated as usual
+    LIBRARY_ITEM_COUNT = int(os.environ.get("LESSON_LIBRARY_ITEM_COUNT", 5))
+    LIBRARY_PATH = os.environ.get("LESSON_LIBRARY_PATH", os.path.join(SharedConfig.CACHE_DIR, "lesson_library.bin"))
+    # Older entries are still served but rebuilt: at most REFRESH_BATCH per pass, one pass per REFRESH_INTERVAL
+    LIBRARY_MAX_AGE = int(os.environ.get("LESSON_LIBRARY_MAX_AGE", 7 * 24 * 3600))
+    LIBRARY_REFRESH_INTERVAL = int(os.environ.get("LESSON_LIBRARY_REFRESH_INTERVAL", 3600))
+    LIBRARY_REFRESH_BATCH = int(os.environ.get("LESSON_LIBRARY_REFRESH_BATCH", 2))
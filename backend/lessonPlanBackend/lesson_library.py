@@ -0,0 +1,343 @@
+"""
+Warm lesson library: popular preschool topics built ahead of time.
+
+Most /generate-lesson traffic is a handful of topics (animals, colors, shapes,
+fruits, ...). LESSON_LIBRARY_TOPICS lists them; a background warmer builds each
+one, images included, through the same code path as /generate-lesson and saves
+it to a single bundle file. create_app() mmaps the bundle, so those topics are
+answered from disk right away and survive restarts without regeneration.
+
+Bundle layout (LESSON_LIBRARY_PATH):
+
+    b'MOCHILB1' | u32 index length | JSON index | records
+    index:  {"entries": {key: {"topic", "itemCount", "builtAt", "offset", "length"}}}
+    record: zlib-compressed JSON lesson (title, description, items with image URLs)
+
+Records are decoded on lookup, straight from the mapping. The file is rewritten
+(temp file + rename) whenever a topic is built, and other worker processes pick
+the new file up on their next lookup after LIBRARY_RELOAD_SECONDS.
+
+Staleness: entries older than LESSON_LIBRARY_MAX_AGE keep being served while
+the warmer rebuilds at most LESSON_LIBRARY_REFRESH_BATCH of them per pass (the
+stalest first), so a library built all at once doesn't expire all at once.
+Only one process per bundle runs the warmer (advisory lock next to the file).
+"""
+
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+import logging
+import tempfile
+import threading
+from sharedBackend.blob_store import blob_store, image_url
+from sharedBackend.rate_limiter import PRIORITY_BATCH, request_priority
+from sharedBackend.shared_config import SharedConfig
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process warms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MOCHILB1'
+HEADER = struct.Struct('>I')
+IMAGE_PATH_PREFIX = '/api/images/'
+# How often a lookup checks whether another process rewrote the bundle
+LIBRARY_RELOAD_SECONDS = 5.0
+
+
+def parse_topics(spec):
+    """"animals, colors,shapes" -> ['animals', 'colors', 'shapes'] (order kept, duplicates dropped)"""
+    topics = []
+    for topic in (spec or '').split(','):
+        topic = topic.strip()
+        if topic and topic.lower() not in (seen.lower() for seen in topics):
+            topics.append(topic)
+    return topics
+
+
+class LessonBundle:
+    """Read-only, mmapped view of a bundle file."""
+
+    def __init__(self, entries=None, data=None, mtime=None):
+        self.entries = entries or {}
+        self._data = data
+        self.mtime = mtime
+
+    @classmethod
+    def open(cls, path):
+        """The bundle at path; an empty one if it is missing or unreadable."""
+        try:
+            with open(path, 'rb') as f:
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+                # The mapping stays valid after the file is closed (or replaced)
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Missing, or empty (mmap refuses zero-length files)
+            return cls()
+        try:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError('not a lesson bundle')
+            (index_length,) = HEADER.unpack_from(data, len(MAGIC))
+            body = len(MAGIC) + HEADER.size + index_length
+            index = json.loads(data[len(MAGIC) + HEADER.size:body])
+            entries = {
+                key: dict(entry, offset=entry['offset'] + body)
+                for key, entry in index.get('entries', {}).items()
+            }
+        except (ValueError, KeyError, struct.error) as e:
+            logger.warning(f"⚠️ Ignoring unreadable lesson library {path}: {e}")
+            data.close()
+            return cls()
+        return cls(entries, data, mtime)
+
+    def record(self, key):
+        """The compressed record for key, or None."""
+        entry = self.entries.get(key)
+        if entry is None or self._data is None:
+            return None
+        return self._data[entry['offset']:entry['offset'] + entry['length']]
+
+    def lesson(self, key):
+        record = self.record(key)
+        if record is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(record))
+        except (zlib.error, ValueError):
+            return None
+
+    @staticmethod
+    def write(path, records):
+        """records: {key: (entry without offset/length, compressed bytes)}. Atomic replace."""
+        entries, offset = {}, 0
+        for key, (entry, record) in records.items():
+            entries[key] = dict(entry, offset=offset, length=len(record))
+            offset += len(record)
+        index = json.dumps({"entries": entries}, separators=(',', ':')).encode('utf-8')
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(MAGIC + HEADER.pack(len(index)) + index)
+                for _, record in records.values():
+                    f.write(record)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _image_digest(image):
+    """The blob digest behind an /api/images URL, host-relative or under PUBLIC_BASE_URL; None for anything else."""
+    if SharedConfig.PUBLIC_BASE_URL and image.startswith(SharedConfig.PUBLIC_BASE_URL + IMAGE_PATH_PREFIX):
+        image = image[len(SharedConfig.PUBLIC_BASE_URL):]
+    if image.startswith(IMAGE_PATH_PREFIX):
+        return image[len(IMAGE_PATH_PREFIX):]
+    return None
+
+
+def _missing_images(lesson):
+    """True if an item's /api/images blob is gone (e.g. the blob directory was wiped)."""
+    for item in lesson.get('items', []):
+        digest = _image_digest(item.get('image') or '')
+        if digest and not blob_store.locate(digest):
+            return True
+    return False
+
+
+def _with_image_urls(lesson):
+    """Point bundled image URLs at the current request's host (or PUBLIC_BASE_URL)."""
+    for item in lesson.get('items', []):
+        digest = _image_digest(item.get('image') or '')
+        if digest:
+            item['image'] = image_url(digest)
+    return lesson
+
+
+class WarmLessonLibrary:
+    def __init__(self, path, topics, item_count, build_fn, key_fn, enabled=True,
+                 max_age=7 * 24 * 3600, refresh_interval=3600, refresh_batch=2):
+        self.path = path
+        self.topics = topics
+        self.item_count = item_count
+        self.build_fn = build_fn  # (topic, item_count) -> {"title", "description", "items"}
+        self.key_fn = key_fn      # (topic, item_count) -> str
+        self.enabled = bool(enabled and topics)
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.refresh_batch = max(1, refresh_batch)
+        self._bundle = LessonBundle()
+        self._broken = set()
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.failures = 0
+        self.building = None
+
+    def load(self):
+        """Maps the bundle; entries whose images are gone are skipped until rebuilt."""
+        if not self.enabled:
+            return
+        bundle = LessonBundle.open(self.path)
+        broken = set()
+        for key in bundle.entries:
+            lesson = bundle.lesson(key)
+            if lesson is None or _missing_images(lesson):
+                broken.add(key)
+        with self._lock:
+            self._bundle, self._broken = bundle, broken
+            self._checked_at = time.monotonic()
+        if bundle.entries:
+            logger.info(f"📚 Lesson library: {len(bundle.entries) - len(broken)} topics ready from {self.path}")
+
+    def _maybe_reload(self):
+        # Another worker process may have rewritten the bundle
+        now = time.monotonic()
+        if now - self._checked_at < LIBRARY_RELOAD_SECONDS:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._bundle.mtime:
+            self.load()
+
+    def get(self, topic, item_count):
+        """The prebuilt lesson for a library topic (stale ones included), or None."""
+        if not self.enabled:
+            return None
+        self._maybe_reload()
+        key = self.key_fn(topic, item_count)
+        bundle = self._bundle
+        lesson = None if key in self._broken else bundle.lesson(key)
+        with self._lock:
+            if lesson is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return _with_image_urls(lesson) if lesson is not None else None
+
+    def start(self):
+        """Starts the background warmer (once per process)."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='lesson-library', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _claim(self):
+        """One warmer per bundle across worker processes; the others only read."""
+        if fcntl is None:
+            return True
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._lock_file = open(self.path + '.lock', 'a')
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+            return False
+
+    def _run(self):
+        if not self._claim():
+            logger.info("📚 Lesson library is warmed by another process")
+            return
+        while not self._stop.is_set():
+            for topic in self.due_topics():
+                if self._stop.is_set():
+                    break
+                self._build(topic)
+            self._stop.wait(self.refresh_interval)
+
+    def due_topics(self, now=None):
+        """Topics with no usable entry (all of them), then up to refresh_batch stale ones, stalest first."""
+        now = time.time() if now is None else now
+        bundle = self._bundle
+        missing, stale = [], []
+        for topic in self.topics:
+            key = self.key_fn(topic, self.item_count)
+            entry = bundle.entries.get(key)
+            if entry is None or key in self._broken:
+                missing.append(topic)
+            elif now - entry['builtAt'] >= self.max_age:
+                stale.append((entry['builtAt'], topic))
+        return missing + [topic for _, topic in sorted(stale)[:self.refresh_batch]]
+
+    def _build(self, topic):
+        # Upstream rate limits serve interactive requests first
+        request_priority.set(PRIORITY_BATCH)
+        self.building = topic
+        started = time.perf_counter()
+        try:
+            lesson = self.build_fn(topic, self.item_count)
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"⚠️ Lesson library: '{topic}' failed: {e}")
+            return
+        finally:
+            self.building = None
+        items = lesson.get('items', [])
+        if not items or not all(item.get('image') for item in items):
+            # A fallback (blank image) shouldn't be pinned for a week; retried on the next pass
+            self.failures += 1
+            logger.warning(f"⚠️ Lesson library: '{topic}' came back incomplete, will retry")
+            return
+        try:
+            self._store(topic, lesson)
+        except OSError as e:
+            self.failures += 1
+            logger.error(f"Lesson library: could not save '{topic}': {e}")
+            return
+        self.builds += 1
+        logger.info(f"📚 Lesson library: built '{topic}' in {time.perf_counter() - started:.1f}s")
+
+    def _store(self, topic, lesson):
+        key = self.key_fn(topic, self.item_count)
+        wanted = {self.key_fn(name, self.item_count) for name in self.topics}
+        bundle = self._bundle
+        # Keep the other configured topics' records as they are; topics dropped from the config go
+        records = {
+            other: ({k: v for k, v in entry.items() if k not in ('offset', 'length')}, bundle.record(other))
+            for other, entry in bundle.entries.items()
+            if other in wanted and other != key and other not in self._broken
+        }
+        record = zlib.compress(json.dumps(lesson, separators=(',', ':')).encode('utf-8'))
+        records[key] = ({"topic": topic, "itemCount": self.item_count, "builtAt": time.time()}, record)
+        LessonBundle.write(self.path, records)
+        self.load()
+
+    def stats(self):
+        bundle = self._bundle
+        now = time.time()
+        keys = {self.key_fn(topic, self.item_count) for topic in self.topics}
+        ready = [bundle.entries[key] for key in keys if key in bundle.entries and key not in self._broken]
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            "enabled": self.enabled,
+            "topics": len(self.topics),
+            "ready": len(ready),
+            "stale": sum(1 for entry in ready if now - entry['builtAt'] >= self.max_age),
+            "building": self.building,
+            "builds": self.builds,
+            "failures": self.failures,
+            "hits": hits,
+            "misses": misses
+        }
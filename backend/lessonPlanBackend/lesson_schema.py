@@ -0,0 +1,74 @@
+"""
+Typed shape of a generated lesson plan, and the response schema we ask the
+text model to follow so it returns that shape as plain JSON.
+"""
+
+from dataclasses import dataclass, field, asdict
+from typing import List
+
+LESSON_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "title": {"type": "STRING"},
+        "description": {"type": "STRING"},
+        "items": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "name": {"type": "STRING"},
+                    "spokenText": {"type": "STRING"}
+                },
+                "required": ["name", "spokenText"]
+            }
+        }
+    },
+    "required": ["title", "description", "items"]
+}
+
+LESSON_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": LESSON_RESPONSE_SCHEMA
+}
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else ''
+
+
+@dataclass
+class LessonItem:
+    name: str
+    spokenText: str
+
+
+@dataclass
+class LessonPlan:
+    title: str
+    description: str = ''
+    items: List[LessonItem] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data, topic=''):
+        """
+        Validates model output. Missing title/description get defaults and
+        items without a name or spoken text are dropped; a plan with no usable
+        items is rejected.
+        """
+        if not isinstance(data, dict):
+            raise ValueError('Lesson plan is not a JSON object')
+        items = [
+            LessonItem(_text(item.get('name')), _text(item.get('spokenText')))
+            for item in data.get('items') or [] if isinstance(item, dict)
+        ]
+        items = [item for item in items if item.name and item.spokenText]
+        if not items:
+            raise ValueError('Lesson plan has no usable items')
+        return cls(
+            title=_text(data.get('title')) or f'Learn About {topic}',
+            description=_text(data.get('description')),
+            items=items
+        )
+
+    def to_dict(self):
+        return asdict(self)
@@ -0,0 +1,147 @@
+"""
+Pipelined lesson generation: item illustrations start while the text plan is
+still streaming in.
+
+    names = ItemNameStream()
+    for chunk in response:                 # generate_content(..., stream=True)
+        for index, name in names.feed(chunk.text):
+            prefetcher.start(name)          # image request goes out now, not after the whole plan
+
+ItemNameStream only looks for items[i].name in the lesson object; the full
+text is still parsed (and repaired) by parse_lesson_json once it has arrived,
+so an item renamed or dropped by validation just doesn't use its prefetched
+image.
+"""
+
+import json
+import threading
+from sharedBackend.safety_filter import safety_filter
+from sharedBackend.stats import register_stats
+
+
+class ItemNameStream:
+    """Incremental scanner that yields (index, name) as each items[i].name string closes."""
+
+    def __init__(self):
+        self._stack = []        # frames: {'type': 'obj', 'key': ..., 'expect_key': bool} or {'type': 'arr', 'count': n}
+        self._in_string = False
+        self._escaped = False
+        self._string = []
+        self._string_is_key = False
+
+    def feed(self, text):
+        found = []
+        for ch in text or '':
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                    self._string.append(ch)
+                elif ch == '\\':
+                    self._escaped = True
+                    self._string.append(ch)
+                elif ch == '"':
+                    self._in_string = False
+                    self._close_string(found)
+                else:
+                    self._string.append(ch)
+                continue
+
+            top = self._stack[-1] if self._stack else None
+            if ch == '"':
+                if top is None:
+                    continue  # text before the lesson object
+                self._in_string = True
+                self._string = []
+                self._string_is_key = top['type'] == 'obj' and top['expect_key']
+            elif ch == '{':
+                if top is not None and top['type'] == 'arr':
+                    top['count'] += 1
+                self._stack.append({'type': 'obj', 'key': None, 'expect_key': True})
+            elif ch == '[':
+                if top is not None and top['type'] == 'arr':
+                    top['count'] += 1
+                if top is not None:
+                    self._stack.append({'type': 'arr', 'count': 0})
+            elif ch in '}]':
+                if self._stack:
+                    self._stack.pop()
+            elif ch == ':' and top is not None and top['type'] == 'obj':
+                top['expect_key'] = False
+            elif ch == ',' and top is not None and top['type'] == 'obj':
+                top['expect_key'] = True
+        return found
+
+    def _close_string(self, found):
+        raw = ''.join(self._string)
+        top = self._stack[-1]
+        if self._string_is_key:
+            try:
+                top['key'] = json.loads(f'"{raw}"')
+            except ValueError:
+                top['key'] = raw
+            return
+        # Value string: is it lesson.items[i].name?
+        if (len(self._stack) == 3 and self._stack[0]['key'] == 'items'
+                and self._stack[1]['type'] == 'arr' and top['key'] == 'name'):
+            try:
+                name = json.loads(f'"{raw}"').strip()
+            except ValueError:
+                name = raw.strip()
+            if name:
+                found.append((self._stack[1]['count'] - 1, name))
+
+
+class PrefetchStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lessons = 0
+        self.prefetched = 0
+        self.used = 0
+        self.wasted = 0
+
+    def record(self, prefetched, wasted):
+        with self._lock:
+            self.lessons += 1
+            self.prefetched += prefetched
+            self.used += prefetched - wasted
+            self.wasted += wasted
+
+    def stats(self):
+        with self._lock:
+            return {"lessons": self.lessons, "prefetched": self.prefetched, "used": self.used, "wasted": self.wasted}
+
+
+prefetch_stats = PrefetchStats()
+register_stats('lesson_image_prefetch', prefetch_stats.stats)
+
+
+class ImagePrefetcher:
+    """
+    Starts one illustration per item name as names arrive (at most `limit`,
+    skipping names the safety filter would drop), then hands each final item
+    its future: the prefetched one, or a fresh one for names it never saw.
+    """
+
+    def __init__(self, submit, limit):
+        self.submit = submit  # name -> Future (or asyncio task)
+        self.limit = limit
+        self.started = {}
+        self.prefetched = 0
+
+    def start(self, name):
+        key = name.strip().lower()
+        if key in self.started or len(self.started) >= self.limit or safety_filter.is_blocked(name):
+            return
+        self.started[key] = self.submit(name)
+        self.prefetched += 1
+
+    def take(self, name):
+        future = self.started.pop(name.strip().lower(), None)
+        return future if future is not None else self.submit(name)
+
+    def leftovers(self):
+        """Prefetches no final item claimed (renamed, dropped, or past the item count)."""
+        futures, self.started = list(self.started.values()), {}
+        if self.prefetched:
+            prefetch_stats.record(self.prefetched, len(futures))
+        return futures
@@ -5,124 +5,415 @@ Register this in your main Flask app.
 
 import os
 import json
-import re
-import requests
-from flask import Blueprint, request, jsonify
-import google.generativeai as genai
+import base64
+import copy
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from sharedBackend.image_cache import get_image_cache
+from sharedBackend.blob_store import image_reference
+from sharedBackend.gemini_registry import gemini
+from sharedBackend.http_client import http_client
+from sharedBackend.safety_filter import safety_filter
+from sharedBackend.image_cache import normalize_prompt
+from sharedBackend.json_repair import parse_model_json
+from sharedBackend.circuit_breaker import CircuitOpen, circuit_breakers
+from sharedBackend.metrics import count_fallback, stage, upstream_timer
+from sharedBackend.rate_limiter import RateLimited, rate_limits
+from sharedBackend.stats import register_stats
+from sharedBackend.ttl_cache import CoalescingCache
+from .batch_jobs import BatchRejected, LessonBatchManager
 from .lesson_config import LessonConfig
+from .lesson_schema import LessonPlan, LESSON_GENERATION_CONFIG
+from .lesson_library import WarmLessonLibrary, parse_topics
+from .lesson_stream import ImagePrefetcher, ItemNameStream
 
 # LessonConfig.validate()
 
 GEMINI_API_KEY = LessonConfig.GEMINI_API_KEY
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
 
 lessons_bp = Blueprint('lessons', __name__, url_prefix='/api')
 
+# A class opening the same topic at once shares one text generation. Entries are
+# (plan, complete); a plan rebuilt from a cut-off reply is shared but not cached.
+lesson_plan_cache = CoalescingCache(
+    max_entries=LessonConfig.LESSON_CACHE_MAX_ENTRIES,
+    ttl=LessonConfig.LESSON_CACHE_TTL,
+    cacheable=lambda entry: entry[1]
+)
+register_stats('lesson_plan_cache', lesson_plan_cache.stats)
+
 # GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 
 # if GEMINI_API_KEY:
 #     genai.configure(api_key=GEMINI_API_KEY)
 
 
-def generate_image_with_rest_api(prompt: str) -> str:
-    if not GEMINI_API_KEY:
-        return ''
+def build_image_request(prompt: str):
+    """Returns (url, payload) for a Gemini REST image generation call."""
     # url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp-image-generation:generateContent?key={GEMINI_API_KEY}"
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{LessonConfig.IMAGE_MODEL}:generateContent?key={LessonConfig.GEMINI_API_KEY}"
+    url = f"{LessonConfig.GEMINI_API_BASE}/v1beta/models/{LessonConfig.IMAGE_MODEL}:generateContent?key={LessonConfig.GEMINI_API_KEY}"
 
     payload = {
         "contents": [{"parts": [{"text": prompt}]}],
         "generationConfig": {"responseModalities": ["IMAGE", "TEXT"]}
     }
+    return url, payload
+
+
+def extract_inline_image(data: dict):
+    """Returns (mime_type, image_bytes) from a generateContent response body, or None."""
+    candidates = data.get('candidates', [])
+    if candidates:
+        for part in candidates[0].get('content', {}).get('parts', []):
+            if 'inlineData' in part:
+                mime = part['inlineData'].get('mimeType', 'image/png')
+                img = part['inlineData'].get('data', '')
+                if img:
+                    return mime, base64.b64decode(img)
+    return None
+
+
+def generate_image_with_rest_api(prompt: str) -> str:
+    cache = get_image_cache()
+    if cache:
+        cached = cache.get(LessonConfig.IMAGE_MODEL, prompt)
+        if cached:
+            return image_reference(cached.data, cached.mime_type)
+
+    if not GEMINI_API_KEY:
+        count_fallback('blank_lesson_image', 'unconfigured')
+        return ''
+    url, payload = build_image_request(prompt)
     try:
-        response = requests.post(url, json=payload, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-        candidates = data.get('candidates', [])
-        if candidates:
-            for part in candidates[0].get('content', {}).get('parts', []):
-                if 'inlineData' in part:
-                    mime = part['inlineData'].get('mimeType', 'image/png')
-                    img = part['inlineData'].get('data', '')
-                    if img:
-                        return f"data:{mime};base64,{img}"
+        # An open circuit returns '' at once instead of waiting out IMAGE_TIMEOUT per item
+        circuit_breakers.check('gemini', LessonConfig.IMAGE_MODEL)
+        rate_limits.acquire('gemini', LessonConfig.IMAGE_MODEL)
+        with circuit_breakers.guard('gemini', LessonConfig.IMAGE_MODEL), upstream_timer('gemini_image', LessonConfig.IMAGE_MODEL):
+            response = http_client.post(url, json=payload, read_timeout=LessonConfig.IMAGE_TIMEOUT)
+            rate_limits.observe('gemini', LessonConfig.IMAGE_MODEL, status=response.status_code, headers=response.headers)
+            response.raise_for_status()
+        image = extract_inline_image(response.json())
+        if image:
+            mime, image_bytes = image
+            if cache:
+                cache.put(LessonConfig.IMAGE_MODEL, prompt, mime, image_bytes)
+            return image_reference(image_bytes, mime)
+        count_fallback('blank_lesson_image', 'no_image')
+        return ''
+    except (RateLimited, CircuitOpen) as e:
+        count_fallback('blank_lesson_image', e)
+        print(f"Image generation skipped: {e}")
         return ''
     except Exception as e:
+        count_fallback('blank_lesson_image', e)
         print(f"Image generation error: {e}")
         return ''
 
 
-@lessons_bp.route('/generate-lesson', methods=['POST'])
-def generate_lesson():
-    try:
-        data = request.get_json()
-        topic = data.get('topic', '')
-        item_count = data.get('item_count', 5)
-        if not topic:
-            return jsonify({'success': False, 'error': 'Topic is required'}), 400
-        if not GEMINI_API_KEY:
-            return jsonify({'success': False, 'error': 'GEMINI_API_KEY not configured'}), 500
-
-        # model = genai.GenerativeModel('gemini-2.0-flash')
-        model = genai.GenerativeModel(LessonConfig.TEXT_MODEL)
-
-        content_prompt = f"""Generate an educational lesson about "{topic}" for children aged 4-8.
+def build_item_image_prompt(topic: str, item_name: str) -> str:
+    return f'Create a simple, colorful, child-friendly cartoon illustration of "{item_name}" for a children\'s app about "{topic}". Bright colors, simple shapes, no text, white background.'
+
+
+def _submit(pool, fn, *args):
+    # Run in a copy of the caller's context so image URLs can use the current request's host
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def generate_item_images(topic: str, items: list) -> list:
+    """
+    Generates one illustration per item, up to LessonConfig.IMAGE_CONCURRENCY at a time.
+    Each call keeps its own timeout and '' fallback; results are in item order.
+    """
+    if not items:
+        return []
+    prompts = [build_item_image_prompt(topic, item['name']) for item in items]
+    workers = max(1, min(LessonConfig.IMAGE_CONCURRENCY, len(prompts)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lesson-image') as pool:
+        futures = [_submit(pool, generate_image_with_rest_api, prompt) for prompt in prompts]
+        return [future.result() for future in futures]
+
+
+def build_lesson_prompt(topic: str, item_count) -> str:
+    return f"""Generate an educational lesson about "{topic}" for children aged 4-8.
 Return a valid JSON object with this exact structure:
 {{"title": "Learn About {topic}", "description": "A fun lesson about {topic}.", "items": [{{"name": "item name", "spokenText": "Simple text (1-2 sentences)"}}]}}
 Generate exactly {item_count} items. Only return JSON."""
 
-        content_response = model.generate_content(content_prompt)
-        json_match = re.search(r'\{[\s\S]*\}', content_response.text)
-        if not json_match:
-            raise ValueError('Could not parse JSON')
-        lesson_content = json.loads(json_match.group())
-
-        items_with_images = []
-        for item in lesson_content.get('items', []):
-            image_prompt = f'Create a simple, colorful, child-friendly cartoon illustration of "{item["name"]}" for a children\'s app about "{topic}". Bright colors, simple shapes, no text, white background.'
-            image_data = generate_image_with_rest_api(image_prompt)
-            items_with_images.append({
-                'name': item['name'],
-                'spokenText': item['spokenText'],
-                'image': image_data
-            })
 
-        return jsonify({
-            'success': True,
+def lesson_generation_config():
+    return LESSON_GENERATION_CONFIG if LessonConfig.STRUCTURED_OUTPUT else None
+
+
+def parse_lesson_json(text: str, topic: str = ''):
+    """
+    Tolerant parse (see sharedBackend/json_repair.py) + validation. Returns
+    (plan, complete); complete is False when the reply was cut off and the plan
+    may be missing items. Raises ValueError if unusable.
+    """
+    try:
+        with stage('lesson_json'):
+            data, outcome = parse_model_json(text, 'lesson', with_outcome=True)
+            return LessonPlan.from_dict(data, topic).to_dict(), outcome != 'truncated'
+    except ValueError as e:
+        print(f"Lesson JSON rejected: {e}")
+        raise
+
+
+def chunk_text(chunk) -> str:
+    # .text raises when a streamed chunk carries no text part (e.g. the final finish chunk)
+    try:
+        return chunk.text
+    except ValueError:
+        return ''
+
+
+def stream_lesson_text(topic: str, item_count, on_item_name) -> str:
+    """Streams the plan, passing each items[i].name to on_item_name as soon as it is complete."""
+    names = ItemNameStream()
+    parts = []
+    response = gemini.model(LessonConfig.TEXT_MODEL).generate_content(
+        build_lesson_prompt(topic, item_count), generation_config=lesson_generation_config(), stream=True
+    )
+    for chunk in response:
+        text = chunk_text(chunk)
+        parts.append(text)
+        for _, name in names.feed(text):
+            on_item_name(name)
+    return ''.join(parts)
+
+
+def generate_lesson_plan(topic: str, item_count, on_item_name=None) -> dict:
+    """
+    Asks the text model for the lesson title, description and items.
+    Cached per (normalized topic, item_count, model); concurrent identical
+    requests wait on a single upstream call. With on_item_name the text is
+    streamed and item names are reported while it is still generating (only
+    when this call does the upstream work, not on cache hits).
+    """
+    def fetch():
+        circuit_breakers.check('gemini', LessonConfig.TEXT_MODEL)
+        rate_limits.acquire('gemini', LessonConfig.TEXT_MODEL)
+        try:
+            with circuit_breakers.guard('gemini', LessonConfig.TEXT_MODEL), upstream_timer('gemini_text', LessonConfig.TEXT_MODEL):
+                if on_item_name:
+                    text = stream_lesson_text(topic, item_count, on_item_name)
+                else:
+                    text = gemini.model(LessonConfig.TEXT_MODEL).generate_content(
+                        build_lesson_prompt(topic, item_count), generation_config=lesson_generation_config()
+                    ).text
+        except Exception as e:
+            rate_limits.observe_error('gemini', LessonConfig.TEXT_MODEL, e)
+            raise
+        return parse_lesson_json(text, topic)
+
+    # Callers get their own copy so nothing can mutate the cached plan
+    plan, _ = lesson_plan_cache.get_or_compute(lesson_plan_key(topic, item_count), fetch)
+    return drop_unsafe_items(copy.deepcopy(plan))
+
+
+def drop_unsafe_items(lesson: dict) -> dict:
+    """Removes generated items whose name or spoken text trips the safety filter."""
+    lesson['items'] = [
+        item for item in lesson.get('items', [])
+        if not safety_filter.is_blocked(f"{item.get('name', '')} {item.get('spokenText', '')}")
+    ]
+    return lesson
+
+
+def prefetch_limit(item_count) -> int:
+    """Most images to start before the plan is final: the requested item count."""
+    try:
+        return max(1, int(item_count))
+    except (TypeError, ValueError):
+        return 5
+
+
+def generate_lesson_with_images(topic: str, item_count):
+    """
+    Returns (lesson_plan, images in item order). With LessonConfig.PIPELINED_IMAGES
+    each item's image starts while the rest of the plan is still being written,
+    so the text and image phases overlap instead of running back to back.
+    """
+    if not LessonConfig.PIPELINED_IMAGES:
+        lesson_content = generate_lesson_plan(topic, item_count)
+        return lesson_content, generate_item_images(topic, lesson_content.get('items', []))
+
+    pool = ThreadPoolExecutor(max_workers=max(1, LessonConfig.IMAGE_CONCURRENCY), thread_name_prefix='lesson-image')
+    prefetcher = ImagePrefetcher(
+        lambda name: _submit(pool, generate_image_with_rest_api, build_item_image_prompt(topic, name)),
+        prefetch_limit(item_count)
+    )
+    try:
+        lesson_content = generate_lesson_plan(topic, item_count, on_item_name=prefetcher.start)
+        futures = [prefetcher.take(item['name']) for item in lesson_content.get('items', [])]
+        for future in prefetcher.leftovers():
+            future.cancel()
+        return lesson_content, [future.result() for future in futures]
+    finally:
+        # Unclaimed prefetches that already started finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def lesson_plan_key(topic: str, item_count):
+    return (normalize_prompt(topic), str(item_count), LessonConfig.TEXT_MODEL)
+
+
+def read_lesson_request():
+    """Returns (topic, item_count, error_response) for the lesson endpoints."""
+    topic, item_count, error = validate_lesson_request(request.get_json())
+    if error:
+        message, status = error
+        return topic, item_count, (jsonify({'success': False, 'error': message}), status)
+    return topic, item_count, None
+
+
+def validate_lesson_request(data):
+    """Returns (topic, item_count, (error_message, status) or None)."""
+    data = data or {}
+    topic = data.get('topic', '')
+    item_count = data.get('item_count', 5)
+    if not topic:
+        return topic, item_count, ('Topic is required', 400)
+    if safety_filter.is_blocked(topic):
+        return topic, item_count, ("Let's pick a friendlier topic!", 400)
+    if not GEMINI_API_KEY:
+        return topic, item_count, ('GEMINI_API_KEY not configured', 500)
+    return topic, item_count, None
+
+
+def lesson_response(topic: str, lesson_content: dict, images: list) -> dict:
+    """The /generate-lesson body (without "success") from a plan and its images in item order."""
+    items = lesson_content.get('items', [])
+    return {
+        'title': lesson_content.get('title', f'Learn About {topic}'),
+        'description': lesson_content.get('description', ''),
+        'items': [{
+            'name': item['name'],
+            'spokenText': item['spokenText'],
+            'image': image_data
+        } for item, image_data in zip(items, images)]
+    }
+
+
+def build_lesson(topic: str, item_count) -> dict:
+    """A complete lesson with images, as /generate-lesson returns it."""
+    lesson_content, images = generate_lesson_with_images(topic, item_count)
+    return lesson_response(topic, lesson_content, images)
+
+
+def lesson_library_key(topic: str, item_count) -> str:
+    # Image model too: switching it should rebuild the pictures, not just the text
+    return '|'.join(lesson_plan_key(topic, item_count) + (LessonConfig.IMAGE_MODEL,))
+
+
+lesson_library = WarmLessonLibrary(
+    LessonConfig.LIBRARY_PATH,
+    parse_topics(LessonConfig.LIBRARY_TOPICS),
+    LessonConfig.LIBRARY_ITEM_COUNT,
+    build_lesson,
+    lesson_library_key,
+    enabled=LessonConfig.LIBRARY_ENABLED and bool(GEMINI_API_KEY),
+    max_age=LessonConfig.LIBRARY_MAX_AGE,
+    refresh_interval=LessonConfig.LIBRARY_REFRESH_INTERVAL,
+    refresh_batch=LessonConfig.LIBRARY_REFRESH_BATCH
+)
+register_stats('lesson_library', lesson_library.stats)
+
+
+def library_lesson(topic: str, item_count):
+    """The prebuilt lesson for a popular topic, filtered like a fresh one, or None."""
+    lesson = lesson_library.get(topic, item_count)
+    return drop_unsafe_items(lesson) if lesson is not None else None
+
+
+@lessons_bp.route('/generate-lesson', methods=['POST'])
+def generate_lesson():
+    try:
+        topic, item_count, error = read_lesson_request()
+        if error:
+            return error
+
+        lesson = library_lesson(topic, item_count) or build_lesson(topic, item_count)
+
+        with stage('serialize'):
+            return jsonify({'success': True, **lesson})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event) + '\n'
+
+
+@lessons_bp.route('/generate-lesson-stream', methods=['POST'])
+def generate_lesson_stream():
+    """
+    Streaming variant of /generate-lesson (NDJSON, one event per line):
+      {"type": "lesson", "title", "description", "itemCount"}  -- as soon as the text plan is ready
+      {"type": "item", "index", "name", "spokenText", "image"} -- as each image finishes (any order)
+      {"type": "done"} or {"type": "error", "error"}
+    """
+    try:
+        topic, item_count, error = read_lesson_request()
+        if error:
+            return error
+        lesson_content = generate_lesson_plan(topic, item_count)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    items = lesson_content.get('items', [])
+
+    def events():
+        yield _ndjson({
+            'type': 'lesson',
             'title': lesson_content.get('title', f'Learn About {topic}'),
             'description': lesson_content.get('description', ''),
-            'items': items_with_images
+            'itemCount': len(items)
         })
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        if not items:
+            yield _ndjson({'type': 'done'})
+            return
+
+        workers = max(1, min(LessonConfig.IMAGE_CONCURRENCY, len(items)))
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lesson-image')
+        try:
+            futures = {
+                _submit(pool, generate_image_with_rest_api, build_item_image_prompt(topic, item['name'])): index
+                for index, item in enumerate(items)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                item = items[index]
+                yield _ndjson({
+                    'type': 'item',
+                    'index': index,
+                    'name': item['name'],
+                    'spokenText': item['spokenText'],
+                    'image': future.result()
+                })
+            yield _ndjson({'type': 'done'})
+        except Exception as e:
+            yield _ndjson({'type': 'error', 'error': str(e)})
+        finally:
+            # Client may have disconnected mid-stream; don't wait on images nobody will read
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    return Response(stream_with_context(events()), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 
 @lessons_bp.route('/generate-lesson-content', methods=['POST'])
 def generate_lesson_content():
     try:
-        data = request.get_json()
-        topic = data.get('topic', '')
-        item_count = data.get('item_count', 5)
-        if not topic:
-            return jsonify({'success': False, 'error': 'Topic is required'}), 400
-        if not GEMINI_API_KEY:
-            return jsonify({'success': False, 'error': 'GEMINI_API_KEY not configured'}), 500
-
-        # model = genai.GenerativeModel('gemini-2.0-flash')
-        model = genai.GenerativeModel(LessonConfig.TEXT_MODEL)
-
-        prompt = f"""Generate an educational lesson about "{topic}" for children aged 4-8.
-Return JSON: {{"title": "...", "description": "...", "items": [{{"name": "...", "spokenText": "..."}}]}}
-Generate exactly {item_count} items. Only return JSON."""
+        topic, item_count, error = read_lesson_request()
+        if error:
+            return error
 
-        response = model.generate_content(prompt)
-        json_match = re.search(r'\{[\s\S]*\}', response.text)
-        if not json_match:
-            raise ValueError('Could not parse JSON')
-        lesson_data = json.loads(json_match.group())
+        lesson_data = generate_lesson_plan(topic, item_count)
 
         return jsonify({
             'success': True,
@@ -134,6 +425,88 @@ Generate exactly {item_count} items. Only return JSON."""
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# --- Batch generation: a whole curriculum per request, polled by job id
+
+lesson_batches = LessonBatchManager(
+    generate_lesson_plan,
+    generate_image_with_rest_api,
+    build_item_image_prompt,
+    text_workers=LessonConfig.BATCH_TEXT_WORKERS,
+    image_workers=LessonConfig.BATCH_IMAGE_WORKERS,
+    requests_per_minute=LessonConfig.BATCH_REQUESTS_PER_MINUTE,
+    max_jobs=LessonConfig.BATCH_MAX_JOBS,
+    directory=LessonConfig.BATCH_DIR
+)
+register_stats('lesson_batches', lesson_batches.stats)
+
+
+def parse_batch_request(data):
+    """
+    Returns (entries, with_images) for POST /lessons/batch; raises BatchRejected.
+    `topics` is a list of strings or {"topic", "item_count"} objects; topics that
+    fail validation are kept in the job as "rejected" instead of failing the batch.
+    """
+    data = data or {}
+    topics = data.get('topics')
+    if not isinstance(topics, list) or not topics:
+        raise BatchRejected('topics must be a non-empty list')
+    if len(topics) > LessonConfig.BATCH_MAX_TOPICS:
+        raise BatchRejected(f'At most {LessonConfig.BATCH_MAX_TOPICS} topics per batch')
+    if not GEMINI_API_KEY:
+        raise BatchRejected('GEMINI_API_KEY not configured', 500)
+
+    default_count = data.get('item_count', 5)
+    entries = []
+    for entry in topics:
+        entry = entry if isinstance(entry, dict) else {'topic': entry}
+        topic, item_count, error = validate_lesson_request({
+            'topic': str(entry.get('topic') or '').strip(),
+            'item_count': entry.get('item_count', default_count)
+        })
+        entries.append((topic, item_count, error[0] if error else None))
+    return entries, bool(data.get('images', True))
+
+
+def batch_accepted(job, status_url):
+    return {'success': True, 'jobId': job.id, 'status': job.status(), 'topics': len(job.lessons), 'statusUrl': status_url}
+
+
+@lessons_bp.route('/lessons/batch', methods=['POST'])
+def create_lesson_batch():
+    """
+    Starts generating many lessons in the background.
+    202 {"jobId", "statusUrl", ...}; poll GET /api/lessons/batch/<jobId> for progress and finished lessons.
+    """
+    try:
+        entries, with_images = parse_batch_request(request.get_json(silent=True))
+        job = lesson_batches.submit(entries, with_images, base_url=request.host_url)
+    except BatchRejected as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+
+    status_url = f"/api/lessons/batch/{job.id}"
+    return jsonify(batch_accepted(job, status_url)), 202, {'Location': status_url}
+
+
+@lessons_bp.route('/lessons/batch/<job_id>', methods=['GET'])
+def get_lesson_batch(job_id):
+    snapshot = lesson_batches.get(job_id)
+    if snapshot is None:
+        return jsonify({'success': False, 'error': 'Unknown batch job'}), 404
+    return jsonify({'success': True, **snapshot})
+
+
+@lessons_bp.route('/lessons/batch/<job_id>', methods=['DELETE'])
+def cancel_lesson_batch(job_id):
+    snapshot = lesson_batches.cancel(job_id)
+    if snapshot is None:
+        return jsonify({'success': False, 'error': 'Unknown batch job'}), 404
+    return jsonify({'success': True, **snapshot})
+
+
 @lessons_bp.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'ok', 'gemini_configured': GEMINI_API_KEY is not None})
+    return jsonify({
+        'status': 'degraded' if circuit_breakers.any_open() else 'ok',
+        'gemini_configured': GEMINI_API_KEY is not None,
+        'circuits': circuit_breakers.stats()
+    })
@@ -0,0 +1,115 @@
+"""Async (Quart) version of the Mochi chat endpoint for the ASGI app in asgi.py."""
+
+import time
+import asyncio
+from quart import Blueprint, Response, request, jsonify
+from .audio_ingest import AudioRejected, read_audio_upload
+from .chat_prompt import chat_model, build_chat_contents, chat_generation_config
+from .reply_stream import ReplyStreamer, sse_event
+from .chat_config import ChatConfig
+from sharedBackend.circuit_breaker import CircuitOpen, circuit_breakers
+from sharedBackend.metrics import count_fallback, upstream_timer
+from sharedBackend.rate_limiter import PRIORITY_CHAT, RateLimited, rate_limits
+from .routes import (
+    SAFE_REDIRECT, BUSY_MESSAGE, SSE_HEADERS, parse_mochi_reply, load_conversation, finish_turn, chunk_text, finish_stream
+)
+
+async_mochi_bp = Blueprint('mochi', __name__, url_prefix='/api')
+
+
+@async_mochi_bp.route('/chat-with-mochi', methods=['POST'])
+async def chat_with_mochi():
+    form = await request.form
+    files = await request.files
+    session, memory, reset = await asyncio.to_thread(load_conversation, form)
+
+    if 'audio' not in files:
+        return jsonify({"error": "No audio provided"}), 400
+
+    try:
+        clip = await asyncio.to_thread(read_audio_upload, files['audio'], form.get('duration'))
+    except AudioRejected as e:
+        return jsonify({"error": str(e)}), e.status
+
+    try:
+        try:
+            circuit_breakers.check('gemini', ChatConfig.MODEL)
+            await rate_limits.acquire_async('gemini', ChatConfig.MODEL, PRIORITY_CHAT)
+            with circuit_breakers.guard('gemini', ChatConfig.MODEL), upstream_timer('gemini_chat', ChatConfig.MODEL):
+                # to_part may upload a large clip through the (blocking) Files API
+                audio_part = await asyncio.to_thread(clip.to_part)
+                response = await chat_model.get().generate_content_async(
+                    build_chat_contents(session["messages"], audio_part, memory),
+                    generation_config=chat_generation_config()
+                )
+        finally:
+            await asyncio.to_thread(clip.close)
+        return jsonify(await asyncio.to_thread(finish_turn, session, parse_mochi_reply(response.text), reset))
+
+    except (RateLimited, CircuitOpen) as e:
+        count_fallback('chat_busy', e)
+        print(f"Chat rate limited: {e}")
+        return jsonify({"error": BUSY_MESSAGE}), 503
+    except Exception as e:
+        rate_limits.observe_error('gemini', ChatConfig.MODEL, e)
+        print(f"Memory/API Error: {e}")
+        return jsonify({"error": "Mochi forgot what we were talking about!"}), 500
+
+
+async def _prepend(first, chunks):
+    """Yields an already-read first chunk (if any), then the rest of the stream."""
+    if first is not None:
+        yield first
+    async for chunk in chunks:
+        yield chunk
+
+
+@async_mochi_bp.route('/chat-with-mochi/stream', methods=['POST'])
+async def chat_with_mochi_stream():
+    started = time.perf_counter()
+    form = await request.form
+    files = await request.files
+    session, memory, reset = await asyncio.to_thread(load_conversation, form)
+
+    if 'audio' not in files:
+        return jsonify({"error": "No audio provided"}), 400
+
+    try:
+        clip = await asyncio.to_thread(read_audio_upload, files['audio'], form.get('duration'))
+    except AudioRejected as e:
+        return jsonify({"error": str(e)}), e.status
+
+    async def events():
+        streamer = ReplyStreamer(SAFE_REDIRECT)
+        ttfb_ms = None
+        try:
+            try:
+                circuit_breakers.check('gemini', ChatConfig.MODEL)
+                await rate_limits.acquire_async('gemini', ChatConfig.MODEL, PRIORITY_CHAT)
+                audio_part = await asyncio.to_thread(clip.to_part)
+                # Only the wait for the first chunk is timed (see routes.chat_with_mochi_stream)
+                with circuit_breakers.guard('gemini', ChatConfig.MODEL), upstream_timer('gemini_chat', ChatConfig.MODEL):
+                    response = await chat_model.get().generate_content_async(
+                        build_chat_contents(session["messages"], audio_part, memory),
+                        generation_config=chat_generation_config(stream=True), stream=True
+                    )
+                    chunks = response.__aiter__()
+                    first = await anext(chunks, None)
+                async for chunk in _prepend(first, chunks):
+                    for event in streamer.feed(chunk_text(chunk)):
+                        if ttfb_ms is None:
+                            ttfb_ms = (time.perf_counter() - started) * 1000
+                        yield event
+            finally:
+                await asyncio.to_thread(clip.close)
+            yield await asyncio.to_thread(finish_stream, session, reset, streamer, started, ttfb_ms)
+        except (RateLimited, CircuitOpen) as e:
+            count_fallback('chat_busy', e)
+            print(f"Chat rate limited: {e}")
+            yield sse_event('error', {"error": BUSY_MESSAGE})
+        except Exception as e:
+            rate_limits.observe_error('gemini', ChatConfig.MODEL, e)
+            print(f"Memory/API Error: {e}")
+            yield sse_event('error', {"error": "Mochi forgot what we were talking about!"})
+
+    return Response(events(), mimetype='text/event-stream', headers=SSE_HEADERS)
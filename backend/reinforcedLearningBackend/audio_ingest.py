@@ -0,0 +1,89 @@
+"""
+Bounded-memory ingest for Mochi chat audio.
+
+Uploads are copied in fixed-size chunks into a SpooledTemporaryFile (RAM up to
+ChatConfig.AUDIO_SPOOL_BYTES, then disk), rejected as soon as they pass
+MAX_AUDIO_BYTES, and handed to Gemini either as raw inline bytes (small clips,
+no base64 copy on our side) or via the Files API (large clips).
+"""
+
+import logging
+import tempfile
+from sharedBackend.gemini_registry import gemini
+from .chat_config import ChatConfig
+
+logger = logging.getLogger(__name__)
+
+
+class AudioRejected(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class AudioClip:
+    def __init__(self, spool, size, mime_type):
+        self.spool = spool
+        self.size = size
+        self.mime_type = mime_type
+        self._uploaded = None
+
+    def to_part(self):
+        """Content part for generate_content: inline bytes or an uploaded file reference."""
+        self.spool.seek(0)
+        if self.size <= ChatConfig.INLINE_AUDIO_MAX_BYTES:
+            return {"inline_data": {"mime_type": self.mime_type, "data": self.spool.read()}}
+
+        self._uploaded = gemini.legacy().upload_file(self.spool, mime_type=self.mime_type)
+        return {"file_data": {"mime_type": self.mime_type, "file_uri": self._uploaded.uri}}
+
+    def close(self):
+        self.spool.close()
+        if self._uploaded is not None:
+            try:
+                gemini.legacy().delete_file(self._uploaded.name)
+            except Exception as e:
+                # Uploaded files expire on their own after 48h
+                logger.warning(f"Could not delete uploaded audio {self._uploaded.name}: {e}")
+            self._uploaded = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_audio_upload(file_storage, declared_seconds=None):
+    """
+    Copies an uploaded audio file into a spooled temp file without ever holding
+    more than one chunk (or AUDIO_SPOOL_BYTES) in memory. Raises AudioRejected.
+    """
+    if declared_seconds not in (None, ''):
+        try:
+            seconds = float(declared_seconds)
+        except (TypeError, ValueError):
+            raise AudioRejected("Audio duration must be a number of seconds")
+        if seconds > ChatConfig.MAX_AUDIO_SECONDS:
+            raise AudioRejected(f"Audio is longer than {int(ChatConfig.MAX_AUDIO_SECONDS)} seconds", 413)
+
+    mime_type = file_storage.mimetype if (file_storage.mimetype or '').startswith('audio/') else 'audio/webm'
+    spool = tempfile.SpooledTemporaryFile(max_size=ChatConfig.AUDIO_SPOOL_BYTES)
+    size = 0
+    try:
+        while True:
+            chunk = file_storage.stream.read(ChatConfig.AUDIO_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > ChatConfig.MAX_AUDIO_BYTES:
+                raise AudioRejected("Audio file is too large", 413)
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+
+    if size == 0:
+        spool.close()
+        raise AudioRejected("Audio file is empty")
+    return AudioClip(spool, size, mime_type)
@@ -0,0 +1,38 @@
+import os
+from dotenv import load_dotenv
+from sharedBackend.shared_config import SharedConfig
+
+load_dotenv()
+
+class ChatConfig:
+    MODEL = os.environ.get("CHAT_MODEL", "models/gemini-2.0-flash")
+
+    # Ask for JSON output (schema-constrained on non-streaming turns)
+    STRUCTURED_OUTPUT = os.environ.get("CHAT_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+    # Explicit context caching of the system prompt (off by default: the Mochi
+    # instructions are far below the API's minimum cacheable token count, so
+    # it only pays off once the prompt grows)
+    CONTEXT_CACHE_ENABLED = os.environ.get("CHAT_CONTEXT_CACHE", "false").lower() == "true"
+    CONTEXT_CACHE_TTL = int(os.environ.get("CHAT_CONTEXT_CACHE_TTL", 3600))
+
+    # Audio uploads to /api/chat-with-mochi
+    MAX_AUDIO_BYTES = int(os.environ.get("MAX_AUDIO_BYTES", 10 * 1024 * 1024))
+    MAX_AUDIO_SECONDS = float(os.environ.get("MAX_AUDIO_SECONDS", 60))
+
+    # Clips up to this size are sent inline; bigger ones go through the Files API
+    INLINE_AUDIO_MAX_BYTES = int(os.environ.get("INLINE_AUDIO_MAX_BYTES", 2 * 1024 * 1024))
+
+    # Uploads are read in chunks and kept in memory only up to this size, then spooled to disk
+    AUDIO_SPOOL_BYTES = int(os.environ.get("AUDIO_SPOOL_BYTES", 512 * 1024))
+    AUDIO_CHUNK_BYTES = 64 * 1024
+
+    # Server-side chat sessions: "memory" (per process) or "sqlite" (local file, survives restarts)
+    SESSION_BACKEND = os.environ.get("CHAT_SESSION_BACKEND", "memory").lower()
+    SESSION_DB_PATH = os.environ.get(
+        "CHAT_SESSION_DB_PATH", os.path.join(SharedConfig.CACHE_DIR, "chat_sessions.sqlite3")
+    )
+    SESSION_TTL = int(os.environ.get("CHAT_SESSION_TTL", 2 * 3600))
+    SESSION_MAX = int(os.environ.get("CHAT_SESSION_MAX", 10000))
+    # Recent turns kept verbatim and replayed to the model
+    SESSION_WINDOW = int(os.environ.get("CHAT_SESSION_WINDOW", 6))
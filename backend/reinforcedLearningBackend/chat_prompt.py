@@ -0,0 +1,134 @@
+"""
+Mochi's system prompt and the chat model built around it (through the shared
+sharedBackend.gemini_registry, so nothing is built until the first turn).
+
+The instructions go to Gemini as `system_instruction` on one model object that
+is reused for every turn, instead of being replayed as a fake user turn (plus a
+canned model reply) in front of the history. Everything static is assembled
+here once at import; per turn we only add the history window, the child's
+memory line and the audio.
+
+With CHAT_CONTEXT_CACHE=true the system prompt is also stored as explicit
+cached content and the model is built from it; if the API refuses (the prompt
+is below the minimum cacheable size, or the model doesn't support caching) we
+log it once and keep the plain system_instruction model.
+"""
+
+import time
+import logging
+import datetime
+import threading
+from sharedBackend.gemini_registry import gemini
+from .chat_config import ChatConfig
+from .chat_schema import CHAT_GENERATION_CONFIG, CHAT_STREAM_GENERATION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+MOCHI_INSTRUCTIONS = """
+You are Mochi, a warm, friendly virtual teaching assistant for preschoolers.
+The child will speak to you freely.
+ALWAYS check the provided chat history for the child's name and preferences.
+DO NOT guess names (like Lily). If you don't know the name in the history, say "my friend"
+ALWAYS respond in valid JSON format:
+{
+  "transcription": "what you heard",
+  "mood": "HAPPY" | "CELEBRATING" | "ENCOURAGING",
+  "mochiResponse": "your reply"
+}
+
+MOOD RULES:
+- CELEBRATING: Use if the child says something great, gets a correct answer, or shares a fun fact.
+- ENCOURAGING: Use for gentle speech corrections.
+- HAPPY: Default state.
+
+GOALS:
+1. Respond to the child's content naturally.
+2. IDENTIFY SPEECH ERRORS: Watch for 'f' for 'th', 'w' for 'r', and 'w' for 'l'.
+3. GENTLE CORRECTION: After your natural response, add a gentle correction if needed.
+   Example: "A wabbit! How cute! I love rabbits too. Try to make a 'rrr' sound with your tongue!"
+
+
+SAFETY:
+- Block all violence/scary topics. Redirect to animals or colors.
+- Use simple words for a 5-year-old.
+"""
+
+# Static prefix, assembled once
+SYSTEM_PROMPT = (
+    MOCHI_INSTRUCTIONS
+    + "\nIMPORTANT: Refer to the previous chat history and the memory notes to answer questions about the child's name or interests."
+)
+LISTEN_PART = {"text": "Please listen to this and answer based on what we've talked about before."}
+MEMORY_PREFIX = "What you remember about this child: "
+
+
+def build_chat_contents(past_messages, audio_part, memory=''):
+    """The last few history turns + (memory note) + the child's new audio clip."""
+    contents = [{
+        "role": "user" if msg['role'] == 'child' else "model",
+        "parts": [{"text": msg['text']}]
+    } for msg in past_messages[-ChatConfig.SESSION_WINDOW:]]
+    # The conversation has to open with a user turn
+    while contents and contents[0]["role"] == "model":
+        contents.pop(0)
+
+    parts = [{"text": MEMORY_PREFIX + memory}, LISTEN_PART, audio_part] if memory else [LISTEN_PART, audio_part]
+    contents.append({"role": "user", "parts": parts})
+    return contents
+
+
+def chat_generation_config(stream=False):
+    if not ChatConfig.STRUCTURED_OUTPUT:
+        return None
+    return CHAT_STREAM_GENERATION_CONFIG if stream else CHAT_GENERATION_CONFIG
+
+
+class ChatModel:
+    """Builds the Gemini chat model once (lazily) and refreshes it when its cached context expires."""
+
+    def __init__(self, model_name, system_prompt, use_context_cache=False, cache_ttl=3600):
+        self.model_name = model_name
+        self.system_prompt = system_prompt
+        self.use_context_cache = use_context_cache
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._model = None
+        self._expires_at = None
+
+    def _build(self):
+        if self.use_context_cache:
+            try:
+                genai = gemini.legacy()
+                from google.generativeai import caching
+                cached = caching.CachedContent.create(
+                    model=self.model_name,
+                    display_name='mochi-system-prompt',
+                    system_instruction=self.system_prompt,
+                    ttl=datetime.timedelta(seconds=self.cache_ttl)
+                )
+                # Refresh a minute early so a turn never lands on an expired cache
+                self._expires_at = time.monotonic() + max(60, self.cache_ttl - 60)
+                logger.info(f"🧠 Mochi system prompt cached as {cached.name}")
+                return genai.GenerativeModel.from_cached_content(cached_content=cached)
+            except Exception as e:
+                logger.warning(f"Context caching unavailable for Mochi ({e}); using system_instruction.")
+                self.use_context_cache = False
+        self._expires_at = None
+        return gemini.model(self.model_name, system_instruction=self.system_prompt)
+
+    def get(self):
+        model = self._model
+        if model is not None and (self._expires_at is None or time.monotonic() < self._expires_at):
+            return model
+        with self._lock:
+            if self._model is None or (self._expires_at is not None and time.monotonic() >= self._expires_at):
+                self._model = self._build()
+            return self._model
+
+
+chat_model = ChatModel(
+    ChatConfig.MODEL,
+    SYSTEM_PROMPT,
+    use_context_cache=ChatConfig.CONTEXT_CACHE_ENABLED,
+    cache_ttl=ChatConfig.CONTEXT_CACHE_TTL
+)
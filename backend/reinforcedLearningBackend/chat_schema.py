@@ -0,0 +1,47 @@
+"""
+Typed shape of a Mochi reply and the response schema we ask the model to follow.
+"""
+
+from dataclasses import dataclass, asdict
+
+MOODS = ("HAPPY", "CELEBRATING", "ENCOURAGING")
+
+MOCHI_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "transcription": {"type": "STRING"},
+        "mood": {"type": "STRING", "format": "enum", "enum": list(MOODS)},
+        "mochiResponse": {"type": "STRING"}
+    },
+    "required": ["transcription", "mood", "mochiResponse"]
+}
+
+CHAT_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": MOCHI_RESPONSE_SCHEMA
+}
+# Streaming keeps the prompt's field order (transcription, mood, mochiResponse) so
+# the early fields can be sent first; a schema would have the model emit its
+# properties alphabetically, with mochiResponse before the other two.
+CHAT_STREAM_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+
+@dataclass
+class MochiReply:
+    transcription: str
+    mochiResponse: str
+    mood: str = "HAPPY"
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError('Mochi reply is not a JSON object')
+        mood = str(data.get("mood") or "").upper()
+        return cls(
+            transcription=str(data.get("transcription") or ""),
+            mochiResponse=str(data.get("mochiResponse") or ""),
+            mood=mood if mood in MOODS else "HAPPY"
+        )
+
+    def to_dict(self):
+        return asdict(self)
@@ -0,0 +1,69 @@
+"""
+Turns Mochi's streamed JSON reply into Server-Sent Events.
+
+Events, in the order they can appear:
+  transcription  {"text"}                      -- what Mochi heard, once complete
+  mood           {"mood"}
+  delta          {"text"}                      -- the next words of mochiResponse
+  replace        {"text"}                      -- the reply hit the blocklist; speak this instead and ignore later deltas
+  done           {transcription, mochiResponse, mood, sessionId, sessionReset?, timing: {ttfbMs, totalMs}}
+  error          {"error"}
+
+mochiResponse is released on word boundaries so a blocked word is never split
+across two deltas, and every release is checked against the safety filter
+before it leaves the server.
+"""
+
+import json
+from sharedBackend.json_stream import JsonFieldStream
+from sharedBackend.safety_filter import safety_filter
+
+WORD_BOUNDARY = ' \n\t.,!?;:'
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class ReplyStreamer:
+    def __init__(self, redirect_text):
+        self.redirect_text = redirect_text
+        self.parser = JsonFieldStream()
+        self.raw = []
+        self.spoken = ''
+        self.pending = ''
+        self.replaced = False
+
+    def feed(self, text):
+        """Feeds one model chunk; returns the SSE strings to send now."""
+        self.raw.append(text)
+        out = []
+        for kind, key, value in self.parser.feed(text):
+            if kind == 'field' and key == 'transcription':
+                out.append(sse_event('transcription', {"text": value}))
+            elif kind == 'field' and key == 'mood':
+                out.append(sse_event('mood', {"mood": value}))
+            elif key == 'mochiResponse':
+                self.pending = self.pending + value if kind == 'delta' else self.pending
+                out.extend(self._release(final=kind == 'field'))
+        return out
+
+    def _release(self, final=False):
+        if self.replaced:
+            return []
+        if final:
+            cut = len(self.pending)
+        else:
+            cut = max(self.pending.rfind(ch) for ch in WORD_BOUNDARY) + 1
+        if cut <= 0:
+            return []
+        chunk, self.pending = self.pending[:cut], self.pending[cut:]
+        if safety_filter.is_blocked(self.spoken + chunk):
+            self.replaced = True
+            return [sse_event('replace', {"text": self.redirect_text})]
+        self.spoken += chunk
+        return [sse_event('delta', {"text": chunk})]
+
+    @property
+    def text(self):
+        return ''.join(self.raw)
@@ -1,92 +1,179 @@
 import json
-import os
-import base64
-from flask import Blueprint, request, jsonify
-import google.generativeai as genai
+import time
+import itertools
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from sharedBackend.circuit_breaker import CircuitOpen, circuit_breakers
+from sharedBackend.json_repair import parse_model_json
+from sharedBackend.metrics import count_fallback, stage, upstream_timer
+from sharedBackend.rate_limiter import PRIORITY_CHAT, RateLimited, rate_limits
+from sharedBackend.safety_filter import safety_filter
+from sharedBackend.stats import LatencyWindow, register_stats
+from .audio_ingest import AudioRejected, read_audio_upload
+from .chat_config import ChatConfig
+from .chat_prompt import chat_model, build_chat_contents, chat_generation_config
+from .chat_schema import MochiReply
+from .reply_stream import ReplyStreamer, sse_event
+from .session_store import create_session_store, memory_summary, record_turn, seed_history
 
 mochi_bp = Blueprint('mochi', __name__, url_prefix='/api')
 
-model = genai.GenerativeModel('models/gemini-2.0-flash')
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+chat_sessions = create_session_store()
+register_stats('chat_sessions', lambda: {"backend": ChatConfig.SESSION_BACKEND, "sessions": len(chat_sessions)})
 
-MOCHI_INSTRUCTIONS = """
-You are Mochi, a warm, friendly virtual teaching assistant for preschoolers. 
-The child will speak to you freely.
-ALWAYS check the provided chat history for the child's name and preferences.
-DO NOT guess names (like Lily). If you don't know the name in the history, say "my friend" 
-ALWAYS respond in valid JSON format:
-{
-  "transcription": "what you heard",
-  "mochiResponse": "your reply"
-  "mood": "HAPPY" | "CELEBRATING" | "ENCOURAGING"
-}
+# Streaming chat: time to the first event vs. time to the full reply
+stream_ttfb = LatencyWindow()
+stream_total = LatencyWindow()
+register_stats('mochi_stream', lambda: {"ttfb_ms": stream_ttfb.stats(), "total_ms": stream_total.stats()})
 
-MOOD RULES:
-- CELEBRATING: Use if the child says something great, gets a correct answer, or shares a fun fact.
-- ENCOURAGING: Use for gentle speech corrections.
-- HAPPY: Default state.
+SAFE_REDIRECT = "Ooh, let's talk about something happy! What's your favorite animal or color?"
+BUSY_MESSAGE = "Mochi needs a tiny rest. Let's try again in a moment!"
 
-GOALS:
-1. Respond to the child's content naturally.
-2. IDENTIFY SPEECH ERRORS: Watch for 'f' for 'th', 'w' for 'r', and 'w' for 'l'.
-3. GENTLE CORRECTION: After your natural response, add a gentle correction if needed.
-   Example: "A wabbit! How cute! I love rabbits too. Try to make a 'rrr' sound with your tongue!"
 
-
-SAFETY:
-- Block all violence/scary topics. Redirect to animals or colors.
-- Use simple words for a 5-year-old.
-"""
+def parse_mochi_reply(text):
+    """Parses (and if needed repairs) the model's JSON and maps it onto the response contract."""
+    try:
+        with stage('chat_json'):
+            reply = MochiReply.from_dict(parse_model_json(text, 'chat')).to_dict()
+    except ValueError:
+        # Not JSON at all: Mochi still said something, so speak it
+        reply = MochiReply("...", text.replace('```json', '').replace('```', '').strip()).to_dict()
+
+    # Never speak a blocked word back to the child; redirect like the instructions ask
+    if safety_filter.is_blocked(reply["mochiResponse"]):
+        reply["mochiResponse"] = SAFE_REDIRECT
+        reply["mood"] = "HAPPY"
+    return reply
+
+
+def load_conversation(form):
+    """
+    Returns (session, memory, reset). Clients send `session_id` and the audio; a
+    request without one (first turn, or an older client still sending the
+    full `history` field) starts a session seeded from that history. `reset`
+    is True when the client's session was unknown (evicted, expired, or the
+    server restarted) and no history came along to rebuild it.
+    """
+    session = chat_sessions.load_or_create(form.get('session_id'))
+    if not session["messages"] and form.get('history'):
+        seed_history(session, json.loads(form['history']))
+    reset = bool(form.get('session_id')) and not session["messages"]
+    return session, memory_summary(session), reset
+
+
+def finish_turn(session, reply, reset=False):
+    """
+    Stores the exchange in the session and tells the client its id. After a
+    reset the reply carries `sessionReset`, so the client resends its history.
+    """
+    record_turn(session, reply["transcription"], reply["mochiResponse"])
+    chat_sessions.save(session)
+    reply["sessionId"] = session["id"]
+    if reset:
+        reply["sessionReset"] = True
+    return reply
 
 
 @mochi_bp.route('/chat-with-mochi', methods=['POST'])
 def chat_with_mochi():
-    history_json = request.form.get('history', '[]')
-    past_messages = json.loads(history_json)
+    session, memory, reset = load_conversation(request.form)
 
     if 'audio' not in request.files:
         return jsonify({"error": "No audio provided"}), 400
 
-    audio_file = request.files['audio']
-    audio_data = audio_file.read()
-
     try:
-        encoded_audio = base64.b64encode(audio_data).decode('utf-8')
-
-        contents = [
-            {"role": "user", "parts": [{"text": MOCHI_INSTRUCTIONS + "\nIMPORTANT: Refer to the previous chat history to answer questions about the child's name or interests."}]},
-            {"role": "model", "parts": [{"text": "I will remember the child's details from our conversation history!"}]}
-        ]
-
-        for msg in past_messages[-6:]:
-            gemini_role = "user" if msg['role'] == 'child' else "model"
-            contents.append({
-                "role": gemini_role,
-                "parts": [{"text": msg['text']}]
-            })
-
-        contents.append({
-            "role": "user",
-            "parts": [
-                {"text": "Please listen to this and answer based on what we've talked about before."},
-                {"inline_data": {"mime_type": "audio/webm", "data": encoded_audio}}
-            ]
-        })
-
-        response = model.generate_content(contents)
-        raw_text = response.text.replace('```json', '').replace('```', '').strip()
-
-        try:
-            ai_data = json.loads(raw_text)
-        except json.JSONDecodeError:
-            ai_data = {"transcription": "...", "mochiResponse": raw_text}
-
-        return jsonify({
-            "transcription": ai_data.get("transcription", ""),
-            "mochiResponse": ai_data.get("mochiResponse", ""),
-            "mood": ai_data.get("mood", "HAPPY"),
-        })
+        clip = read_audio_upload(request.files['audio'], request.form.get('duration'))
+    except AudioRejected as e:
+        return jsonify({"error": str(e)}), e.status
 
+    try:
+        with clip:
+            circuit_breakers.check('gemini', ChatConfig.MODEL)
+            rate_limits.acquire('gemini', ChatConfig.MODEL, PRIORITY_CHAT)
+            with circuit_breakers.guard('gemini', ChatConfig.MODEL), upstream_timer('gemini_chat', ChatConfig.MODEL):
+                response = chat_model.get().generate_content(
+                    build_chat_contents(session["messages"], clip.to_part(), memory),
+                    generation_config=chat_generation_config()
+                )
+        return jsonify(finish_turn(session, parse_mochi_reply(response.text), reset))
+
+    except (RateLimited, CircuitOpen) as e:
+        count_fallback('chat_busy', e)
+        print(f"Chat rate limited: {e}")
+        return jsonify({"error": BUSY_MESSAGE}), 503
     except Exception as e:
+        rate_limits.observe_error('gemini', ChatConfig.MODEL, e)
         print(f"Memory/API Error: {e}")
         return jsonify({"error": "Mochi forgot what we were talking about!"}), 500
+
+
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+def chunk_text(chunk):
+    # .text raises when a chunk carries no text part (e.g. a final safety/finish chunk)
+    try:
+        return chunk.text
+    except ValueError:
+        return ''
+
+
+def finish_stream(session, reset, streamer, started, ttfb_ms):
+    """Final `done` event: the full reply (safety-checked, stored in the session) and timings."""
+    reply = finish_turn(session, parse_mochi_reply(streamer.text), reset)
+    total_ms = (time.perf_counter() - started) * 1000
+    ttfb_ms = total_ms if ttfb_ms is None else ttfb_ms
+    stream_ttfb.record(ttfb_ms)
+    stream_total.record(total_ms)
+    reply["timing"] = {"ttfbMs": round(ttfb_ms), "totalMs": round(total_ms)}
+    return sse_event('done', reply)
+
+
+@mochi_bp.route('/chat-with-mochi/stream', methods=['POST'])
+def chat_with_mochi_stream():
+    """
+    Same request as /chat-with-mochi, answered as Server-Sent Events so the
+    frontend can start speaking before the reply is finished (events are
+    described in reply_stream.py).
+    """
+    started = time.perf_counter()
+    session, memory, reset = load_conversation(request.form)
+
+    if 'audio' not in request.files:
+        return jsonify({"error": "No audio provided"}), 400
+
+    try:
+        clip = read_audio_upload(request.files['audio'], request.form.get('duration'))
+    except AudioRejected as e:
+        return jsonify({"error": str(e)}), e.status
+
+    def events():
+        streamer = ReplyStreamer(SAFE_REDIRECT)
+        ttfb_ms = None
+        try:
+            with clip:
+                circuit_breakers.check('gemini', ChatConfig.MODEL)
+                rate_limits.acquire('gemini', ChatConfig.MODEL, PRIORITY_CHAT)
+                # Only the wait for the first chunk is timed: while we yield, the clock would
+                # run on the client's connection, and a slow tablet would trip the breaker
+                with circuit_breakers.guard('gemini', ChatConfig.MODEL), upstream_timer('gemini_chat', ChatConfig.MODEL):
+                    chunks = iter(chat_model.get().generate_content(
+                        build_chat_contents(session["messages"], clip.to_part(), memory),
+                        generation_config=chat_generation_config(stream=True), stream=True
+                    ))
+                    first = next(chunks, None)
+                for chunk in itertools.chain([first] if first is not None else [], chunks):
+                    for event in streamer.feed(chunk_text(chunk)):
+                        if ttfb_ms is None:
+                            ttfb_ms = (time.perf_counter() - started) * 1000
+                        yield event
+            yield finish_stream(session, reset, streamer, started, ttfb_ms)
+        except (RateLimited, CircuitOpen) as e:
+            count_fallback('chat_busy', e)
+            print(f"Chat rate limited: {e}")
+            yield sse_event('error', {"error": BUSY_MESSAGE})
+        except Exception as e:
+            rate_limits.observe_error('gemini', ChatConfig.MODEL, e)
+            print(f"Memory/API Error: {e}")
+            yield sse_event('error', {"error": "Mochi forgot what we were talking about!"})
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers=SSE_HEADERS)
@@ -0,0 +1,197 @@
+"""
+Server-side conversation memory for Mochi chat.
+
+Each session keeps a rolling window of the last few turns plus a compact
+long-term memory (the child's name and interests) picked out of what the
+child says, so clients only send a session id with each clip.
+
+Backends implement SessionStore; pick one with ChatConfig.SESSION_BACKEND.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from .chat_config import ChatConfig
+
+logger = logging.getLogger(__name__)
+
+SESSION_ID_RE = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+NAME_PATTERNS = [
+    re.compile(r"\bmy name is ([a-z][a-z'-]{1,20})", re.IGNORECASE),
+    re.compile(r"\bcall me ([a-z][a-z'-]{1,20})", re.IGNORECASE),
+    re.compile(r"\b[iI] am ([A-Z][a-z'-]{1,20})\b"),
+    re.compile(r"\bI'm ([A-Z][a-z'-]{1,20})\b"),
+]
+INTEREST_PATTERNS = [
+    re.compile(r"\bi (?:really )?(?:like|love) ([a-z][a-z ]{1,30}?)(?:[.,!?]| and |$)", re.IGNORECASE),
+    re.compile(r"\bmy fav(?:ou?rite)? [a-z]+ (?:is|are) ([a-z][a-z ]{1,30}?)(?:[.,!?]| and |$)", re.IGNORECASE),
+]
+MAX_INTERESTS = 8
+
+
+def new_session(session_id=None):
+    return {
+        "id": session_id or uuid.uuid4().hex,
+        "messages": [],  # [{"role": "child" | "mochi", "text": ...}], newest last
+        "memory": {"name": None, "interests": []},
+        "turns": 0,
+    }
+
+
+def remember_from_child(memory, text):
+    """Updates the long-term memory from something the child said."""
+    for pattern in NAME_PATTERNS:
+        match = pattern.search(text or '')
+        if match:
+            memory["name"] = match.group(1).strip().capitalize()
+            break
+    for pattern in INTEREST_PATTERNS:
+        for match in pattern.finditer(text or ''):
+            interest = match.group(1).strip().lower()
+            if interest in memory["interests"]:
+                memory["interests"].remove(interest)
+            memory["interests"].append(interest)
+    del memory["interests"][:-MAX_INTERESTS]
+
+
+def record_turn(session, transcription, reply):
+    """Appends one child/Mochi exchange and trims the window."""
+    if transcription:
+        session["messages"].append({"role": "child", "text": transcription})
+        remember_from_child(session["memory"], transcription)
+    if reply:
+        session["messages"].append({"role": "mochi", "text": reply})
+    session["messages"] = session["messages"][-ChatConfig.SESSION_WINDOW:]
+    session["turns"] += 1
+
+
+def seed_history(session, messages):
+    """Starts a session from a client-held history (older clients, or a restarted server)."""
+    for msg in messages[-ChatConfig.SESSION_WINDOW:]:
+        role, text = msg.get("role"), msg.get("text")
+        if role in ("child", "mochi") and text:
+            session["messages"].append({"role": role, "text": text})
+            if role == "child":
+                remember_from_child(session["memory"], text)
+
+
+def memory_summary(session):
+    """One short line the model can use, e.g. "The child's name is Ava. They like dinosaurs, pink."""
+    memory = session.get("memory") or {}
+    parts = []
+    if memory.get("name"):
+        parts.append(f"The child's name is {memory['name']}.")
+    if memory.get("interests"):
+        parts.append(f"They like {', '.join(memory['interests'])}.")
+    return ' '.join(parts)
+
+
+class SessionStore:
+    """Interface for chat session backends. Sessions are plain JSON-serialisable dicts."""
+
+    def get(self, session_id):
+        raise NotImplementedError
+
+    def save(self, session):
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    def load_or_create(self, session_id=None):
+        if session_id and SESSION_ID_RE.match(session_id):
+            session = self.get(session_id)
+            return session if session is not None else new_session(session_id)
+        return new_session()
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-process LRU of sessions; idle sessions expire after `ttl` seconds."""
+
+    def __init__(self, ttl=7200, max_sessions=10000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # id -> (expires_at, session)
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            expires_at, session = entry
+            if expires_at <= time.monotonic():
+                del self._sessions[session_id]
+                return None
+            return json.loads(json.dumps(session))
+
+    def save(self, session):
+        with self._lock:
+            self._sessions[session["id"]] = (time.monotonic() + self.ttl, session)
+            self._sessions.move_to_end(session["id"])
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Local-file backend so conversations survive a restart of a single-host deployment."""
+
+    def __init__(self, path, ttl=7200):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, session_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires_at > ?", (session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+                (session["id"], json.dumps(session), now + self.ttl)
+            )
+            self._db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            self._db.commit()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store():
+    if ChatConfig.SESSION_BACKEND == 'sqlite':
+        try:
+            return SQLiteSessionStore(ChatConfig.SESSION_DB_PATH, ttl=ChatConfig.SESSION_TTL)
+        except sqlite3.Error as e:
+            logger.error(f"Chat session SQLite store unavailable, using memory: {e}")
+    return InMemorySessionStore(ttl=ChatConfig.SESSION_TTL, max_sessions=ChatConfig.SESSION_MAX)
@@ -0,0 +1 @@
+from .routes import shared_bp, metrics_bp
@@ -0,0 +1,30 @@
+"""
+Process-wide httpx.AsyncClient for the ASGI serving path (asgi.py).
+
+Imported lazily by the async views only, so the WSGI app doesn't need httpx.
+"""
+
+import httpx
+from .shared_config import SharedConfig
+
+_client = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=SharedConfig.ASYNC_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=SharedConfig.ASYNC_HTTP_MAX_KEEPALIVE
+            ),
+            timeout=httpx.Timeout(SharedConfig.HTTP_READ_TIMEOUT, connect=SharedConfig.HTTP_CONNECT_TIMEOUT)
+        )
+    return _client
+
+
+async def close_async_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -0,0 +1,68 @@
+"""Async (Quart) versions of the shared endpoints for the ASGI app in asgi.py."""
+
+import asyncio
+from quart import Blueprint, Response, request, jsonify
+from .blob_store import blob_store, image_url, image_variants
+from .image_variants import describe_variants
+from .metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from .routes import IMAGE_MAX_AGE, resolve_image
+from .stats import collect_stats
+
+async_shared_bp = Blueprint('shared', __name__, url_prefix='/api')
+async_metrics_bp = Blueprint('metrics', __name__)
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@async_shared_bp.route('/images/<digest>', methods=['GET'])
+async def get_image(digest):
+    """Serves a generated image by its sha256 digest; ?w=640 picks a resized variant."""
+    if not await asyncio.to_thread(blob_store.locate, digest):
+        return jsonify({"error": "Image not found"}), 404
+
+    served, max_age, vary_accept = await asyncio.to_thread(
+        resolve_image, digest, request.args.get('w', type=int), request.headers.get('Accept', '')
+    )
+    located = await asyncio.to_thread(blob_store.locate, served)
+    if not located:
+        return jsonify({"error": "Image not found"}), 404
+
+    path, mime_type = located
+    headers = {
+        'ETag': f'"{served}"',
+        'Cache-Control': f'public, max-age={max_age}' + (', immutable' if max_age == IMAGE_MAX_AGE else '')
+    }
+    if vary_accept:
+        headers['Vary'] = 'Accept'
+    if served in request.if_none_match:
+        return Response(b'', status=304, headers=headers)
+
+    return Response(await asyncio.to_thread(_read_bytes, path), mimetype=mime_type, headers=headers)
+
+
+@async_shared_bp.route('/images/<digest>/variants', methods=['GET'])
+async def get_image_variants(digest):
+    """Resized variant URLs, srcset strings and an inline placeholder for a generated image."""
+    if not await asyncio.to_thread(blob_store.locate, digest):
+        return jsonify({"error": "Image not found"}), 404
+    manifest = await asyncio.to_thread(image_variants.ensure, digest)
+    if manifest is not None:
+        return jsonify(describe_variants(manifest, image_url))
+    if image_variants.is_pending(digest):
+        return jsonify({"status": "pending", "variants": []}), 202
+    return jsonify({"status": "unavailable", "variants": []})
+
+
+@async_shared_bp.route('/stats', methods=['GET'])
+async def stats():
+    """Cache, queue and upstream counters registered by the blueprints."""
+    return jsonify(collect_stats())
+
+
+@async_metrics_bp.route('/metrics', methods=['GET'])
+async def metrics():
+    """Route and upstream latency histograms, error and fallback counters (Prometheus text format)."""
+    return Response(render_metrics(), mimetype=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,114 @@
+"""
+Content-addressed blob store for generated images.
+
+Blobs are written once under BLOB_DIR/<aa>/<digest> (digest = sha256 of the bytes)
+with the MIME type in a small sidecar file, and served by GET /api/images/<digest>.
+Each new image also gets resized variants rendered in the background
+(sharedBackend.image_variants).
+"""
+
+import os
+import re
+import base64
+import hashlib
+import logging
+import tempfile
+import contextvars
+from flask import has_request_context, request
+from .image_variants import create_pipeline
+from .shared_config import SharedConfig
+
+logger = logging.getLogger(__name__)
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data: bytes, mime_type: str) -> str:
+        """Stores the bytes (if new) and returns their digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write(path + '.type', mime_type.encode('utf-8'))
+        self._write(path, data)
+        return digest
+
+    def _write(self, target, content):
+        # Write to a temp file first so readers never see a half-written file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, target)
+
+    def write_meta(self, digest: str, name: str, data: bytes):
+        """Stores a sidecar file next to a blob (e.g. its list of resized variants)."""
+        self._write(f"{self._path(digest)}.{name}", data)
+
+    def has_meta(self, digest: str, name: str) -> bool:
+        return bool(DIGEST_RE.match(digest or '')) and os.path.exists(f"{self._path(digest)}.{name}")
+
+    def read_meta(self, digest: str, name: str):
+        """Returns a sidecar's bytes, or None."""
+        if not DIGEST_RE.match(digest or ''):
+            return None
+        try:
+            with open(f"{self._path(digest)}.{name}", 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def locate(self, digest: str):
+        """Returns (path, mime_type) for a stored blob, or None."""
+        if not DIGEST_RE.match(digest or ''):
+            return None
+        path = self._path(digest)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path + '.type', 'r', encoding='utf-8') as f:
+                mime_type = f.read().strip() or 'application/octet-stream'
+        except OSError:
+            mime_type = 'application/octet-stream'
+        return path, mime_type
+
+
+blob_store = BlobStore(SharedConfig.BLOB_DIR)
+# Resized WebP/JPEG copies of stored images (sharedBackend.image_variants)
+image_variants = create_pipeline(blob_store)
+
+# Set per request by the ASGI app, where Flask's request proxy isn't available
+request_base_url = contextvars.ContextVar('request_base_url', default='')
+
+
+def image_url(digest: str) -> str:
+    path = f"/api/images/{digest}"
+    if SharedConfig.PUBLIC_BASE_URL:
+        return SharedConfig.PUBLIC_BASE_URL + path
+    if has_request_context():
+        return request.host_url.rstrip('/') + path
+    if request_base_url.get():
+        return request_base_url.get().rstrip('/') + path
+    return path
+
+
+def image_reference(data: bytes, mime_type: str = 'image/png') -> str:
+    """
+    What the generators hand back to clients for an image: a short /api/images URL,
+    or the legacy inline data URI when SharedConfig.INLINE_IMAGES is on.
+    """
+    if not SharedConfig.INLINE_IMAGES:
+        try:
+            digest = blob_store.put(data, mime_type)
+            image_variants.schedule(digest, data, mime_type)
+            return image_url(digest)
+        except OSError as e:
+            logger.error(f"Blob store write failed, inlining image: {e}")
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
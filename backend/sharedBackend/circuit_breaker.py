@@ -0,0 +1,257 @@
+"""
+Circuit breakers for upstream APIs (Gemini per model, Unsplash).
+
+When an upstream is down or crawling, waiting out the full SDK / HTTP timeout
+on every request fills the worker pools and stalls endpoints that don't need
+it. Each upstream:model gets a breaker that watches the last
+CIRCUIT_WINDOW_SECONDS of calls:
+
+    closed     calls go through; if at least CIRCUIT_MIN_CALLS finished in the
+               window and the error rate or the slow-call rate crosses its
+               threshold, the breaker opens
+    open       calls fail immediately with CircuitOpen (callers return their
+               usual fallback: the puppy, '' for lesson images, local keywords)
+    half_open  after CIRCUIT_OPEN_SECONDS a few probe calls go through; one
+               success closes the breaker, a failure opens it again
+
+    circuit_breakers.check('gemini', IMAGE_MODEL_ID)      # fast fail before queueing for a rate-limit token
+    rate_limits.acquire('gemini', IMAGE_MODEL_ID)
+    with circuit_breakers.guard('gemini', IMAGE_MODEL_ID):
+        response = client.models.generate_content(...)
+
+Rate-limit replies (429 / RESOURCE_EXHAUSTED) and other 4xx answers are the
+upstream working as intended, so they don't count as failures. States are
+reported by /api/health.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from .rate_limiter import is_rate_limit_error
+from .shared_config import SharedConfig
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+def is_client_error(error):
+    """True for 4xx answers: the upstream is up, the request (or quota) is the problem."""
+    if is_rate_limit_error(error):
+        return True
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(error, 'code', None)
+    return isinstance(status, int) and 400 <= status < 500
+
+
+class CircuitBreaker:
+    def __init__(self, name, window_seconds=60, min_calls=5, error_rate=0.5,
+                 slow_call_seconds=20, slow_call_rate=0.5, open_seconds=30, half_open_probes=1):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._calls = deque()  # (finished_at, failed, slow)
+        self._opened_at = 0.0
+        self._probes = 0
+        self.reason = None
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    def _trim(self, now):
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+    def _open(self, now, reason):
+        self.state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        self.reason = reason
+        self.times_opened += 1
+        logger.warning(f"🔌 Circuit {self.name} opened ({reason})")
+
+    def _close(self):
+        self.state = CLOSED
+        self._calls.clear()
+        self._probes = 0
+        self.reason = None
+        logger.info(f"🔌 Circuit {self.name} closed")
+
+    def _retry_in(self, now):
+        return max(0.0, self._opened_at + self.open_seconds - now)
+
+    def check(self):
+        """Raises CircuitOpen if a call right now would be refused. Reserves nothing."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and self._retry_in(now) > 0:
+                self.short_circuited += 1
+                raise CircuitOpen(f"{self.name}: circuit open, retrying in {self._retry_in(now):.0f}s")
+            if self.state == HALF_OPEN and self._probes >= self.half_open_probes:
+                self.short_circuited += 1
+                raise CircuitOpen(f"{self.name}: circuit half-open, probe in flight")
+
+    def _allow(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if self._retry_in(now) > 0:
+                    self.short_circuited += 1
+                    raise CircuitOpen(f"{self.name}: circuit open, retrying in {self._retry_in(now):.0f}s")
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self.short_circuited += 1
+                    raise CircuitOpen(f"{self.name}: circuit half-open, probe in flight")
+                self._probes += 1
+                return True
+            return False
+
+    def _record(self, probe, failed, seconds):
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            now = time.monotonic()
+            if probe:
+                self._probes = max(0, self._probes - 1)
+                if self.state == HALF_OPEN:
+                    if failed or slow:
+                        self._open(now, 'probe failed' if failed else f'probe took {seconds:.1f}s')
+                    else:
+                        self._close()
+                return
+            if self.state != CLOSED:
+                return
+            self._calls.append((now, failed, slow))
+            self._trim(now)
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+            slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+            if failures / total >= self.error_rate:
+                self._open(now, f'{failures}/{total} calls failed')
+            elif slow_calls / total >= self.slow_call_rate:
+                self._open(now, f'{slow_calls}/{total} calls slower than {self.slow_call_seconds:g}s')
+
+    def _release(self, probe):
+        # The call never reached a verdict (cancelled, client went away)
+        if probe:
+            with self._lock:
+                self._probes = max(0, self._probes - 1)
+
+    @contextmanager
+    def guard(self):
+        """Times the wrapped upstream call; an escaping exception counts as a failure."""
+        probe = self._allow()
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self._record(probe, not is_client_error(e), time.perf_counter() - started)
+            raise
+        except BaseException:
+            self._release(probe)
+            raise
+        else:
+            self._record(probe, False, time.perf_counter() - started)
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            total = len(self._calls)
+            return {
+                "state": self.state,
+                "reason": self.reason,
+                "retry_in": round(self._retry_in(now), 1) if self.state == OPEN else None,
+                "window_calls": total,
+                "window_failures": sum(1 for _, failed, _ in self._calls if failed),
+                "window_slow": sum(1 for _, _, slow in self._calls if slow),
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited
+            }
+
+
+def parse_slow_thresholds(spec):
+    """"gemini=20,unsplash=4,gemini:gemini-3-pro-image-preview=60" -> {name: seconds}"""
+    thresholds = {}
+    for entry in (spec or '').split(','):
+        name, _, seconds = entry.strip().partition('=')
+        if not name or not seconds:
+            continue
+        try:
+            thresholds[name.strip()] = float(seconds)
+        except ValueError:
+            logger.warning(f"Ignoring bad slow-call threshold: {entry!r}")
+    return thresholds
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, slow_thresholds, enabled=True, **settings):
+        self.slow_thresholds = slow_thresholds
+        self.enabled = enabled
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def breaker(self, upstream, model=None):
+        name = f"{upstream}:{model}" if model else upstream
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    slow = self.slow_thresholds.get(name, self.slow_thresholds.get(upstream, 20.0))
+                    breaker = self._breakers[name] = CircuitBreaker(name, slow_call_seconds=slow, **self.settings)
+        return breaker
+
+    def check(self, upstream, model=None):
+        """Raises CircuitOpen when upstream:model is refusing calls."""
+        if self.enabled:
+            self.breaker(upstream, model).check()
+
+    @contextmanager
+    def guard(self, upstream, model=None):
+        """Raises CircuitOpen on entry when open; otherwise records how the wrapped call went."""
+        if not self.enabled:
+            yield
+            return
+        with self.breaker(upstream, model).guard():
+            yield
+
+    def stats(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.stats() for name, breaker in breakers.items()}
+
+    def any_open(self):
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return any(breaker.state != CLOSED for breaker in breakers)
+
+
+circuit_breakers = CircuitBreakerRegistry(
+    parse_slow_thresholds(SharedConfig.CIRCUIT_SLOW_CALL_SECONDS),
+    enabled=SharedConfig.CIRCUIT_BREAKER_ENABLED,
+    window_seconds=SharedConfig.CIRCUIT_WINDOW_SECONDS,
+    min_calls=SharedConfig.CIRCUIT_MIN_CALLS,
+    error_rate=SharedConfig.CIRCUIT_ERROR_RATE,
+    slow_call_rate=SharedConfig.CIRCUIT_SLOW_CALL_RATE,
+    open_seconds=SharedConfig.CIRCUIT_OPEN_SECONDS,
+    half_open_probes=SharedConfig.CIRCUIT_HALF_OPEN_PROBES
+)
@@ -0,0 +1,99 @@
+"""
+One lazily built set of Gemini clients for every blueprint.
+
+Nothing here touches the SDKs at import time: the API key is resolved once
+(GEMINI_API_KEY, falling back to the VITE_GEMINI_API_KEY used by the
+frontend's .env), and the first call that needs Gemini imports the SDK and
+builds the client. Model objects are cached per model id and options.
+
+    from sharedBackend.gemini_registry import gemini
+
+    gemini.client()                       # google.genai Client (images, summaries), or None without a key
+    gemini.model('gemini-2.0-flash')      # google.generativeai GenerativeModel (lessons, chat)
+    gemini.legacy()                       # configured google.generativeai module (Files API, caching)
+"""
+
+import logging
+import threading
+from .shared_config import SharedConfig
+from .stats import register_stats
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiRegistry:
+    def __init__(self, api_key=None):
+        self._api_key = api_key
+        self._lock = threading.Lock()
+        self._client = None
+        self._legacy = None
+        self._models = {}
+
+    @property
+    def api_key(self):
+        return self._api_key
+
+    @property
+    def configured(self):
+        return bool(self._api_key)
+
+    def configure(self, api_key):
+        """Switches to another key (e.g. from app config); already built clients are dropped."""
+        if not api_key or api_key == self._api_key:
+            return
+        with self._lock:
+            self._api_key = api_key
+            self._client = None
+            self._legacy = None
+            self._models.clear()
+
+    def use(self, client=None, legacy=None):
+        """Installs prebuilt clients instead of the SDKs (benchmarks/fake_upstreams.py)."""
+        with self._lock:
+            self._client = client
+            self._legacy = legacy
+            self._models.clear()
+
+    def client(self):
+        """The google.genai Client, built on first use; None when no key is configured."""
+        if self._client is None and self._api_key:
+            with self._lock:
+                if self._client is None:
+                    from google import genai
+                    self._client = genai.Client(api_key=self._api_key)
+                    logger.info("🧠 Mochi's Backend Brain Initialized")
+        return self._client
+
+    def legacy(self):
+        """The google.generativeai module, configured with our key on first use."""
+        if self._legacy is None:
+            with self._lock:
+                if self._legacy is None:
+                    import google.generativeai as genai
+                    if self._api_key:
+                        genai.configure(api_key=self._api_key)
+                    self._legacy = genai
+        return self._legacy
+
+    def model(self, model_id, **options):
+        """A GenerativeModel per (model_id, options), e.g. model(id, system_instruction=...)."""
+        key = (model_id, tuple(sorted((name, repr(value)) for name, value in options.items())))
+        model = self._models.get(key)
+        if model is None:
+            genai = self.legacy()
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = self._models[key] = genai.GenerativeModel(model_id, **options)
+        return model
+
+    def stats(self):
+        return {
+            "configured": self.configured,
+            "client_built": self._client is not None,
+            "models": sorted({model_id for model_id, _ in self._models})
+        }
+
+
+gemini = GeminiRegistry(SharedConfig.GEMINI_API_KEY)
+register_stats('gemini', gemini.stats)
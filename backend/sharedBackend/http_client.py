@@ -0,0 +1,98 @@
+"""
+Shared outbound HTTP client for the Flask app.
+
+One keep-alive requests.Session per configured upstream host (any other host
+shares a single session), each with its own connection pool size, bounded
+retries with jittered exponential backoff on 5xx, and separate connect/read
+timeouts from SharedConfig. 429s are not retried here: the caller hands them
+to rate_limits.observe(), which pauses the bucket for the Retry-After period. Use the module-level
+`http_client` instead of calling requests.get/post directly:
+
+    response = http_client.get(url, params=params)
+    response = http_client.post(url, json=payload, read_timeout=60)
+"""
+
+import random
+import logging
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .shared_config import SharedConfig
+
+logger = logging.getLogger(__name__)
+
+# Session key for hosts that aren't configured upstreams, so the pool map stays bounded
+OTHER_HOSTS = ''
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class JitteredRetry(Retry):
+    """Retry whose exponential backoff gets up to +100% random jitter so retries don't stampede."""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, backoff) if backoff else backoff
+
+
+class HttpClient:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}  # upstream host (or OTHER_HOSTS) -> requests.Session
+
+    def _build_session(self, host):
+        pool_size = SharedConfig.HTTP_POOL_SIZES.get(host, SharedConfig.HTTP_POOL_SIZE)
+        retry = JitteredRetry(
+            total=SharedConfig.HTTP_MAX_RETRIES,
+            connect=SharedConfig.HTTP_MAX_RETRIES,
+            # A read timeout means the upstream may still be working (and billing) -- don't repeat it
+            read=0,
+            status=SharedConfig.HTTP_MAX_RETRIES,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,  # Gemini generateContent is a POST but safe to retry on 5xx
+            backoff_factor=SharedConfig.HTTP_BACKOFF_FACTOR,
+            # A 503's Retry-After could park the worker (inside the breaker guard) for minutes
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def session_for(self, url):
+        host = urlsplit(url).hostname or OTHER_HOSTS
+        if host not in SharedConfig.HTTP_UPSTREAM_HOSTS:
+            host = OTHER_HOSTS
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._sessions[host] = self._build_session(host)
+        return session
+
+    def request(self, method, url, read_timeout=None, **kwargs):
+        kwargs.setdefault('timeout', (
+            SharedConfig.HTTP_CONNECT_TIMEOUT,
+            read_timeout if read_timeout is not None else SharedConfig.HTTP_READ_TIMEOUT
+        ))
+        return self.session_for(url).request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+http_client = HttpClient()
@@ -0,0 +1,169 @@
+"""
+Content-addressed cache for generated images.
+
+Entries are keyed by a hash of (model, normalized prompt) so the lesson
+illustrations and Mochi's drawings never pay for the same picture twice.
+Lookups hit an in-memory LRU first, then a size-limited SQLite file on disk.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from .shared_config import SharedConfig
+
+logger = logging.getLogger(__name__)
+
+CachedImage = namedtuple('CachedImage', ['mime_type', 'data', 'title'])
+
+
+def normalize_prompt(prompt: str) -> str:
+    return ' '.join((prompt or '').lower().split())
+
+
+def cache_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\n{normalize_prompt(prompt)}".encode('utf-8')).hexdigest()
+
+
+class ImageCache:
+    """Two-tier (memory LRU + SQLite) image cache with TTL and byte-budget eviction."""
+
+    def __init__(self, db_path=None, ttl=3600, memory_bytes=64 * 1024 * 1024, disk_bytes=1024 * 1024 * 1024):
+        self.ttl = ttl
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (expires_at, CachedImage)
+        self._memory_size = 0
+        self._db = None
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("""
+                    CREATE TABLE IF NOT EXISTS images (
+                        key TEXT PRIMARY KEY,
+                        mime_type TEXT NOT NULL,
+                        title TEXT NOT NULL DEFAULT '',
+                        data BLOB NOT NULL,
+                        size INTEGER NOT NULL,
+                        expires_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                """)
+                self._db.execute("CREATE INDEX IF NOT EXISTS images_last_access ON images (last_access)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Image cache disk tier disabled: {e}")
+                self._db = None
+
+    def get(self, model: str, prompt: str):
+        """Returns a CachedImage or None."""
+        key = cache_key(model, prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                expires_at, image = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    return image
+                self._drop_memory(key)
+
+            if not self._db:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT mime_type, data, title, expires_at FROM images WHERE key = ?", (key,)
+                ).fetchone()
+                if not row:
+                    return None
+                mime_type, data, title, expires_at = row
+                if expires_at <= now:
+                    self._db.execute("DELETE FROM images WHERE key = ?", (key,))
+                    self._db.commit()
+                    return None
+                self._db.execute("UPDATE images SET last_access = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Image cache read error: {e}")
+                return None
+
+            image = CachedImage(mime_type, bytes(data), title)
+            self._remember(key, expires_at, image)
+            return image
+
+    def put(self, model: str, prompt: str, mime_type: str, data: bytes, title: str = ''):
+        if not data:
+            return
+        key = cache_key(model, prompt)
+        now = time.time()
+        expires_at = now + self.ttl
+        image = CachedImage(mime_type, data, title or '')
+        with self._lock:
+            self._remember(key, expires_at, image)
+            if not self._db:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO images (key, mime_type, title, data, size, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, mime_type, image.title, sqlite3.Binary(data), len(data), expires_at, now)
+                )
+                self._evict_disk(now)
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Image cache write error: {e}")
+
+    def _remember(self, key, expires_at, image):
+        size = len(image.data)
+        if size > self.memory_bytes:
+            return
+        self._drop_memory(key)
+        self._memory[key] = (expires_at, image)
+        self._memory_size += size
+        while self._memory_size > self.memory_bytes:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted.data)
+
+    def _drop_memory(self, key):
+        entry = self._memory.pop(key, None)
+        if entry:
+            self._memory_size -= len(entry[1].data)
+
+    def _evict_disk(self, now):
+        self._db.execute("DELETE FROM images WHERE expires_at <= ?", (now,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+        if total <= self.disk_bytes:
+            return
+        # Oldest-accessed first until we are back under budget
+        for key, size in self._db.execute("SELECT key, size FROM images ORDER BY last_access").fetchall():
+            if total <= self.disk_bytes:
+                break
+            self._db.execute("DELETE FROM images WHERE key = ?", (key,))
+            total -= size
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """Process-wide cache shared by lessonPlanBackend and visualSearchBackend (None when disabled)."""
+    global _image_cache
+    if not SharedConfig.IMAGE_CACHE_ENABLED:
+        return None
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                _image_cache = ImageCache(
+                    db_path=os.path.join(SharedConfig.CACHE_DIR, 'images.sqlite3'),
+                    ttl=SharedConfig.IMAGE_CACHE_TTL,
+                    memory_bytes=SharedConfig.IMAGE_CACHE_MEMORY_BYTES,
+                    disk_bytes=SharedConfig.IMAGE_CACHE_DISK_BYTES
+                )
+    return _image_cache
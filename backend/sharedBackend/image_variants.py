@@ -0,0 +1,358 @@
+"""
+Responsive variants of generated images.
+
+Gemini hands back full-size PNGs (16:9 "HD" photos for visual search, lesson
+illustrations), while the kids' UI shows them as small cards on tablets. Each
+image stored through image_reference() is re-encoded in a process pool, off
+the request thread:
+
+    <digest>            the original, unchanged
+    variants            IMAGE_VARIANT_WIDTHS x IMAGE_VARIANT_FORMATS (webp, jpeg, optionally avif),
+                        each its own content-addressed blob; never upscaled
+    placeholder         a ~24 px wide blurred preview, inlined as a data URI
+
+The list of variants is written next to the original as a small JSON sidecar
+and served by GET /api/images/<digest>/variants (URLs, srcset strings and the
+placeholder). GET /api/images/<digest>?w=640 picks the smallest variant at
+least that wide in the best format the Accept header allows, and falls back to
+the original until the variants exist.
+
+Pillow is optional: without it (or with IMAGE_VARIANTS_ENABLED off) nothing is
+scheduled and the originals are served as before.
+"""
+
+import io
+import json
+import time
+import base64
+import logging
+import threading
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .shared_config import SharedConfig
+from .stats import register_stats
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+    features = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    # name: (Pillow format, MIME type, save options besides quality)
+    'avif': ('AVIF', 'image/avif', {'speed': 8}),
+    'webp': ('WEBP', 'image/webp', {'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'optimize': True, 'progressive': True}),
+}
+# Best compression first; jpeg is the one every client can decode
+FORMAT_PREFERENCE = ('avif', 'webp', 'jpeg')
+PLACEHOLDER_QUALITY = 40
+MANIFEST = 'variants'
+
+
+def supported_formats(names):
+    """The requested format names this Pillow build can encode, in preference order."""
+    if Image is None:
+        return []
+    supported = []
+    for name in FORMAT_PREFERENCE:
+        if name not in names:
+            continue
+        if name == 'jpeg':
+            supported.append(name)
+            continue
+        try:
+            if features.check(name):
+                supported.append(name)
+        except ValueError:
+            # Older Pillow releases don't know the feature name at all
+            pass
+    return supported
+
+
+def _flatten(image):
+    """RGB on white for formats without alpha (the illustrations use white backgrounds)."""
+    if image.mode == 'RGB':
+        return image
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A') if image.mode == 'RGBA' else None)
+    return background
+
+
+def _encode(image, name, quality):
+    pil_format, _, options = FORMATS[name]
+    if name == 'jpeg':
+        image = _flatten(image)
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, quality=quality, **options)
+    return buffer.getvalue()
+
+
+def render_variants(data, widths, formats, quality, placeholder_width):
+    """
+    Runs in a worker process. Returns the original's size, the encoded variants
+    as [(width, height, format, bytes)] and the placeholder as (format, bytes).
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        has_alpha = 'A' in source.getbands() or 'transparency' in source.info
+        image = source.convert('RGBA' if has_alpha else 'RGB')
+
+    width, height = image.size
+    # Never upscale: widths past the original collapse into one full-size re-encode
+    targets = sorted({min(target, width) for target in widths}, reverse=True)
+    variants = []
+    current = image
+    for target in targets:
+        # Each step shrinks the previous one, which is much cheaper than resizing the original every time
+        if target != current.width:
+            current = current.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+        for name in formats:
+            variants.append((current.width, current.height, name, _encode(current, name, quality)))
+
+    tiny = current.resize(
+        (placeholder_width, max(1, round(height * placeholder_width / width))), Image.BILINEAR
+    ) if placeholder_width < current.width else current
+    placeholder_format = 'webp' if 'webp' in formats else 'jpeg'
+    placeholder = (placeholder_format, _encode(tiny, placeholder_format, PLACEHOLDER_QUALITY))
+    return (width, height), variants, placeholder
+
+
+def choose_variant(manifest, width=None, accept=''):
+    """
+    The manifest entry to serve for a requested width: the smallest variant at
+    least that wide (the largest one when none is), in the best format the
+    Accept header lists. None when there are no variants.
+    """
+    if not manifest or not manifest.get('variants'):
+        return None
+    accept = accept or ''
+    available = {variant['format'] for variant in manifest['variants']}
+    chosen_format = next(
+        (name for name in FORMAT_PREFERENCE
+         if name in available and (name == 'jpeg' or FORMATS[name][1] in accept)),
+        None
+    )
+    if chosen_format is None:
+        return None
+    candidates = sorted(
+        (variant for variant in manifest['variants'] if variant['format'] == chosen_format),
+        key=lambda variant: variant['width']
+    )
+    if width:
+        for variant in candidates:
+            if variant['width'] >= width:
+                return variant
+    return candidates[-1]
+
+
+def describe_variants(manifest, url_for):
+    """The /variants response body for a finished manifest; url_for maps a digest to its URL."""
+    variants = [{
+        "url": url_for(variant['digest']),
+        "width": variant['width'],
+        "height": variant['height'],
+        "format": variant['format'],
+        "bytes": variant['bytes']
+    } for variant in manifest['variants']]
+    srcset = {}
+    for variant in variants:
+        srcset.setdefault(variant['format'], []).append(f"{variant['url']} {variant['width']}w")
+    return {
+        "status": "ready",
+        "width": manifest['width'],
+        "height": manifest['height'],
+        "placeholder": manifest.get('placeholder'),
+        "variants": variants,
+        "srcset": {name: ', '.join(entries) for name, entries in srcset.items()}
+    }
+
+
+class ImageVariantPipeline:
+    """Schedules variant rendering for stored images and records the results in the store."""
+
+    def __init__(self, store, enabled=True, widths=(320, 640, 1024), formats=('webp', 'jpeg'),
+                 quality=72, placeholder_width=24, workers=2, max_pending=64):
+        self.store = store
+        self.widths = tuple(widths)
+        self.formats = supported_formats(formats)
+        self.quality = quality
+        self.placeholder_width = placeholder_width
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.enabled = bool(enabled and self.widths and self.formats)
+        if enabled and Image is None:
+            logger.info("Pillow is not installed; generated images are served without resized variants")
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pending = set()
+        self.rendered = 0
+        self.failed = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that already runs request threads can copy held locks
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def _reset_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def manifest(self, digest):
+        """The finished variant list for a stored image, or None."""
+        raw = self.store.read_meta(digest, MANIFEST)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def is_pending(self, digest):
+        with self._lock:
+            return digest in self._pending
+
+    def schedule(self, digest, data, mime_type='image/png'):
+        """Queues variant rendering for a stored image. Returns True if variants are (or will be) available."""
+        if not self.enabled or not mime_type.startswith('image/') or mime_type == 'image/svg+xml':
+            return False
+        if self.store.has_meta(digest, MANIFEST):
+            return True
+        with self._lock:
+            if digest in self._pending:
+                return True
+            if len(self._pending) >= self.max_pending:
+                self.skipped += 1
+                return False
+            self._pending.add(digest)
+
+        pool = self._executor()
+        try:
+            future = pool.submit(
+                render_variants, data, self.widths, self.formats, self.quality, self.placeholder_width
+            )
+        except (BrokenProcessPool, RuntimeError) as e:
+            logger.warning(f"⚠️ Image variant pool unavailable: {e}")
+            self._reset_pool(pool)
+            with self._lock:
+                self._pending.discard(digest)
+                self.failed += 1
+            return False
+        future.add_done_callback(partial(self._finished, pool, digest, len(data), time.perf_counter()))
+        return True
+
+    def ensure(self, digest):
+        """
+        The manifest for a stored image, scheduling the rendering if it was never
+        done (images stored before variants existed, or skipped under load).
+        Returns None while the variants aren't ready.
+        """
+        manifest = self.manifest(digest)
+        if manifest is not None or not self.enabled or self.is_pending(digest):
+            return manifest
+        located = self.store.locate(digest)
+        if located:
+            path, mime_type = located
+            try:
+                with open(path, 'rb') as f:
+                    self.schedule(digest, f.read(), mime_type)
+            except OSError as e:
+                logger.warning(f"⚠️ Could not read {digest} for variants: {e}")
+        return None
+
+    def _finished(self, pool, digest, size_in, started, future):
+        # Runs on the executor's result thread, never on a request thread
+        try:
+            (width, height), variants, placeholder = future.result()
+            entries = []
+            for variant_width, variant_height, name, data in variants:
+                entries.append({
+                    "digest": self.store.put(data, FORMATS[name][1]),
+                    "width": variant_width,
+                    "height": variant_height,
+                    "format": name,
+                    "bytes": len(data)
+                })
+            placeholder_format, placeholder_bytes = placeholder
+            manifest = {
+                "width": width,
+                "height": height,
+                "variants": entries,
+                "placeholder": f"data:{FORMATS[placeholder_format][1]};base64,"
+                               f"{base64.b64encode(placeholder_bytes).decode('ascii')}"
+            }
+            self.store.write_meta(digest, MANIFEST, json.dumps(manifest).encode('utf-8'))
+            with self._lock:
+                self.rendered += 1
+                self.bytes_in += size_in
+                self.bytes_out += sum(entry['bytes'] for entry in entries)
+                self.seconds += time.perf_counter() - started
+        except BrokenProcessPool as e:
+            logger.warning(f"⚠️ Image variant worker died: {e}")
+            self._reset_pool(pool)
+            with self._lock:
+                self.failed += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Image variants for {digest[:12]} failed: {e}")
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self._pending.discard(digest)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "formats": list(self.formats),
+                "widths": list(self.widths),
+                "pending": len(self._pending),
+                "rendered": self.rendered,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "avg_seconds": round(self.seconds / self.rendered, 3) if self.rendered else None
+            }
+
+
+def parse_widths(spec):
+    """"320,640,1024" -> (320, 640, 1024)"""
+    widths = []
+    for entry in (spec or '').split(','):
+        try:
+            width = int(entry.strip())
+        except ValueError:
+            continue
+        if width > 0:
+            widths.append(width)
+    return tuple(sorted(set(widths)))
+
+
+def create_pipeline(store):
+    pipeline = ImageVariantPipeline(
+        store,
+        enabled=SharedConfig.IMAGE_VARIANTS_ENABLED,
+        widths=parse_widths(SharedConfig.IMAGE_VARIANT_WIDTHS),
+        formats=[name.strip().lower() for name in SharedConfig.IMAGE_VARIANT_FORMATS.split(',') if name.strip()],
+        quality=SharedConfig.IMAGE_VARIANT_QUALITY,
+        placeholder_width=SharedConfig.IMAGE_VARIANT_PLACEHOLDER_WIDTH,
+        workers=SharedConfig.IMAGE_VARIANT_WORKERS,
+        max_pending=SharedConfig.IMAGE_VARIANT_MAX_PENDING
+    )
+    register_stats('image_variants', pipeline.stats)
+    return pipeline
@@ -0,0 +1,178 @@
+"""
+Tolerant JSON parsing for model output.
+
+Schema-constrained generation should hand us clean JSON, but older models,
+fenced replies, a missing comma or a reply cut off at the token limit still
+happen. Instead of throwing a finished (and paid-for) generation away, we:
+
+  1. try json.loads on the text with any ```json fence removed,
+  2. otherwise take the first balanced {...} (a single forward scan, so no
+     greedy regex over the whole reply),
+  3. otherwise patch the usual slips (trailing commas, missing commas between
+     lines) and close whatever a truncated reply left open, dropping a
+     half-written array element rather than keeping it.
+
+Outcomes are counted per surface ("lesson", "chat") under /api/stats.
+"""
+
+import re
+import json
+import threading
+from .stats import register_stats
+
+FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+
+
+def _scan_object(text, start):
+    """
+    Returns (end_index or None, open_stack, in_string) for the object starting at text[start].
+    Stack frames are [closer, last_complete]: for arrays, the index just past the
+    last element known to be finished (the '[' itself while none is).
+    """
+    stack = []
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append(['}' if ch == '{' else ']', i + 1])
+        elif ch in '}]':
+            if stack:
+                stack.pop()
+            if not stack:
+                return i + 1, [], False
+            if stack[-1][0] == ']':
+                stack[-1][1] = i + 1
+        elif ch == ',' and stack and stack[-1][0] == ']':
+            stack[-1][1] = i
+    return None, stack, in_string
+
+
+def _patch_commas(text):
+    """
+    Drops commas right before } or ] and adds the missing one between a value
+    and a "key" on the next line. Same forward scan as _scan_object, so string
+    literals are never touched (a spoken "x, ]" stays as it is).
+    """
+    out = []
+    in_string = escaped = False
+    last = None          # index in out of the last non-whitespace character outside strings
+    value_end = False    # ... and whether it finished a value
+    newline = False      # a newline since then
+    pending_comma = None
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                last, value_end, newline, pending_comma = len(out) - 1, True, False, None
+            continue
+        if ch.isspace():
+            out.append(ch)
+            newline = newline or ch == '\n'
+            continue
+        if ch in '}]' and pending_comma is not None:
+            out[pending_comma] = ''
+        if ch == '"':
+            if value_end and newline:
+                out[last] += ','
+            in_string = True
+        out.append(ch)
+        last, newline = len(out) - 1, False
+        pending_comma = last if ch == ',' else None
+        # Outside strings, letters only appear in true/false/null
+        value_end = ch in '}]' or ch.isalnum()
+    return ''.join(out)
+
+
+def _close_truncated(fragment, stack, in_string, offset=0):
+    """
+    Closes what a cut-off reply left open. Inside an array element (e.g. a
+    half-written lesson item) the partial element is dropped: the array is cut
+    back to its last finished element, so no item keeps a truncated "spokenText".
+    offset: where fragment starts in the text the stack indexes refer to.
+    """
+    array = next((depth for depth, (closer, _) in enumerate(stack) if closer == ']'), None)
+    if array is not None:
+        fragment = fragment[:stack[array][1] - offset]
+        stack, in_string = stack[:array + 1], False
+    if in_string:
+        fragment += '"'
+    # Drop a dangling separator or a key that never got its value
+    fragment = re.sub(r'(,\s*"[^"]*"\s*:?\s*|,\s*|:\s*)$', '', fragment.rstrip())
+    return fragment + ''.join(closer for closer, _ in reversed(stack))
+
+
+def repair_json(text):
+    """
+    Returns (value, outcome): 'ok', 'repaired' (slips patched) or 'truncated'
+    (a cut-off reply was closed; anything after the last finished array element
+    is lost). Raises ValueError if nothing usable is in the text.
+    """
+    cleaned = FENCE_RE.sub('', text or '').strip()
+    try:
+        return json.loads(cleaned), 'ok'
+    except json.JSONDecodeError:
+        pass
+
+    start = cleaned.find('{')
+    if start == -1:
+        raise ValueError('No JSON object in model output')
+    end, stack, in_string = _scan_object(cleaned, start)
+    candidate = cleaned[start:end] if end else _close_truncated(cleaned[start:], stack, in_string, start)
+    outcome = 'repaired' if end else 'truncated'
+    try:
+        return json.loads(candidate), outcome
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        return json.loads(_patch_commas(candidate)), outcome
+    except json.JSONDecodeError as e:
+        raise ValueError(f'Could not parse JSON: {e}') from e
+
+
+class StructuredOutputStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, surface, outcome):
+        """outcome: 'ok' | 'repaired' | 'truncated' | 'failed'"""
+        with self._lock:
+            counts = self._counts.setdefault(surface, {"ok": 0, "repaired": 0, "truncated": 0, "failed": 0})
+            counts[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            return {surface: dict(counts) for surface, counts in self._counts.items()}
+
+
+structured_output_stats = StructuredOutputStats()
+register_stats('structured_output', structured_output_stats.stats)
+
+
+def parse_model_json(text, surface, with_outcome=False):
+    """
+    repair_json + outcome counting. Returns the value, or (value, outcome) with
+    with_outcome. Raises ValueError (counted as 'failed').
+    """
+    try:
+        value, outcome = repair_json(text)
+    except ValueError:
+        structured_output_stats.record(surface, 'failed')
+        raise
+    structured_output_stats.record(surface, outcome)
+    return (value, outcome) if with_outcome else value
@@ -0,0 +1,152 @@
+"""
+Incremental parser for the flat JSON objects our models return.
+
+Feed it text as it streams in; it reports string values while they are still
+being written and each field once it is complete:
+
+    parser = JsonFieldStream()
+    for chunk in response:
+        for event in parser.feed(chunk.text):
+            ...  # ("delta", "mochiResponse", "Hi fr"), ("field", "mood", "HAPPY"), ...
+
+Anything before the first "{" (a ```json fence, a stray sentence) and after
+the closing "}" is ignored. Nested values are collected raw and decoded with
+json.loads when they close.
+"""
+
+import json
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class JsonFieldStream:
+    def __init__(self):
+        self.fields = {}
+        self.done = False
+        self._state = 'start'
+        self._key = []
+        self._value = []
+        self._escape = ''
+        self._raw_depth = 0
+        self._raw_in_string = False
+        self._raw_escaped = False
+
+    def feed(self, text):
+        events = []
+        delta = []
+        for ch in text or '':
+            state = self._state
+            if state == 'start':
+                if ch == '{':
+                    self._state = 'key_wait'
+            elif state == 'key_wait':
+                if ch == '"':
+                    self._key, self._state = [], 'key'
+                elif ch == '}':
+                    self._state, self.done = 'end', True
+            elif state == 'key':
+                if self._escape or ch == '\\':
+                    self._escape += ch
+                    if self._escape_complete():
+                        self._key.append(self._decode_escape())
+                elif ch == '"':
+                    self._state = 'colon'
+                else:
+                    self._key.append(ch)
+            elif state == 'colon':
+                if ch == ':':
+                    self._state = 'value_wait'
+            elif state == 'value_wait':
+                if ch == '"':
+                    self._value, self._state = [], 'string'
+                elif not ch.isspace():
+                    self._value, self._state = [ch], 'raw'
+                    self._raw_depth = 1 if ch in '[{' else 0
+                    self._raw_in_string = False
+                    self._raw_escaped = False
+            elif state == 'string':
+                if self._escape or ch == '\\':
+                    self._escape += ch
+                    if self._escape_complete():
+                        decoded = self._decode_escape()
+                        self._value.append(decoded)
+                        delta.append(decoded)
+                elif ch == '"':
+                    self._flush_delta(events, delta)
+                    self._complete(events, ''.join(self._value))
+                else:
+                    self._value.append(ch)
+                    delta.append(ch)
+            elif state == 'raw':
+                self._feed_raw(ch, events)
+            elif state == 'after_value':
+                if ch == ',':
+                    self._state = 'key_wait'
+                elif ch == '}':
+                    self._state, self.done = 'end', True
+            # 'end': ignore trailing text
+        self._flush_delta(events, delta)
+        return events
+
+    def _feed_raw(self, ch, events):
+        if self._raw_in_string:
+            self._value.append(ch)
+            if self._raw_escaped:
+                self._raw_escaped = False
+            elif ch == '\\':
+                self._raw_escaped = True
+            elif ch == '"':
+                self._raw_in_string = False
+            return
+        if self._raw_depth == 0 and ch in ',}':
+            raw = ''.join(self._value).strip()
+            try:
+                value = json.loads(raw)
+            except json.JSONDecodeError:
+                value = raw
+            self._complete(events, value)
+            if ch == '}':
+                self._state, self.done = 'end', True
+            else:
+                self._state = 'key_wait'
+            return
+        self._value.append(ch)
+        if ch == '"':
+            self._raw_in_string = True
+        elif ch in '[{':
+            self._raw_depth += 1
+        elif ch in ']}':
+            self._raw_depth -= 1
+
+    def _flush_delta(self, events, delta):
+        if delta and self._state == 'string':
+            events.append(("delta", ''.join(self._key), ''.join(delta)))
+        delta.clear()
+
+    def _complete(self, events, value):
+        key = ''.join(self._key)
+        self.fields[key] = value
+        events.append(("field", key, value))
+        self._state = 'after_value'
+
+    def _escape_complete(self):
+        esc = self._escape
+        if len(esc) < 2:
+            return False
+        if esc[1] != 'u':
+            return True
+        if len(esc) < 6:
+            return False
+        # A high surrogate needs its low half before it can be decoded
+        if 0xD800 <= int(esc[2:6], 16) <= 0xDBFF and len(esc) < 12:
+            return False
+        return True
+
+    def _decode_escape(self):
+        esc, self._escape = self._escape, ''
+        if esc[1] != 'u':
+            return _ESCAPES.get(esc[1], esc[1])
+        try:
+            return json.loads(f'"{esc}"')
+        except (json.JSONDecodeError, ValueError):
+            return ''
@@ -0,0 +1,227 @@
+"""
+Prometheus metrics for routes and upstream calls, served at GET /metrics.
+
+    with upstream_timer('gemini_image', IMAGE_MODEL_ID):   # latency histogram + error count
+        response = client.models.generate_content(...)
+
+    with stage('json_parse'):                               # in-process work worth seeing
+        plan = parse_lesson_json(text)
+
+    count_fallback('puppy', 'circuit_open')                 # a fallback was served instead
+
+The app's before/after request hooks (app.py, asgi.py) call start_request()
+and finish_request(), which add the route latency and response size. Every
+timer also adds to the current request's breakdown, which is sent back as a
+Server-Timing header when SERVER_TIMING is on and the request took at least
+SERVER_TIMING_MIN_MS:
+
+    Server-Timing: gemini_text;dur=812.4, gemini_image;dur=9120.7;desc="4 calls", total;dur=3391.0
+
+Recording is a bisect and a dict update under a per-metric lock; nothing is
+formatted until /metrics is scraped.
+"""
+
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from .shared_config import SharedConfig
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# The current request's timing breakdown: [(name, ms)]; None outside a request
+request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(values.items()):
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values[:-1]):
+                cumulative += count
+                le = f'le="{bound if bound == "+Inf" else _number(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(values[-1])}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+request_seconds = Histogram(
+    'mochi_request_seconds', 'Time to build the response (streamed bodies: time to first byte).',
+    ('method', 'route', 'status')
+)
+response_bytes = Histogram(
+    'mochi_response_bytes', 'Response body size for non-streamed responses.', ('route',), SIZE_BUCKETS
+)
+upstream_seconds = Histogram(
+    'mochi_upstream_seconds', 'Latency of calls to Gemini and Unsplash.', ('upstream', 'model')
+)
+upstream_errors = Counter(
+    'mochi_upstream_errors_total', 'Upstream calls that raised.', ('upstream', 'model')
+)
+stage_seconds = Histogram(
+    'mochi_stage_seconds', 'In-process work such as model JSON parsing and response serialization.', ('stage',)
+)
+fallbacks = Counter(
+    'mochi_fallbacks_total', 'Fallback answers served instead of an upstream result.', ('kind', 'reason')
+)
+
+METRICS = (request_seconds, response_bytes, upstream_seconds, upstream_errors, stage_seconds, fallbacks)
+
+
+def _add_timing(name, seconds):
+    timings = request_timings.get()
+    if timings is not None:
+        # Image threads share the request's list; list.append is atomic
+        timings.append((name, seconds * 1000))
+
+
+@contextmanager
+def upstream_timer(upstream, model=''):
+    """Times one upstream call; an escaping exception also counts as an error."""
+    if not SharedConfig.METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        upstream_errors.inc(upstream, model or '')
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        upstream_seconds.observe(elapsed, upstream, model or '')
+        _add_timing(upstream, elapsed)
+
+
+@contextmanager
+def stage(name):
+    if not SharedConfig.METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, name)
+        _add_timing(name, elapsed)
+
+
+FALLBACK_REASONS = {'RateLimited': 'rate_limited', 'CircuitOpen': 'circuit_open'}
+
+
+def count_fallback(kind, reason='error'):
+    """reason: a short label, or the exception that caused the fallback."""
+    if not SharedConfig.METRICS_ENABLED:
+        return
+    if isinstance(reason, BaseException):
+        reason = FALLBACK_REASONS.get(type(reason).__name__, 'error')
+    fallbacks.inc(kind, reason)
+
+
+def start_request():
+    """Called from before_request; returns the start time to hand back to finish_request."""
+    request_timings.set([])
+    return time.perf_counter()
+
+
+def server_timing_header(timings, total_ms):
+    """Sums the breakdown per name: "gemini_image;dur=9120.7;desc=\"4 calls\", total;dur=3391.0"."""
+    totals, counts = {}, {}
+    for name, ms in timings:
+        totals[name] = totals.get(name, 0.0) + ms
+        counts[name] = counts.get(name, 0) + 1
+    entries = [
+        f'{name};dur={ms:.1f}' + (f';desc="{counts[name]} calls"' if counts[name] > 1 else '')
+        for name, ms in totals.items()
+    ]
+    entries.append(f'total;dur={total_ms:.1f}')
+    return ', '.join(entries)
+
+
+def finish_request(started, method, route, status, size=None):
+    """
+    Records the route's latency and size. Returns the Server-Timing header
+    value for slow requests when SERVER_TIMING is on, else None.
+    """
+    if not SharedConfig.METRICS_ENABLED or started is None:
+        return None
+    elapsed = time.perf_counter() - started
+    route = route or 'unmatched'
+    request_seconds.observe(elapsed, method, route, str(status))
+    if size is not None:
+        response_bytes.observe(size, route)
+    total_ms = elapsed * 1000
+    if SharedConfig.SERVER_TIMING and total_ms >= SharedConfig.SERVER_TIMING_MIN_MS:
+        return server_timing_header(request_timings.get() or [], total_ms)
+    return None
+
+
+def render_metrics():
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
@@ -0,0 +1,271 @@
+"""
+Client-side rate limiting for upstream APIs (Gemini, Unsplash).
+
+One token bucket per upstream, optionally per model ("gemini:gemini-2.0-flash"),
+sized from SharedConfig.RATE_LIMITS. Callers take a token before each upstream
+call; when the bucket is empty they queue for a short while instead of
+failing, and waiters are served by priority:
+
+    PRIORITY_CHAT (Mochi chat)  >  PRIORITY_SEARCH (visual search, single lessons)  >  PRIORITY_BATCH
+
+The priority comes from the `priority` argument or, if omitted, from the
+`request_priority` context variable (batch workers set it to PRIORITY_BATCH).
+A caller that waits longer than its priority's limit gets RateLimited and
+should use its normal fallback.
+
+Buckets follow the upstream's own view of the budget when it tells us
+(Unsplash's X-Ratelimit-Limit / X-Ratelimit-Remaining headers, Retry-After on
+a 429). Budgets and queue depths are reported under /api/stats.
+"""
+
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+import contextvars
+from .shared_config import SharedConfig
+from .stats import register_stats
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CHAT = 0
+PRIORITY_SEARCH = 1
+PRIORITY_BATCH = 2
+
+request_priority = contextvars.ContextVar('request_priority', default=PRIORITY_SEARCH)
+# How often an async waiter re-checks its bucket (header updates and other waiters leaving)
+ASYNC_POLL_SECONDS = 0.05
+
+
+class RateLimited(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, name, count, per_seconds, burst=None):
+        self.name = name
+        self.window = per_seconds
+        self.rate = count / per_seconds
+        self.capacity = float(burst or count)
+        self.tokens = self.capacity
+        self.remaining_header = None
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._waiters = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self.granted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wait_time(self, now):
+        if now < self._paused_until:
+            return self._paused_until - now
+        return max(0.0, (1 - self.tokens) / self.rate) if self.rate else 1.0
+
+    def _poll(self, ticket, deadline, first):
+        """
+        Under self._cond: takes a token if `ticket` is first in line and one is
+        ready (returns None), else returns how long to wait before trying again.
+        Raises RateLimited once the deadline has passed.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        if self._waiters[0] == ticket and now >= self._paused_until and self.tokens >= 1:
+            self.tokens -= 1
+            self.granted += 1
+            return None
+        remaining = deadline - now
+        if remaining <= 0:
+            self.rejected += 1
+            raise RateLimited(f"{self.name}: rate limit budget exhausted")
+        if first:
+            self.queued += 1
+        wait = self._wait_time(now) if self._waiters[0] == ticket else remaining
+        return min(max(wait, 0.001), remaining)
+
+    def _leave(self, ticket):
+        with self._cond:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+            self._cond.notify_all()
+
+    def acquire(self, priority=PRIORITY_SEARCH, max_wait=0.0):
+        """Takes one token, waiting up to max_wait seconds behind higher-priority callers."""
+        deadline = time.monotonic() + max_wait
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        try:
+            first = True
+            while True:
+                with self._cond:
+                    wait = self._poll(ticket, deadline, first)
+                    if wait is None:
+                        return
+                    first = False
+                    self._cond.wait(wait)
+        finally:
+            self._leave(ticket)
+
+    async def acquire_async(self, priority=PRIORITY_SEARCH, max_wait=0.0):
+        """
+        acquire() for the event loop: the same queue, but the wait is an
+        asyncio.sleep rather than a blocked worker thread. Thread waiters'
+        notify_all can't wake it, so it re-checks every ASYNC_POLL_SECONDS.
+        """
+        deadline = time.monotonic() + max_wait
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        try:
+            first = True
+            while True:
+                with self._cond:
+                    wait = self._poll(ticket, deadline, first)
+                if wait is None:
+                    return
+                first = False
+                await asyncio.sleep(min(wait, ASYNC_POLL_SECONDS))
+        finally:
+            self._leave(ticket)
+
+    def update_from_headers(self, headers):
+        """Adopts the upstream's budget from X-Ratelimit-Limit / X-Ratelimit-Remaining."""
+        try:
+            remaining = headers.get('X-Ratelimit-Remaining')
+            limit = headers.get('X-Ratelimit-Limit')
+            remaining = int(remaining) if remaining is not None else None
+            limit = int(limit) if limit is not None else None
+        except (TypeError, ValueError):
+            return
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            if limit and limit != self.capacity:
+                self.capacity = float(limit)
+                self.rate = limit / self.window
+            if remaining is not None:
+                self.remaining_header = remaining
+                self.tokens = min(self.capacity, float(remaining))
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """Stops handing out tokens for `seconds` (e.g. after a 429 with Retry-After)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 0.0)
+            self._updated = time.monotonic()
+
+    def stats(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "tokens": round(self.tokens, 2),
+                "capacity": self.capacity,
+                "per_second": round(self.rate, 4),
+                "queue_depth": len(self._waiters),
+                "upstream_remaining": self.remaining_header,
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 1),
+                "granted": self.granted,
+                "queued": self.queued,
+                "rejected": self.rejected
+            }
+
+
+def parse_rate_limits(spec):
+    """"unsplash=50/3600,gemini=60/60,gemini:gemini-3-pro-image-preview=10/60:5" -> {name: (count, seconds, burst)}"""
+    limits = {}
+    for entry in (spec or '').split(','):
+        name, _, rule = entry.strip().partition('=')
+        if not name or not rule:
+            continue
+        try:
+            rate, _, burst = rule.partition(':')
+            count, _, seconds = rate.partition('/')
+            limits[name.strip()] = (int(count), float(seconds or 1), int(burst) if burst else None)
+        except ValueError:
+            logger.warning(f"Ignoring bad rate limit entry: {entry!r}")
+    return limits
+
+
+def is_rate_limit_error(error):
+    status = getattr(error, 'code', None) or getattr(error, 'status_code', None)
+    return status == 429 or 'RESOURCE_EXHAUSTED' in str(error) or '429' in str(error)[:40]
+
+
+class RateLimiterRegistry:
+    def __init__(self, limits, max_waits):
+        self.limits = limits
+        self.max_waits = max_waits
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def bucket(self, upstream, model=None):
+        """The bucket for upstream:model if configured, else the upstream's shared bucket (None if unlimited)."""
+        name = f"{upstream}:{model}" if model and f"{upstream}:{model}" in self.limits else upstream
+        bucket = self._buckets.get(name)
+        if bucket is None and name in self.limits:
+            with self._lock:
+                bucket = self._buckets.get(name)
+                if bucket is None:
+                    count, seconds, burst = self.limits[name]
+                    bucket = self._buckets[name] = TokenBucket(name, count, seconds, burst)
+        return bucket
+
+    def acquire(self, upstream, model=None, priority=None):
+        """Blocks until a token is available or raises RateLimited."""
+        bucket = self.bucket(upstream, model)
+        if bucket is None:
+            return
+        priority = request_priority.get() if priority is None else priority
+        bucket.acquire(priority, self.max_waits.get(priority, 0.0))
+
+    async def acquire_async(self, upstream, model=None, priority=None):
+        priority = request_priority.get() if priority is None else priority
+        bucket = self.bucket(upstream, model)
+        if bucket is None:
+            return
+        # Waits on the event loop: queued callers must not tie up the default executor
+        await bucket.acquire_async(priority, self.max_waits.get(priority, 0.0))
+
+    def observe(self, upstream, model=None, status=None, headers=None):
+        """Feeds an upstream response back: budget headers and 429 Retry-After."""
+        bucket = self.bucket(upstream, model)
+        if bucket is None:
+            return
+        if headers is not None:
+            bucket.update_from_headers(headers)
+        if status == 429:
+            try:
+                retry_after = float((headers or {}).get('Retry-After') or 0)
+            except (TypeError, ValueError):
+                retry_after = 0
+            bucket.pause(retry_after or SharedConfig.RATE_LIMIT_429_PAUSE)
+
+    def observe_error(self, upstream, model, error):
+        """Pauses the bucket when an SDK error is the upstream saying 429 / RESOURCE_EXHAUSTED."""
+        if is_rate_limit_error(error):
+            self.observe(upstream, model, status=429)
+
+    def stats(self):
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {name: bucket.stats() for name, bucket in buckets.items()}
+
+
+rate_limits = RateLimiterRegistry(
+    parse_rate_limits(SharedConfig.RATE_LIMITS),
+    {
+        PRIORITY_CHAT: SharedConfig.RATE_LIMIT_WAIT_CHAT,
+        PRIORITY_SEARCH: SharedConfig.RATE_LIMIT_WAIT_SEARCH,
+        PRIORITY_BATCH: SharedConfig.RATE_LIMIT_WAIT_BATCH
+    }
+)
+register_stats('rate_limits', rate_limits.stats)
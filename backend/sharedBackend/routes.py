@@ -0,0 +1,75 @@
+from flask import Blueprint, Response, request, jsonify, send_file
+from .blob_store import blob_store, image_url, image_variants
+from .image_variants import choose_variant, describe_variants
+from .metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from .stats import collect_stats
+
+shared_bp = Blueprint('shared', __name__, url_prefix='/api')
+# Prometheus scrapes /metrics at the root, outside /api
+metrics_bp = Blueprint('metrics', __name__)
+
+# Blobs are content-addressed, so a digest's bytes can never change
+IMAGE_MAX_AGE = 365 * 24 * 3600
+# ?w= answered with the original because the variants aren't rendered yet
+VARIANT_PENDING_MAX_AGE = 60
+
+
+def resolve_image(digest, width, accept):
+    """
+    Returns (digest, max_age, vary_accept) to serve for /images/<digest>?w=...:
+    the best variant when it exists, else the original with a short cache life.
+    """
+    if not width or not image_variants.enabled:
+        # Variants off (or no Pillow): the original is the final answer for every width
+        return digest, IMAGE_MAX_AGE, False
+    variant = choose_variant(image_variants.ensure(digest), width, accept)
+    if variant is None:
+        return digest, VARIANT_PENDING_MAX_AGE, False
+    return variant['digest'], IMAGE_MAX_AGE, True
+
+
+@shared_bp.route('/images/<digest>', methods=['GET'])
+def get_image(digest):
+    """Serves a generated image by its sha256 digest; ?w=640 picks a resized variant."""
+    if not blob_store.locate(digest):
+        return jsonify({"error": "Image not found"}), 404
+
+    served, max_age, vary_accept = resolve_image(
+        digest, request.args.get('w', type=int), request.headers.get('Accept', '')
+    )
+    located = blob_store.locate(served)
+    if not located:
+        return jsonify({"error": "Image not found"}), 404
+
+    path, mime_type = located
+    response = send_file(path, mimetype=mime_type, etag=served, max_age=max_age, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = max_age == IMAGE_MAX_AGE
+    if vary_accept:
+        response.vary.add('Accept')
+    return response
+
+
+@shared_bp.route('/images/<digest>/variants', methods=['GET'])
+def get_image_variants(digest):
+    """Resized variant URLs, srcset strings and an inline placeholder for a generated image."""
+    if not blob_store.locate(digest):
+        return jsonify({"error": "Image not found"}), 404
+    manifest = image_variants.ensure(digest)
+    if manifest is not None:
+        return jsonify(describe_variants(manifest, image_url))
+    if image_variants.is_pending(digest):
+        return jsonify({"status": "pending", "variants": []}), 202
+    return jsonify({"status": "unavailable", "variants": []})
+
+
+@shared_bp.route('/stats', methods=['GET'])
+def stats():
+    """Cache, queue and upstream counters registered by the blueprints."""
+    return jsonify(collect_stats())
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Route and upstream latency histograms, error and fallback counters (Prometheus text format)."""
+    return Response(render_metrics(), mimetype=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,112 @@
+"""
+Kid-safety blocklist filter shared by image generation, lessons and Mochi chat.
+
+The blocklist is compiled once into a single regex shaped like a trie
+("gun|gore|gory" -> "g(?:un|or(?:e|y))"), anchored on word boundaries, so a
+scan costs one pass over the text no matter how many terms are loaded, and
+"sword" no longer matches "swordfish" nor "war" match "warm" or "award".
+The list is read from SharedConfig.SAFETY_BLOCKLIST_PATH and recompiled when
+the file changes.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from .shared_config import SharedConfig
+
+logger = logging.getLogger(__name__)
+
+# Used when the blocklist file is missing or unreadable
+DEFAULT_BLOCKLIST = [
+    'gun', 'weapon', 'knife', 'sword', 'blood', 'gore', 'violence',
+    'kill', 'death', 'war', 'bomb', 'scary', 'fight', 'monster', '18+'
+]
+
+
+def normalize_text(text):
+    return ' '.join((text or '').lower().split())
+
+
+def _trie_regex(node):
+    branches = [re.escape(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return f'(?:{body})?' if '' in node else body
+
+
+def compile_blocklist(terms):
+    """Compiles terms into one word-boundary regex (plural s/es allowed), or None if empty."""
+    trie = {}
+    for term in terms:
+        term = normalize_text(term)
+        if not term:
+            continue
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+    if not trie:
+        return None
+    return re.compile(r'(?<![a-z0-9])' + _trie_regex(trie) + r'(?:e?s)?(?![a-z0-9])')
+
+
+def load_blocklist(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+class SafetyFilter:
+    def __init__(self, path=None, terms=None, reload_interval=5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self.terms = list(terms if terms is not None else DEFAULT_BLOCKLIST)
+        self._pattern = compile_blocklist(self.terms)
+        if path:
+            self._maybe_reload(force=True)
+
+    def _maybe_reload(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime == self._mtime:
+                    return
+                terms = load_blocklist(self.path)
+                pattern = compile_blocklist(terms)
+            except (OSError, re.error) as e:
+                if self._mtime is None:
+                    logger.warning(f"Safety blocklist not loaded from {self.path} ({e}); using defaults.")
+                    self._mtime = -1
+                return
+            self.terms, self._pattern, self._mtime = terms, pattern, mtime
+            logger.info(f"🛡️ Safety blocklist loaded: {len(terms)} terms")
+
+    def find(self, text):
+        """Returns the blocked terms found in text (empty list if clean)."""
+        if self.path:
+            self._maybe_reload()
+        pattern = self._pattern
+        if not pattern or not text:
+            return []
+        return [m.group(0) for m in pattern.finditer(normalize_text(text))]
+
+    def is_blocked(self, text):
+        if self.path:
+            self._maybe_reload()
+        pattern = self._pattern
+        return bool(pattern and text and pattern.search(normalize_text(text)))
+
+
+safety_filter = SafetyFilter(
+    path=SharedConfig.SAFETY_BLOCKLIST_PATH,
+    reload_interval=SharedConfig.SAFETY_RELOAD_INTERVAL
+)
@@ -0,0 +1,106 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# sharedBackend/shared_config.py -> sharedBackend/ -> backend/
+basedir = Path(__file__).resolve().parent.parent
+
+
+class SharedConfig:
+    """Settings for helpers shared by all Mochi blueprints."""
+
+    # One Gemini key for every blueprint (see sharedBackend.gemini_registry); the
+    # VITE_ name is the one the frontend's .env already uses
+    GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY") or os.environ.get("VITE_GEMINI_API_KEY")
+
+    CACHE_DIR = os.environ.get("MOCHI_CACHE_DIR", os.path.join(basedir, ".mochi_cache"))
+
+    # Generated-image cache: in-memory LRU in front of a size-limited SQLite file
+    IMAGE_CACHE_ENABLED = os.environ.get("IMAGE_CACHE_ENABLED", "True").lower() in ['true', '1', 't', 'yes']
+    IMAGE_CACHE_TTL = int(os.environ.get("IMAGE_CACHE_TTL", 7 * 24 * 3600))
+    IMAGE_CACHE_MEMORY_BYTES = int(os.environ.get("IMAGE_CACHE_MEMORY_BYTES", 64 * 1024 * 1024))
+    IMAGE_CACHE_DISK_BYTES = int(os.environ.get("IMAGE_CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+
+    # Generated images are stored once by content hash and served from /api/images/<digest>.
+    # INLINE_IMAGES=True keeps the old data:image/...;base64 responses for older clients.
+    INLINE_IMAGES = os.environ.get("INLINE_IMAGES", "False").lower() in ['true', '1', 't', 'yes']
+    BLOB_DIR = os.environ.get("BLOB_DIR", os.path.join(CACHE_DIR, "blobs"))
+    # e.g. https://api.mochi.example; defaults to the host the request came in on
+    PUBLIC_BASE_URL = os.environ.get("PUBLIC_BASE_URL", "").rstrip('/')
+
+    # ASGI serving path (asgi.py): one pooled async HTTP client per process
+    ASYNC_HTTP_MAX_CONNECTIONS = int(os.environ.get("ASYNC_HTTP_MAX_CONNECTIONS", 1000))
+    ASYNC_HTTP_MAX_KEEPALIVE = int(os.environ.get("ASYNC_HTTP_MAX_KEEPALIVE", 100))
+
+    # Outbound HTTP (sharedBackend.http_client): pooled keep-alive sessions per host
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+    HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 30))
+    HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 2))
+    HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.3))
+    HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 10))
+    # Per-host overrides, e.g. "api.unsplash.com=20,generativelanguage.googleapis.com=32"
+    HTTP_POOL_SIZES = {
+        host.strip(): int(size)
+        for host, _, size in (
+            entry.partition('=') for entry in os.environ.get(
+                "HTTP_POOL_SIZES", "api.unsplash.com=20,generativelanguage.googleapis.com=32"
+            ).split(',') if '=' in entry
+        )
+    }
+    # Hosts that get a pooled session of their own; any other host shares one
+    HTTP_UPSTREAM_HOSTS = frozenset(HTTP_POOL_SIZES) | {
+        host.strip() for host in os.environ.get(
+            "HTTP_UPSTREAM_HOSTS", "api.unsplash.com,generativelanguage.googleapis.com"
+        ).split(',') if host.strip()
+    }
+
+    # Safety filter: one term or phrase per line; the file is re-read when it changes
+    SAFETY_BLOCKLIST_PATH = os.environ.get(
+        "SAFETY_BLOCKLIST_PATH", os.path.join(basedir, "sharedBackend", "safety_blocklist.txt")
+    )
+    SAFETY_RELOAD_INTERVAL = float(os.environ.get("SAFETY_RELOAD_INTERVAL", 5))
+
+    # Client-side upstream rate limits (sharedBackend.rate_limiter): "name=count/seconds[:burst]",
+    # per upstream or per "upstream:model". Unsplash demo keys allow 50 requests an hour.
+    RATE_LIMITS = os.environ.get("RATE_LIMITS", "unsplash=50/3600,gemini=60/60")
+    # How long a request may queue for a token before using its fallback, by priority
+    RATE_LIMIT_WAIT_CHAT = float(os.environ.get("RATE_LIMIT_WAIT_CHAT", 3))
+    RATE_LIMIT_WAIT_SEARCH = float(os.environ.get("RATE_LIMIT_WAIT_SEARCH", 2))
+    RATE_LIMIT_WAIT_BATCH = float(os.environ.get("RATE_LIMIT_WAIT_BATCH", 120))
+    # Pause after a 429 that carries no Retry-After header
+    RATE_LIMIT_429_PAUSE = float(os.environ.get("RATE_LIMIT_429_PAUSE", 10))
+
+    # Circuit breakers (sharedBackend.circuit_breaker): per upstream:model, over a sliding window
+    CIRCUIT_BREAKER_ENABLED = os.environ.get("CIRCUIT_BREAKER_ENABLED", "True").lower() in ['true', '1', 't', 'yes']
+    CIRCUIT_WINDOW_SECONDS = float(os.environ.get("CIRCUIT_WINDOW_SECONDS", 60))
+    CIRCUIT_MIN_CALLS = int(os.environ.get("CIRCUIT_MIN_CALLS", 5))
+    CIRCUIT_ERROR_RATE = float(os.environ.get("CIRCUIT_ERROR_RATE", 0.5))
+    # A call slower than this counts as slow: "name=seconds", per upstream or "upstream:model"
+    CIRCUIT_SLOW_CALL_SECONDS = os.environ.get(
+        "CIRCUIT_SLOW_CALL_SECONDS", "gemini=20,unsplash=4,gemini:gemini-3-pro-image-preview=45,"
+        "gemini:gemini-2.0-flash-exp-image-generation=30"
+    )
+    CIRCUIT_SLOW_CALL_RATE = float(os.environ.get("CIRCUIT_SLOW_CALL_RATE", 0.5))
+    # How long an open circuit fails fast before letting a probe call through
+    CIRCUIT_OPEN_SECONDS = float(os.environ.get("CIRCUIT_OPEN_SECONDS", 30))
+    CIRCUIT_HALF_OPEN_PROBES = int(os.environ.get("CIRCUIT_HALF_OPEN_PROBES", 1))
+
+    # Prometheus metrics at GET /metrics (sharedBackend.metrics)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True").lower() in ['true', '1', 't', 'yes']
+    # Per-request breakdown (Gemini text/image, parsing, ...) as a Server-Timing header on slow requests
+    SERVER_TIMING = os.environ.get("SERVER_TIMING", "False").lower() in ['true', '1', 't', 'yes']
+    SERVER_TIMING_MIN_MS = float(os.environ.get("SERVER_TIMING_MIN_MS", 1000))
+
+    # Resized variants of generated images (sharedBackend.image_variants, needs Pillow): WebP/JPEG
+    # copies per width plus a tiny placeholder, rendered in a process pool after the image is stored
+    IMAGE_VARIANTS_ENABLED = os.environ.get("IMAGE_VARIANTS_ENABLED", "True").lower() in ['true', '1', 't', 'yes']
+    IMAGE_VARIANT_WIDTHS = os.environ.get("IMAGE_VARIANT_WIDTHS", "320,640,1024")
+    # Any of avif, webp, jpeg; formats this Pillow build can't encode are skipped
+    IMAGE_VARIANT_FORMATS = os.environ.get("IMAGE_VARIANT_FORMATS", "webp,jpeg")
+    IMAGE_VARIANT_QUALITY = int(os.environ.get("IMAGE_VARIANT_QUALITY", 72))
+    IMAGE_VARIANT_PLACEHOLDER_WIDTH = int(os.environ.get("IMAGE_VARIANT_PLACEHOLDER_WIDTH", 24))
+    IMAGE_VARIANT_WORKERS = int(os.environ.get("IMAGE_VARIANT_WORKERS", 2))
+    # Images waiting for the pool beyond this are skipped; GET .../variants schedules them later
+    IMAGE_VARIANT_MAX_PENDING = int(os.environ.get("IMAGE_VARIANT_MAX_PENDING", 64))
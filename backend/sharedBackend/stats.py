@@ -0,0 +1,59 @@
+"""
+Registry of runtime counters exposed at GET /api/stats.
+
+Modules register a zero-argument callable returning a JSON-serialisable dict:
+
+    register_stats('lesson_cache', lesson_plan_cache.stats)
+"""
+
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+_providers = {}
+_lock = threading.Lock()
+
+
+def register_stats(name, provider):
+    with _lock:
+        _providers[name] = provider
+
+
+def collect_stats():
+    with _lock:
+        providers = dict(_providers)
+    snapshot = {}
+    for name, provider in providers.items():
+        try:
+            snapshot[name] = provider()
+        except Exception as e:
+            logger.error(f"Stats provider '{name}' failed: {e}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
+
+
+class LatencyWindow:
+    """Percentiles over the last `size` samples (milliseconds)."""
+
+    def __init__(self, size=500):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=size)
+        self.count = 0
+
+    def record(self, ms):
+        with self._lock:
+            self._samples.append(ms)
+            self.count += 1
+
+    def stats(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        if not samples:
+            return {"count": count}
+
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 1)
+        return {"count": count, "p50": pct(0.50), "p95": pct(0.95), "max": round(samples[-1], 1)}
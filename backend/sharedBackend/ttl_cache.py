@@ -0,0 +1,340 @@
+"""
+Small in-process caching helpers: an LRU cache with per-entry TTL and a
+single-flight guard so concurrent identical misses share one upstream call.
+"""
+
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after being set."""
+
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one `fn()` per key at a time; callers arriving while it is
+    in flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Returns (result, shared) where shared is True if another caller did the work."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+async def _coalesce_async(cache, key, compute):
+    """
+    Async single-flight behind get_or_compute_async: the first caller for a key
+    (the leader) runs compute() and the others await its future. A cancelled
+    leader (its client went away) doesn't fail the waiters: they look again and
+    one of them takes over. `cache` provides _lock, _async_calls and _count().
+    """
+    while True:
+        with cache._lock:
+            future = cache._async_calls.get(key)
+            leader = future is None
+            if leader:
+                future = cache._async_calls[key] = asyncio.get_running_loop().create_future()
+        if leader:
+            break
+        try:
+            value = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled():
+                continue  # the leader was cancelled, not this request
+            raise
+        cache._count('coalesced')
+        return value
+
+    try:
+        value = await compute()
+        future.set_result(value)
+        cache._count('misses')
+        return value
+    except BaseException as e:
+        cache._count('errors')
+        if isinstance(e, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    finally:
+        with cache._lock:
+            cache._async_calls.pop(key, None)
+
+
+class CoalescingCache:
+    """
+    TTLCache + SingleFlight with hit / miss / coalesced counters. Values for
+    which `cacheable(value)` is False are shared with waiting callers but not stored.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600, cacheable=None):
+        self.cache = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.cacheable = cacheable or (lambda value: True)
+        self.flight = SingleFlight()
+        self._async_calls = {}  # key -> asyncio.Future, used by get_or_compute_async
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get_or_compute(self, key, fn):
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count('hits')
+            return value
+
+        def compute():
+            # A previous leader may have filled the cache between our miss and now
+            cached = self.cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                return cached
+            result = fn()
+            if self.cacheable(result):
+                self.cache.set(key, result)
+            return result
+
+        try:
+            value, shared = self.flight.do(key, compute)
+        except Exception:
+            self._count('errors')
+            raise
+        self._count('coalesced' if shared else 'misses')
+        return value
+
+    async def get_or_compute_async(self, key, coro_fn):
+        """Async twin of get_or_compute for the ASGI app; waiters await the leader's future."""
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count('hits')
+            return value
+
+        async def compute():
+            # A cancelled leader's successor may find the cache filled by then
+            cached = self.cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                return cached
+            result = await coro_fn()
+            if self.cacheable(result):
+                self.cache.set(key, result)
+            return result
+
+        return await _coalesce_async(self, key, compute)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "entries": len(self.cache),
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+            }
+
+
+class SWRCache:
+    """
+    LRU cache with stale-while-revalidate: entries are fresh for `ttl` seconds,
+    then served stale for up to `stale_ttl` more while one background refresh
+    runs. Misses are computed inline with single-flight coalescing.
+    Values for which `cacheable(value)` is False are returned but not stored.
+    """
+
+    def __init__(self, max_entries=1000, ttl=3600, stale_ttl=0, cacheable=None, name='swr'):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self.cacheable = cacheable or (lambda value: True)
+        # Hard expiry covers the stale window; freshness is tracked per entry
+        self.cache = TTLCache(max_entries=max_entries, ttl=ttl + stale_ttl)
+        self.flight = SingleFlight()
+        self._async_calls = {}  # key -> asyncio.Future, used by get_or_compute_async
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _lookup(self, key):
+        """Returns (value, is_fresh) or (_MISSING, False)."""
+        entry = self.cache.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING, False
+        fresh_until, value = entry
+        return value, fresh_until > time.monotonic()
+
+    def _store(self, key, value):
+        if self.cacheable(value):
+            self.cache.set(key, (time.monotonic() + self.ttl, value))
+
+    def _claim_refresh(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return True
+
+    def _release_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def _refresh(self, key, fn):
+        try:
+            self._store(key, fn())
+        except Exception:
+            self._count('errors')
+        finally:
+            self._release_refresh(key)
+
+    def get_or_compute(self, key, fn):
+        value, fresh = self._lookup(key)
+        if value is not _MISSING:
+            if fresh:
+                self._count('hits')
+            else:
+                self._count('stale_hits')
+                if self._claim_refresh(key):
+                    threading.Thread(
+                        target=self._refresh, args=(key, fn), name=f'{self.name}-refresh', daemon=True
+                    ).start()
+            return value
+
+        def compute():
+            result = fn()
+            self._store(key, result)
+            return result
+
+        try:
+            value, shared = self.flight.do(key, compute)
+        except Exception:
+            self._count('errors')
+            raise
+        self._count('coalesced' if shared else 'misses')
+        return value
+
+    async def get_or_compute_async(self, key, coro_fn):
+        """Async twin for the ASGI app; stale refreshes run as event-loop tasks."""
+        value, fresh = self._lookup(key)
+        if value is not _MISSING:
+            if fresh:
+                self._count('hits')
+            else:
+                self._count('stale_hits')
+                if self._claim_refresh(key):
+                    asyncio.get_running_loop().create_task(self._refresh_async(key, coro_fn))
+            return value
+
+        async def compute():
+            result = await coro_fn()
+            self._store(key, result)
+            return result
+
+        return await _coalesce_async(self, key, compute)
+
+    async def _refresh_async(self, key, coro_fn):
+        try:
+            self._store(key, await coro_fn())
+        except Exception:
+            self._count('errors')
+        finally:
+            self._release_refresh(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+            served_from_cache = self.hits + self.stale_hits + self.coalesced
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "refreshes": self.refreshes,
+                "errors": self.errors,
+                "entries": len(self.cache),
+                "hit_ratio": round(served_from_cache / lookups, 4) if lookups else 0.0
+            }
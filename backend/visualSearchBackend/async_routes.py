@@ -0,0 +1,79 @@
+"""Async (Quart) versions of the visual search endpoints for the ASGI app in asgi.py."""
+
+import logging
+from quart import Blueprint, current_app, request, jsonify
+from visualSearchBackend.services.gemini_service import generate_ai_image_async
+from visualSearchBackend.services.image_search import search_unsplash_async, track_unsplash_download_async, is_unsplash_download_url
+from visualSearchBackend.services import download_tracker
+from sharedBackend.circuit_breaker import circuit_breakers
+
+logger = logging.getLogger(__name__)
+
+async_api_bp = Blueprint('api', __name__)
+
+@async_api_bp.route('/health', methods=['GET'])
+async def health():
+    """Confirms Mochi is online; "degraded" while an upstream circuit is open."""
+    return jsonify({
+        "status": "degraded" if circuit_breakers.any_open() else "online",
+        "message": "Mochi is awake and listening!",
+        "version": "2.0.26",
+        "circuits": circuit_breakers.stats()
+    })
+
+@async_api_bp.route('/visual-search', methods=['POST'])
+async def visual_search():
+    """Handles real-world photo searches via Unsplash."""
+    try:
+        data = await request.get_json(silent=True) or {}
+        query = data.get('query', '').strip()
+
+        if not query:
+            return jsonify({"results": [], "message": "Mochi needs to know what to look for!"}), 400
+
+        results = await search_unsplash_async(query, current_app.config.get('UNSPLASH_ACCESS_KEY'))
+        return jsonify({"results": results})
+
+    except Exception as e:
+        logger.error(f"Visual Search Error: {e}")
+        return jsonify({"results": [], "error": "Internal search error"}), 500
+
+@async_api_bp.route('/generate-content', methods=['POST'])
+async def generate_content():
+    """Handles Mochi's AI image generation via Gemini."""
+    try:
+        data = await request.get_json(silent=True) or {}
+        query = data.get('query', '').strip()
+
+        if not query:
+            return jsonify({"error": "Query key missing or empty in request body"}), 400
+
+        result = await generate_ai_image_async(query)
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"AI Generation Error: {e}")
+        return jsonify({"error": "Mochi's drawing tool is resting. Try again!"}), 500
+
+@async_api_bp.route('/track-download', methods=['POST'])
+async def track_download():
+    """Analytics tracking for Unsplash (API requirement). Queued, so the click never waits on it."""
+    data = await request.get_json(silent=True) or {}
+    url = data.get('download_location')
+    if url and not is_unsplash_download_url(url):
+        # Never send our Unsplash key to a host the client picked
+        return jsonify({"error": "download_location must be an Unsplash API URL"}), 400
+
+    if url and download_tracker.download_tracker:
+        if download_tracker.download_tracker.submit(url):
+            return jsonify({"status": "queued"}), 202
+        return jsonify({"status": "dropped"}), 503
+
+    if url:
+        try:
+            await track_unsplash_download_async(url, current_app.config.get('UNSPLASH_ACCESS_KEY'))
+            return jsonify({"status": "success"})
+        except Exception as e:
+            logger.warning(f"Tracking failed: {e}")
+
+    return jsonify({"status": "ignored"}), 200
@@ -1,7 +1,9 @@
 import logging
 from flask import Blueprint, request, jsonify
 from visualSearchBackend.services.gemini_service import generate_ai_image
-from visualSearchBackend.services.image_search import search_unsplash, track_unsplash_download
+from visualSearchBackend.services.image_search import search_unsplash, track_unsplash_download, is_unsplash_download_url
+from visualSearchBackend.services import download_tracker
+from sharedBackend.circuit_breaker import circuit_breakers
 
 # Initialize a logger for this file
 logger = logging.getLogger(__name__)
@@ -10,11 +12,12 @@ api_bp = Blueprint('api', __name__)
 
 @api_bp.route('/health', methods=['GET'])
 def health():
-    """Confirms Mochi is online."""
+    """Confirms Mochi is online; "degraded" while an upstream circuit is open."""
     return jsonify({
-        "status": "online",
+        "status": "degraded" if circuit_breakers.any_open() else "online",
         "message": "Mochi is awake and listening!",
-        "version": "2.0.26"
+        "version": "2.0.26",
+        "circuits": circuit_breakers.stats()
     })
 
 @api_bp.route('/visual-search', methods=['POST'])
@@ -56,10 +59,18 @@ def generate_content():
 
 @api_bp.route('/track-download', methods=['POST'])
 def track_download():
-    """Analytics tracking for Unsplash (API requirement)."""
+    """Analytics tracking for Unsplash (API requirement). Queued, so the click never waits on it."""
     data = request.get_json(silent=True) or {}
     url = data.get('download_location')
+    if url and not is_unsplash_download_url(url):
+        # Never send our Unsplash key to a host the client picked
+        return jsonify({"error": "download_location must be an Unsplash API URL"}), 400
     
+    if url and download_tracker.download_tracker:
+        if download_tracker.download_tracker.submit(url):
+            return jsonify({"status": "queued"}), 202
+        return jsonify({"status": "dropped"}), 503
+
     if url:
         try:
             track_unsplash_download(url)
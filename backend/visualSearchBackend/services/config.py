@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from sharedBackend.shared_config import SharedConfig
 
 # 1. Path Setup
 # Pathing: services/config.py -> services/ -> backend/ -> .env
@@ -14,9 +15,30 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'mochi-super-secret-key-2026')
     
     # API Keys (Mapping VITE_ names from .env to internal Config names)
-    GEMINI_API_KEY = os.environ.get('VITE_GEMINI_API_KEY')
+    GEMINI_API_KEY = SharedConfig.GEMINI_API_KEY  # GEMINI_API_KEY, else VITE_GEMINI_API_KEY
     UNSPLASH_ACCESS_KEY = os.environ.get('VITE_UNSPLASH_ACCESS_KEY')
+    # Benchmarks point this at a local stand-in
+    UNSPLASH_API_BASE = os.environ.get('UNSPLASH_API_BASE', 'https://api.unsplash.com').rstrip('/')
+
+    # Read timeout (seconds) for Unsplash calls; connect timeout comes from SharedConfig
+    UNSPLASH_TIMEOUT = float(os.environ.get('UNSPLASH_TIMEOUT', 5))
+
+    # Visual search caches: raw query -> keywords, keywords -> formatted Unsplash results.
+    # Stale entries are still served for SEARCH_CACHE_STALE_TTL while a background refresh runs.
+    SEARCH_KEYWORD_CACHE_TTL = int(os.environ.get('SEARCH_KEYWORD_CACHE_TTL', 7 * 24 * 3600))
+    SEARCH_RESULTS_CACHE_TTL = int(os.environ.get('SEARCH_RESULTS_CACHE_TTL', 6 * 3600))
+    SEARCH_CACHE_STALE_TTL = int(os.environ.get('SEARCH_CACHE_STALE_TTL', 24 * 3600))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get('SEARCH_CACHE_MAX_ENTRIES', 2000))
+
+    # Background /api/track-download dispatcher
+    TRACKING_QUEUE_SIZE = int(os.environ.get('TRACKING_QUEUE_SIZE', 1000))
+    TRACKING_BATCH_SIZE = int(os.environ.get('TRACKING_BATCH_SIZE', 20))
+    TRACKING_DEDUPE_WINDOW = float(os.environ.get('TRACKING_DEDUPE_WINDOW', 60))
+    TRACKING_MAX_ATTEMPTS = int(os.environ.get('TRACKING_MAX_ATTEMPTS', 3))
     
+    # Upper bound on any request body (mainly chat audio); Flask answers 413 beyond it
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 12 * 1024 * 1024))
+
     # Flask settings
     # Ensures DEBUG is a proper boolean even if .env provides a string
     DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() in ['true', '1', 't', 'yes']
@@ -31,7 +53,7 @@ class Config:
     def check_env():
         """Optional helper to alert you if keys are missing on startup."""
         missing = []
-        if not os.environ.get('VITE_GEMINI_API_KEY'): missing.append("VITE_GEMINI_API_KEY")
+        if not Config.GEMINI_API_KEY: missing.append("VITE_GEMINI_API_KEY (or GEMINI_API_KEY)")
         if not os.environ.get('VITE_UNSPLASH_ACCESS_KEY'): missing.append("VITE_UNSPLASH_ACCESS_KEY")
         
         if missing:
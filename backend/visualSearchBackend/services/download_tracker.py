@@ -0,0 +1,197 @@
+"""
+Fire-and-forget dispatcher for Unsplash download-tracking pings.
+
+/api/track-download only enqueues the download_location URL and returns 202.
+A single background thread drains the bounded queue in batches, drops URLs
+already pinged within DEDUPE_WINDOW seconds, retries failures a few times
+(the same thread picks them up again once their backoff is over), and
+flushes whatever is left, pending retries included, when the process exits.
+"""
+
+import time
+import heapq
+import queue
+import itertools
+import atexit
+import logging
+import threading
+from sharedBackend.stats import register_stats
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadTracker:
+    def __init__(self, send, max_queue=1000, batch_size=20, dedupe_window=60.0, max_attempts=3, retry_delay=2.0):
+        self._send = send  # callable(url) that raises on failure
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.dedupe_window = dedupe_window
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._recent = {}  # url -> time it was last sent
+        self._retries = []  # heap of (due, seq, url, attempt), drained by the worker thread
+        self._retry_seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._registered_atexit = False
+        self.enqueued = 0
+        self.sent = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='unsplash-download-tracker', daemon=True)
+        self._thread.start()
+        if not self._registered_atexit:
+            atexit.register(self.shutdown)
+            self._registered_atexit = True
+
+    def submit(self, url):
+        """Queues a ping; returns False if the queue is full and the ping was dropped."""
+        with self._lock:
+            last_sent = self._recent.get(url)
+            if last_sent is not None and time.monotonic() - last_sent < self.dedupe_window:
+                self.deduplicated += 1
+                return True
+        try:
+            self._queue.put_nowait((url, 1))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning("Download tracking queue full; dropping ping.")
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _next_batch(self, timeout, batch=None):
+        batch = batch or []
+        try:
+            if not batch:
+                batch.append(self._queue.get(timeout=timeout))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _due_retries(self, now=None):
+        """Pops the retries whose backoff is over (all of them when now is None)."""
+        due = []
+        with self._lock:
+            while self._retries and (now is None or self._retries[0][0] <= now):
+                _, _, url, attempt = heapq.heappop(self._retries)
+                due.append((url, attempt))
+        return due
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                # Wake up in time for the next retry
+                timeout = min(0.5, max(0.0, self._retries[0][0] - now)) if self._retries else 0.5
+            batch = self._next_batch(timeout, self._due_retries(now))
+            if batch:
+                self._dispatch(batch, allow_retry=True)
+
+    def _dispatch(self, batch, allow_retry):
+        now = time.monotonic()
+        seen = set()
+        for url, attempt in batch:
+            with self._lock:
+                # Collapse repeats inside this batch and within the dedupe window
+                last_sent = self._recent.get(url)
+                if url in seen or (last_sent is not None and now - last_sent < self.dedupe_window):
+                    self.deduplicated += 1
+                    continue
+            seen.add(url)
+            try:
+                self._send(url)
+                with self._lock:
+                    self._recent[url] = time.monotonic()
+                    self.sent += 1
+            except Exception as e:
+                if allow_retry and attempt < self.max_attempts:
+                    self._schedule_retry(url, attempt + 1, time.monotonic() + self.retry_delay * attempt)
+                else:
+                    with self._lock:
+                        self.failed += 1
+                    logger.error(f"Tracking Error (giving up after {attempt} attempts): {e}")
+        self._prune(now)
+
+    def _schedule_retry(self, url, attempt, due):
+        with self._lock:
+            # Retries share the queue's bound so a dead upstream can't grow them without limit
+            if len(self._retries) >= self._queue.maxsize > 0:
+                self.dropped += 1
+                return
+            heapq.heappush(self._retries, (due, next(self._retry_seq), url, attempt))
+
+    def _prune(self, now):
+        with self._lock:
+            expired = [url for url, sent_at in self._recent.items() if now - sent_at >= self.dedupe_window]
+            for url in expired:
+                del self._recent[url]
+
+    def shutdown(self, timeout=5.0):
+        """
+        Stops the worker and sends whatever is still queued or waiting to be
+        retried, once each; anything left when the timeout runs out counts as dropped.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        retries = self._due_retries()
+        while time.monotonic() < deadline:
+            batch = self._next_batch(timeout=0, batch=retries[:self.batch_size])
+            retries = retries[self.batch_size:]
+            if not batch:
+                break
+            self._dispatch(batch, allow_retry=False)
+        left = len(retries) + self._queue.qsize()
+        if left:
+            with self._lock:
+                self.dropped += left
+            logger.warning(f"Download tracking: {left} pings not sent before shutdown.")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "retry_pending": len(self._retries),
+                "enqueued": self.enqueued,
+                "sent": self.sent,
+                "deduplicated": self.deduplicated,
+                "dropped": self.dropped,
+                "failed": self.failed
+            }
+
+
+download_tracker = None
+
+
+def init_download_tracker(app):
+    """Starts the process-wide tracker using the app's Unsplash settings."""
+    global download_tracker
+    from .image_search import ping_unsplash_download
+
+    api_key = app.config.get('UNSPLASH_ACCESS_KEY')
+    timeout = app.config.get('UNSPLASH_TIMEOUT', 5)
+    if download_tracker is None:
+        download_tracker = DownloadTracker(
+            send=lambda url: ping_unsplash_download(url, api_key, timeout),
+            max_queue=app.config.get('TRACKING_QUEUE_SIZE', 1000),
+            batch_size=app.config.get('TRACKING_BATCH_SIZE', 20),
+            dedupe_window=app.config.get('TRACKING_DEDUPE_WINDOW', 60),
+            max_attempts=app.config.get('TRACKING_MAX_ATTEMPTS', 3)
+        )
+        register_stats('download_tracker', download_tracker.stats)
+    download_tracker.start()
+    return download_tracker
@@ -1,117 +1,256 @@
 import os
-import base64
+import asyncio
 import logging
 import datetime
 import uuid  # Added for unique ID generation
-from google import genai
-from google.genai import types
 from flask import current_app
+from sharedBackend.image_cache import get_image_cache
+from sharedBackend.blob_store import image_reference
+from sharedBackend.circuit_breaker import CircuitOpen, circuit_breakers
+from sharedBackend.gemini_registry import gemini
+from sharedBackend.metrics import count_fallback, upstream_timer
+from sharedBackend.rate_limiter import RateLimited, rate_limits
+from sharedBackend.safety_filter import safety_filter
+from .keyword_extractor import extract_keywords, extraction_stats
 
 logger = logging.getLogger(__name__)
 
-client = None
-
-SAFETY_BLOCKLIST = [
-    'gun', 'weapon', 'knife', 'sword', 'blood', 'gore', 'violence', 
-    'kill', 'death', 'war', 'bomb', 'scary', 'fight', 'monster', '18+'
-]
-
-def init_gemini():
-    global client
+def init_gemini(api_key=None):
+    """
+    Hands the app's Gemini key to the shared registry. The client itself is
+    only built on the first request that needs it (see sharedBackend.gemini_registry).
+    Callers outside a Flask app context (asgi.py) pass the key, '' when unset.
+    """
     try:
-        api_key = current_app.config.get('GEMINI_API_KEY')
-        if api_key:
-            client = genai.Client(api_key=api_key)
-            logger.info("🧠 Mochi's Backend Brain Initialized")
-        else:
+        gemini.configure(api_key if api_key is not None else current_app.config.get('GEMINI_API_KEY'))
+        if not gemini.configured:
             logger.error("Mochi Error: Gemini API Key not found in Config.")
     except Exception as e:
         logger.error(f"Failed to initialize Gemini: {e}")
 
+SUMMARY_MODEL_ID = 'gemini-3-flash-preview'
+
+def build_summarize_request(query):
+    """Returns the generate_content kwargs for keyword summarization."""
+    from google.genai import types
+    return {
+        "model": SUMMARY_MODEL_ID,
+        "contents": f"Summarize this into 1 or 2 simple nouns for an image search: '{query}'",
+        "config": types.GenerateContentConfig(temperature=0.3)
+    }
+
+def clean_summary(text):
+    return text.strip().lower().replace('.', '')
+
 def summarize_query_for_unsplash(query):
     """
     Prevents HTTP 500 errors by handling empty strings and failed API calls.
+    Most kid queries are handled by the local extractor; only low-confidence
+    ones pay for a Gemini round trip.
+
+    Returns (keywords, cacheable): fallbacks served because Gemini was
+    unconfigured, rate limited, open-circuited or failing are not cacheable,
+    so a short outage doesn't pin them in keyword_cache.
     """
     if not query or not query.strip():
-        return "happy"
-        
-    global client
+        return "happy", True
+
+    keywords, confident = extract_keywords(query)
+    if confident:
+        extraction_stats.record('local')
+        return keywords, True
+
+    client = gemini.client()
     if not client:
-        return query
+        count_fallback('local_keywords', 'unconfigured')
+        return keywords or query, False
 
+    extraction_stats.record('gemini')
     try:
-        summarize_prompt = f"Summarize this into 1 or 2 simple nouns for an image search: '{query}'"
-        response = client.models.generate_content(
-            model='gemini-3-flash-preview', 
-            contents=summarize_prompt,
-            config=types.GenerateContentConfig(temperature=0.3)
-        )
-        return response.text.strip().lower().replace('.', '')
+        circuit_breakers.check('gemini', SUMMARY_MODEL_ID)
+        rate_limits.acquire('gemini', SUMMARY_MODEL_ID)
+        with circuit_breakers.guard('gemini', SUMMARY_MODEL_ID), upstream_timer('gemini_summary', SUMMARY_MODEL_ID):
+            response = client.models.generate_content(**build_summarize_request(query))
+        summary = clean_summary(response.text or '')
+        return (summary, True) if summary else (keywords or query, False)
+    except (RateLimited, CircuitOpen) as e:
+        count_fallback('local_keywords', e)
+        logger.warning(f"⚠️ {e}; searching with local keywords")
+        return keywords or query, False
     except Exception as e:
+        count_fallback('raw_query', e)
+        rate_limits.observe_error('gemini', SUMMARY_MODEL_ID, e)
         logger.error(f"Summarization Error: {e}")
-        return query 
+        return query, False
+
+IMAGE_MODEL_ID = 'gemini-3-pro-image-preview'
+
+def prepare_image_prompt(query):
+    """Returns (is_restricted, image_prompt) after the blocklist check."""
+    is_restricted = safety_filter.is_blocked(query)
+    effective_query = "a cute fluffy golden retriever puppy" if is_restricted else query
+    return is_restricted, f"A high-resolution, photorealistic HD cinematic photo of: {effective_query}."
+
+def build_image_config():
+    from google.genai import types
+    return types.GenerateContentConfig(
+        system_instruction="""
+            You are Mochi, a professional AI photography assistant for kids. 
+            Generate high-fidelity, photorealistic, and joyful images.
+            SAFETY: STRICTLY PROHIBITED: Weapons, violence, blood, or gore.
+            KIDS MODE: Always provide a sophisticated 3-word simple title.
+        """,
+        safety_settings=[
+            types.SafetySetting(category='HARM_CATEGORY_DANGEROUS_CONTENT', threshold='BLOCK_LOW_AND_ABOVE'),
+        ],
+        response_modalities=["TEXT", "IMAGE"],
+        image_config=types.ImageConfig(aspect_ratio="16:9")
+    )
+
+def build_image_response(query, ai_title, image_bytes, is_restricted=False):
+    return {
+        # Use uuid4 to guarantee unique keys in React lists
+        "id": str(uuid.uuid4()),
+        "title": "A Friendly Friend!" if is_restricted else (ai_title or f"Mochi's {query}"),
+        "imageUrl": image_reference(image_bytes, 'image/png'),
+        "type": "image",
+        "description": "Mochi painted this for you!"
+    }
+
+def cached_ai_image(query, is_restricted, image_prompt):
+    """Same model + prompt -> same picture, served without touching the API."""
+    cache = get_image_cache()
+    if cache:
+        cached = cache.get(IMAGE_MODEL_ID, image_prompt)
+        if cached:
+            return build_image_response(query, cached.title, cached.data, is_restricted)
+    return None
+
+def read_image_generation(query, is_restricted, image_prompt, response):
+    """Turns a generate_content response into Mochi's image payload (or a puppy)."""
+    if not response.candidates or response.candidates[0].finish_reason == "SAFETY":
+        logger.warning("🛡️ Gemini API Safety Block triggered.")
+        count_fallback('puppy', 'safety')
+        return get_puppy_fallback(is_restricted=True)
+
+    ai_title = ""
+    image_bytes = b""
+
+    for part in response.candidates[0].content.parts:
+        # Skip Gemini 3 internal reasoning/thought tokens
+        if hasattr(part, 'thought') and part.thought:
+            continue
+        if part.text:
+            ai_title = part.text.strip()
+        if part.inline_data:
+            image_bytes = part.inline_data.data
+
+    if image_bytes:
+        cache = get_image_cache()
+        if cache:
+            cache.put(IMAGE_MODEL_ID, image_prompt, 'image/png', image_bytes, ai_title)
+        return build_image_response(query, ai_title, image_bytes, is_restricted)
+
+    count_fallback('puppy', 'no_image')
+    return get_puppy_fallback()
 
 def generate_ai_image(query):
-    global client
+    is_restricted, image_prompt = prepare_image_prompt(query)
+
+    cached = cached_ai_image(query, is_restricted, image_prompt)
+    if cached:
+        return cached
+
+    client = gemini.client()
     if not client:
+        count_fallback('puppy', 'unconfigured')
         return get_puppy_fallback()
 
-    normalized_query = (query or "").lower().strip()
-    is_restricted = any(word in normalized_query for word in SAFETY_BLOCKLIST)
-    effective_query = "a cute fluffy golden retriever puppy" if is_restricted else query
+    try:
+        # An open circuit answers with the puppy right away instead of waiting out the SDK timeout
+        circuit_breakers.check('gemini', IMAGE_MODEL_ID)
+        rate_limits.acquire('gemini', IMAGE_MODEL_ID)
+        with circuit_breakers.guard('gemini', IMAGE_MODEL_ID), upstream_timer('gemini_image', IMAGE_MODEL_ID):
+            response = client.models.generate_content(
+                model=IMAGE_MODEL_ID,
+                contents=image_prompt,
+                config=build_image_config()
+            )
+        return read_image_generation(query, is_restricted, image_prompt, response)
+
+    except (RateLimited, CircuitOpen) as e:
+        count_fallback('puppy', e)
+        logger.warning(f"⚠️ {e}; sending the puppy")
+        return get_puppy_fallback()
+    except Exception as e:
+        count_fallback('puppy', e)
+        rate_limits.observe_error('gemini', IMAGE_MODEL_ID, e)
+        logger.error(f"Gemini Native Error: {e}")
+        return get_puppy_fallback()
+
+async def summarize_query_for_unsplash_async(query):
+    """Async twin of summarize_query_for_unsplash for the ASGI app; returns (keywords, cacheable)."""
+    if not query or not query.strip():
+        return "happy", True
 
+    keywords, confident = extract_keywords(query)
+    if confident:
+        extraction_stats.record('local')
+        return keywords, True
+    client = gemini.client()
+    if not client:
+        count_fallback('local_keywords', 'unconfigured')
+        return keywords or query, False
+
+    extraction_stats.record('gemini')
     try:
-        model_id = 'gemini-3-pro-image-preview' 
-        
-        config = types.GenerateContentConfig(
-            system_instruction="""
-                You are Mochi, a professional AI photography assistant for kids. 
-                Generate high-fidelity, photorealistic, and joyful images.
-                SAFETY: STRICTLY PROHIBITED: Weapons, violence, blood, or gore.
-                KIDS MODE: Always provide a sophisticated 3-word simple title.
-            """,
-            safety_settings=[
-                types.SafetySetting(category='HARM_CATEGORY_DANGEROUS_CONTENT', threshold='BLOCK_LOW_AND_ABOVE'),
-            ],
-            response_modalities=["TEXT", "IMAGE"],
-            image_config=types.ImageConfig(aspect_ratio="16:9")
-        )
-
-        response = client.models.generate_content(
-            model=model_id,
-            contents=f"A high-resolution, photorealistic HD cinematic photo of: {effective_query}.",
-            config=config
-        )
-
-        if not response.candidates or response.candidates[0].finish_reason == "SAFETY":
-            logger.warning("🛡️ Gemini API Safety Block triggered.")
-            return get_puppy_fallback(is_restricted=True)
-
-        ai_title = ""
-        base64_data = ""
-
-        for part in response.candidates[0].content.parts:
-            # Skip Gemini 3 internal reasoning/thought tokens
-            if hasattr(part, 'thought') and part.thought:
-                continue
-            if part.text:
-                ai_title = part.text.strip()
-            if part.inline_data:
-                base64_data = base64.b64encode(part.inline_data.data).decode('utf-8')
-
-        if base64_data:
-            return {
-                # Use uuid4 to guarantee unique keys in React lists
-                "id": str(uuid.uuid4()),
-                "title": "A Friendly Friend!" if is_restricted else (ai_title or f"Mochi's {query}"),
-                "imageUrl": f"data:image/png;base64,{base64_data}",
-                "type": "image",
-                "description": "Mochi painted this for you!"
-            }
-        
+        circuit_breakers.check('gemini', SUMMARY_MODEL_ID)
+        await rate_limits.acquire_async('gemini', SUMMARY_MODEL_ID)
+        with circuit_breakers.guard('gemini', SUMMARY_MODEL_ID), upstream_timer('gemini_summary', SUMMARY_MODEL_ID):
+            response = await client.aio.models.generate_content(**build_summarize_request(query))
+        summary = clean_summary(response.text or '')
+        return (summary, True) if summary else (keywords or query, False)
+    except (RateLimited, CircuitOpen) as e:
+        count_fallback('local_keywords', e)
+        logger.warning(f"⚠️ {e}; searching with local keywords")
+        return keywords or query, False
+    except Exception as e:
+        count_fallback('raw_query', e)
+        rate_limits.observe_error('gemini', SUMMARY_MODEL_ID, e)
+        logger.error(f"Summarization Error: {e}")
+        return query, False
+
+async def generate_ai_image_async(query):
+    """Async twin of generate_ai_image for the ASGI app."""
+    is_restricted, image_prompt = prepare_image_prompt(query)
+
+    cached = await asyncio.to_thread(cached_ai_image, query, is_restricted, image_prompt)
+    if cached:
+        return cached
+
+    client = gemini.client()
+    if not client:
+        count_fallback('puppy', 'unconfigured')
         return get_puppy_fallback()
 
+    try:
+        circuit_breakers.check('gemini', IMAGE_MODEL_ID)
+        await rate_limits.acquire_async('gemini', IMAGE_MODEL_ID)
+        with circuit_breakers.guard('gemini', IMAGE_MODEL_ID), upstream_timer('gemini_image', IMAGE_MODEL_ID):
+            response = await client.aio.models.generate_content(
+                model=IMAGE_MODEL_ID,
+                contents=image_prompt,
+                config=build_image_config()
+            )
+        return await asyncio.to_thread(read_image_generation, query, is_restricted, image_prompt, response)
+
+    except (RateLimited, CircuitOpen) as e:
+        count_fallback('puppy', e)
+        logger.warning(f"⚠️ {e}; sending the puppy")
+        return get_puppy_fallback()
     except Exception as e:
+        count_fallback('puppy', e)
+        rate_limits.observe_error('gemini', IMAGE_MODEL_ID, e)
         logger.error(f"Gemini Native Error: {e}")
         return get_puppy_fallback()
 
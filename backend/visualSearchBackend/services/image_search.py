@@ -1,15 +1,53 @@
-import requests
 import logging
+from urllib.parse import urlsplit
 from flask import current_app
+from sharedBackend.http_client import http_client
+from sharedBackend.image_cache import normalize_prompt
+from sharedBackend.circuit_breaker import CircuitOpen, circuit_breakers
+from sharedBackend.metrics import count_fallback, upstream_timer
+from sharedBackend.rate_limiter import RateLimited, rate_limits
+from sharedBackend.stats import register_stats
+from sharedBackend.ttl_cache import SWRCache
+from .config import Config
 
 # Set up logging to see what Mochi is doing in the console
 logger = logging.getLogger(__name__)
 
+# Repeated kid searches ("puppy", "dinosaur") never need to leave the process.
+# Empty results (rate limit, outage) are not cached. Keyword entries are
+# (keywords, cacheable); fallbacks served while Gemini is unavailable are not cached.
+keyword_cache = SWRCache(
+    max_entries=Config.SEARCH_CACHE_MAX_ENTRIES,
+    ttl=Config.SEARCH_KEYWORD_CACHE_TTL,
+    stale_ttl=Config.SEARCH_CACHE_STALE_TTL,
+    cacheable=lambda entry: entry[1],
+    name='search-keywords'
+)
+results_cache = SWRCache(
+    max_entries=Config.SEARCH_CACHE_MAX_ENTRIES,
+    ttl=Config.SEARCH_RESULTS_CACHE_TTL,
+    stale_ttl=Config.SEARCH_CACHE_STALE_TTL,
+    cacheable=bool,
+    name='search-results'
+)
+register_stats('search_keyword_cache', keyword_cache.stats)
+register_stats('search_results_cache', results_cache.stats)
+
+def _in_app_context(fn, *args):
+    """Binds fn to the current app so background cache refreshes can read current_app.config."""
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            return fn(*args)
+    return run
+
 def search_unsplash(raw_query):
     """
     Orchestrates the 'Smart Search' flow.
     1. Sends user prompt to Gemini to extract clean keywords.
     2. Uses those keywords to fetch high-quality photos from Unsplash.
+    Both steps are cached (see keyword_cache / results_cache).
     """
     # 💡 Local import to prevent circular dependency with gemini_service
     from .gemini_service import summarize_query_for_unsplash
@@ -17,15 +55,42 @@ def search_unsplash(raw_query):
     try:
         # Step 1: Gemini 3 Flash extracts the 'essence' of the prompt
         # Example: "I want a photo of a cozy room with a cat" -> "cozy room cat"
-        smart_query = summarize_query_for_unsplash(raw_query)
+        smart_query, _ = keyword_cache.get_or_compute(
+            normalize_prompt(raw_query), _in_app_context(summarize_query_for_unsplash, raw_query)
+        )
         logger.info(f"Mochi thinking: '{raw_query}' -> keywords: '{smart_query}'")
 
         # Step 2: Fetch the results using the cleaned-up query
-        return get_unsplash_results(smart_query)
+        return results_cache.get_or_compute(
+            normalize_prompt(smart_query), _in_app_context(get_unsplash_results, smart_query)
+        )
     except Exception as e:
         logger.error(f"Smart Search Error: {e}")
         return []
 
+UNSPLASH_SEARCH_URL = f"{Config.UNSPLASH_API_BASE}/search/photos"
+
+def build_unsplash_params(query, api_key):
+    return {
+        'query': query,
+        'client_id': api_key,
+        'per_page': 10,       # Number of images to return
+        'orientation': 'landscape',
+        'content_filter': 'high' # Keeps the results kid-safe/professional
+    }
+
+def format_unsplash_results(data, query):
+    """Map Unsplash data to the specific format your Frontend expects"""
+    return [{
+        "id": item.get('id'),
+        "title": item.get('alt_description') or f"Photo of {query}",
+        "imageUrl": item['urls']['regular'], 
+        "photographer": item['user']['name'],
+        # Mandatory attribution for Unsplash API compliance
+        "attributionUrl": f"{item['user']['links']['html']}?utm_source=Mochi_AI&utm_medium=referral",
+        "download_location": item['links'].get('download_location')
+    } for item in data.get('results', [])]
+
 def get_unsplash_results(query):
     """Hits the Unsplash API and returns formatted results."""
     # Use the key mapped in your config.py
@@ -35,41 +100,55 @@ def get_unsplash_results(query):
         logger.error("UNSPLASH_ACCESS_KEY is missing from config!")
         return []
 
-    url = "https://api.unsplash.com/search/photos"
-    params = {
-        'query': query,
-        'client_id': api_key,
-        'per_page': 10,       # Number of images to return
-        'orientation': 'landscape',
-        'content_filter': 'high' # Keeps the results kid-safe/professional
-    }
-
     try:
-        response = requests.get(url, params=params, timeout=5)
-        
-        # Check if we hit the Unsplash rate limit (50 requests/hour for Demo keys)
-        if response.status_code == 403:
-            logger.warning("⚠️ Unsplash Rate Limit Hit!")
-            return []
+        circuit_breakers.check('unsplash')
+        rate_limits.acquire('unsplash')
+        with circuit_breakers.guard('unsplash'), upstream_timer('unsplash_search'):
+            response = http_client.get(
+                UNSPLASH_SEARCH_URL,
+                params=build_unsplash_params(query, api_key),
+                read_timeout=current_app.config.get('UNSPLASH_TIMEOUT', 5)
+            )
+            # Unsplash reports the hourly budget on every response
+            rate_limits.observe('unsplash', status=response.status_code, headers=response.headers)
 
-        response.raise_for_status()
-        data = response.json()
-
-        # Map Unsplash data to the specific format your Frontend expects
-        return [{
-            "id": item.get('id'),
-            "title": item.get('alt_description') or f"Photo of {query}",
-            "imageUrl": item['urls']['regular'], 
-            "photographer": item['user']['name'],
-            # Mandatory attribution for Unsplash API compliance
-            "attributionUrl": f"{item['user']['links']['html']}?utm_source=Mochi_AI&utm_medium=referral",
-            "download_location": item['links'].get('download_location')
-        } for item in data.get('results', [])]
+            # Check if we hit the Unsplash rate limit (50 requests/hour for Demo keys)
+            if response.status_code == 403:
+                logger.warning("⚠️ Unsplash Rate Limit Hit!")
+                count_fallback('no_photos', 'rate_limited')
+                return []
+
+            # Inside the guard so a 5xx counts against the circuit
+            response.raise_for_status()
+        return format_unsplash_results(response.json(), query)
         
+    except (RateLimited, CircuitOpen) as e:
+        count_fallback('no_photos', e)
+        logger.warning(f"⚠️ {e}; skipping Unsplash")
+        return []
     except Exception as e:
+        count_fallback('no_photos', e)
         logger.error(f"Unsplash API Error: {e}")
         return []
 
+def is_unsplash_download_url(download_url):
+    """
+    download_location comes from the browser, and the ping carries our client_id,
+    so only URLs on the Unsplash API host (UNSPLASH_API_BASE) are ever requested.
+    """
+    if not isinstance(download_url, str):
+        return False
+    url, base = urlsplit(download_url), urlsplit(Config.UNSPLASH_API_BASE)
+    return url.scheme == base.scheme and url.hostname == base.hostname and url.port == base.port
+
+def ping_unsplash_download(download_url, api_key, timeout=5):
+    """Unsplash just needs a GET request to this URL to track analytics. Raises on failure."""
+    if not is_unsplash_download_url(download_url):
+        raise ValueError("download_location is not an Unsplash API URL")
+    with upstream_timer('unsplash_track'):
+        response = http_client.get(download_url, params={'client_id': api_key}, read_timeout=timeout)
+        response.raise_for_status()
+
 def track_unsplash_download(download_url):
     """
     Mandatory Unsplash requirement: You MUST hit the download_location 
@@ -78,8 +157,73 @@ def track_unsplash_download(download_url):
     api_key = current_app.config.get('UNSPLASH_ACCESS_KEY')
     if download_url and api_key:
         try:
-            # Unsplash just needs a GET request to this URL to track analytics
-            requests.get(download_url, params={'client_id': api_key}, timeout=5)
+            ping_unsplash_download(download_url, api_key, current_app.config.get('UNSPLASH_TIMEOUT', 5))
+            logger.info("📈 Unsplash download tracked successfully.")
+        except Exception as e:
+            logger.error(f"Tracking Error: {e}")
+
+# --- Async twins for the ASGI app (asgi.py); the caller passes the API key
+# because Flask's current_app isn't available there.
+
+async def search_unsplash_async(raw_query, api_key):
+    from .gemini_service import summarize_query_for_unsplash_async
+
+    try:
+        smart_query, _ = await keyword_cache.get_or_compute_async(
+            normalize_prompt(raw_query), lambda: summarize_query_for_unsplash_async(raw_query)
+        )
+        logger.info(f"Mochi thinking: '{raw_query}' -> keywords: '{smart_query}'")
+        return await results_cache.get_or_compute_async(
+            normalize_prompt(smart_query), lambda: get_unsplash_results_async(smart_query, api_key)
+        )
+    except Exception as e:
+        logger.error(f"Smart Search Error: {e}")
+        return []
+
+async def get_unsplash_results_async(query, api_key):
+    from sharedBackend.async_http import get_async_client
+
+    if not api_key:
+        logger.error("UNSPLASH_ACCESS_KEY is missing from config!")
+        return []
+
+    try:
+        circuit_breakers.check('unsplash')
+        await rate_limits.acquire_async('unsplash')
+        with circuit_breakers.guard('unsplash'), upstream_timer('unsplash_search'):
+            response = await get_async_client().get(
+                UNSPLASH_SEARCH_URL, params=build_unsplash_params(query, api_key), timeout=Config.UNSPLASH_TIMEOUT
+            )
+            rate_limits.observe('unsplash', status=response.status_code, headers=response.headers)
+            if response.status_code == 403:
+                logger.warning("⚠️ Unsplash Rate Limit Hit!")
+                count_fallback('no_photos', 'rate_limited')
+                return []
+            response.raise_for_status()
+        return format_unsplash_results(response.json(), query)
+
+    except (RateLimited, CircuitOpen) as e:
+        count_fallback('no_photos', e)
+        logger.warning(f"⚠️ {e}; skipping Unsplash")
+        return []
+    except Exception as e:
+        count_fallback('no_photos', e)
+        logger.error(f"Unsplash API Error: {e}")
+        return []
+
+async def track_unsplash_download_async(download_url, api_key):
+    from sharedBackend.async_http import get_async_client
+
+    if download_url and api_key:
+        if not is_unsplash_download_url(download_url):
+            logger.warning("Ignoring download_location outside the Unsplash API")
+            return
+        try:
+            with upstream_timer('unsplash_track'):
+                response = await get_async_client().get(
+                    download_url, params={'client_id': api_key}, timeout=Config.UNSPLASH_TIMEOUT
+                )
+                response.raise_for_status()
             logger.info("📈 Unsplash download tracked successfully.")
         except Exception as e:
-            logger.error(f"Tracking Error: {e}")
\ No newline at end of file
+            logger.error(f"Tracking Error: {e}")
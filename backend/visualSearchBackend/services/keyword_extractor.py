@@ -0,0 +1,133 @@
+"""
+Local keyword extraction for visual search.
+
+Turns "can you show me a picture of a big red fire truck?" into "red fire truck"
+without a Gemini round trip: lowercase, tokenize, drop stopwords and filler,
+then keep the words that match a small vocabulary of kid-friendly subjects.
+Queries the heuristics aren't sure about are marked low-confidence so the caller
+can fall back to Gemini summarization.
+"""
+
+import re
+import threading
+from sharedBackend.stats import register_stats
+
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+a an the and or but of to in on at for with from by about into over under up down out off
+is are was were be been being am do does did have has had can could would should will shall may might must
+i me my mine we us our you your he him his she her it its they them their this that these those there here
+what which who whom whose where when why how please pls plz just really very so too also some any all
+show see find get give look looking want wanna need like love let lets make draw paint search display
+picture pictures photo photos image images pic pics drawing drawings photograph photographs
+one ones thing things kind sort lot lots more most much many something anything
+""".split())
+
+# Descriptors worth keeping when they sit right before a subject ("red car", "baby elephant")
+MODIFIERS = frozenset("""
+red orange yellow green blue purple pink brown black white gray grey golden rainbow colorful
+big small little tiny huge giant baby happy cute fluffy funny sleepy silly
+""".split())
+
+KID_VOCABULARY = frozenset("""
+animal dog puppy cat kitten bunny rabbit hamster mouse horse pony unicorn cow pig piglet sheep lamb goat
+chicken chick duck duckling goose turkey bird parrot owl penguin eagle flamingo peacock swan
+lion tiger cheetah leopard bear panda koala kangaroo monkey gorilla elephant giraffe zebra hippo rhino
+camel deer moose fox wolf raccoon squirrel hedgehog otter beaver bat frog toad turtle tortoise snake lizard
+crocodile alligator dinosaur dragon fish shark whale dolphin octopus jellyfish starfish seahorse crab lobster
+seal walrus butterfly caterpillar bee ladybug ant spider snail worm dragonfly
+car truck bus train plane airplane helicopter boat ship submarine rocket spaceship bicycle bike scooter
+tractor firetruck ambulance excavator bulldozer crane taxi motorcycle balloon kite
+apple banana orange grape grapes strawberry cherry watermelon pineapple mango pear peach lemon lime
+carrot broccoli corn potato tomato pumpkin pizza cake cupcake cookie candy icecream sandwich bread cheese
+milk egg eggs honey pancake donut
+tree flower flowers rose sunflower tulip garden forest jungle ocean sea beach river lake mountain volcano
+desert island waterfall rainbow sun moon star stars sky cloud clouds rain snow snowman ice space planet
+earth galaxy
+house castle school playground park farm zoo city bridge tower lighthouse tent
+ball toy toys teddy doll robot blocks puzzle crayon crayons book books drum guitar piano
+circle square triangle rectangle heart shape shapes color colors letter letters number numbers
+""".split())
+
+# A two-word subject counts as one term (checked before single words)
+COMPOUNDS = {
+    ('fire', 'truck'): 'fire truck', ('ice', 'cream'): 'ice cream', ('polar', 'bear'): 'polar bear',
+    ('teddy', 'bear'): 'teddy bear', ('guinea', 'pig'): 'guinea pig', ('sea', 'turtle'): 'sea turtle',
+    ('school', 'bus'): 'school bus', ('outer', 'space'): 'outer space',
+    ('t', 'rex'): 't rex', ('killer', 'whale'): 'killer whale', ('race', 'car'): 'race car'
+}
+
+MAX_SUBJECTS = 2
+
+
+def _singular(word):
+    if word in KID_VOCABULARY:
+        return word
+    for suffix, replacement in (('ies', 'y'), ('es', ''), ('s', '')):
+        if word.endswith(suffix) and word[:-len(suffix)] + replacement in KID_VOCABULARY:
+            return word[:-len(suffix)] + replacement
+    return None
+
+
+def extract_keywords(query):
+    """
+    Returns (keywords, confident). `confident` is False when content words the
+    vocabulary doesn't know are left over (alongside a known subject they would
+    be dropped, e.g. "a cozy room with a cat"), or when there is no known
+    subject and too many unknown words to guess from. Low-confidence keywords
+    keep every content word in query order, for callers that can't ask Gemini.
+    """
+    tokens = [t.replace("'", '') for t in TOKEN_RE.findall((query or '').lower())]
+    if not tokens:
+        return '', False
+
+    terms = []  # (term, is_subject) in query order
+    i = 0
+    while i < len(tokens):
+        begin, word = i, tokens[i]
+        pair = (word, tokens[i + 1]) if i + 1 < len(tokens) else None
+        if pair in COMPOUNDS:
+            subject, i = COMPOUNDS[pair], i + 2
+        else:
+            subject, i = _singular(word), i + 1
+        if subject:
+            # Keep one descriptor directly in front of the subject
+            if begin > 0 and tokens[begin - 1] in MODIFIERS:
+                subject = f"{tokens[begin - 1]} {subject}"
+            terms.append((subject, True))
+        elif word not in STOPWORDS and word not in MODIFIERS:
+            terms.append((word, False))
+
+    subjects = [term for term, is_subject in terms if is_subject]
+    unknown = [term for term, is_subject in terms if not is_subject]
+    if subjects and not unknown:
+        return ' '.join(subjects[:MAX_SUBJECTS]), True
+    # Short leftovers ("axolotl", "northern lights") are usually already good search terms
+    if not subjects and 0 < len(unknown) <= 2:
+        return ' '.join(unknown), True
+    return ' '.join(term for term, _ in terms[:MAX_SUBJECTS + 2]), False
+
+
+class ExtractionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.local = 0
+        self.gemini = 0
+
+    def record(self, path):
+        with self._lock:
+            setattr(self, path, getattr(self, path) + 1)
+
+    def stats(self):
+        with self._lock:
+            total = self.local + self.gemini
+            return {
+                "local": self.local,
+                "gemini": self.gemini,
+                "local_ratio": round(self.local / total, 4) if total else 0.0
+            }
+
+
+extraction_stats = ExtractionStats()
+register_stats('keyword_extraction', extraction_stats.stats)
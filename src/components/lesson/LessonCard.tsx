@@ -14,6 +14,7 @@ import {
   AlertDialogTrigger,
 } from '@/components/ui/alert-dialog';
 import { BookOpen, Pencil, Trash2 } from 'lucide-react';
+import { responsiveImage } from '@/lib/utils';
 
 interface LessonCardProps {
   lesson: Lesson;
@@ -40,7 +41,7 @@ const LessonCard = ({ lesson, onClick, onEdit, onDelete }: LessonCardProps) => {
       <div className="relative aspect-[4/3] overflow-hidden">
         {lesson.coverImage ? (
           <img
-            src={lesson.coverImage}
+            {...responsiveImage(lesson.coverImage, '(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw')}
             alt={lesson.title}
             className="h-full w-full object-cover"
           />
@@ -9,6 +9,7 @@ import { createLesson, updateLesson, getLessonById } from '@/services/storageSer
 import { LessonFormData } from '@/types/lesson';
 import LessonItemEditor from './LessonItemEditor';
 import { toast } from '@/hooks/use-toast';
+import { responsiveImage } from '@/lib/utils';
 
 interface LessonEditorProps {
   lessonId?: string;
@@ -138,7 +139,7 @@ const LessonEditor = ({ lessonId }: LessonEditorProps) => {
               {coverImage ? (
                 <div className="relative inline-block">
                   <img
-                    src={coverImage}
+                    {...responsiveImage(coverImage, '384px')}
                     alt="Cover"
                     className="h-40 w-full max-w-sm rounded-xl object-cover border-2 border-border"
                   />
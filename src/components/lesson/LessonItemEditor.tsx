@@ -4,6 +4,7 @@ import { Textarea } from '@/components/ui/textarea';
 import { Label } from '@/components/ui/label';
 import { Card, CardContent } from '@/components/ui/card';
 import { GripVertical, ImagePlus, Trash2, X } from 'lucide-react';
+import { responsiveImage } from '@/lib/utils';
 
 interface LessonItemEditorProps {
   index: number;
@@ -52,7 +53,7 @@ const LessonItemEditor = ({
                 {image ? (
                   <div className="relative inline-block">
                     <img
-                      src={image}
+                      {...responsiveImage(image, '96px')}
                       alt={name || 'Item'}
                       className="h-24 w-24 rounded-lg object-cover border-2 border-border"
                     />
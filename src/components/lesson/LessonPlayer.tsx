@@ -8,6 +8,7 @@ import { speak, stop, preloadVoices } from '@/services/ttsService';
 import { Lesson } from '@/types/lesson';
 import { toast } from '@/hooks/use-toast';
 import mochiCharacter from '@/assets/mochi-avatar.jpeg';
+import { responsiveImage } from '@/lib/utils';
 
 const LessonPlayer = () => {
   const navigate = useNavigate();
@@ -132,7 +133,7 @@ const LessonPlayer = () => {
               <div className="aspect-square w-full max-w-sm overflow-hidden rounded-2xl bg-info/30">
                 {currentItem.image ? (
                   <img
-                    src={currentItem.image}
+                    {...responsiveImage(currentItem.image, '384px')}
                     alt={currentItem.name}
                     className="h-full w-full object-contain p-4"
                   />
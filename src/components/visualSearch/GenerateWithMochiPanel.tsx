@@ -5,6 +5,7 @@ import { Card } from "@/components/ui/card";
 import mochiMascot from '@/assets/mochi-avatar.jpeg';
 import type { GeneratedContent } from '@/services/visualSearchService';
 import EmptyState from './EmptyState';
+import { responsiveImage } from "@/lib/utils";
 
 interface GenerateWithMochiPanelProps {
   generatedContent: GeneratedContent | null;
@@ -93,7 +94,7 @@ const GenerateWithMochiPanel = ({
                       re-mount this tag and show the fresh art immediately.
                     */
                     key={`${generatedContent.id}-${generatedContent.imageUrl.slice(-20)}`}
-                    src={generatedContent.imageUrl}
+                    {...responsiveImage(generatedContent.imageUrl, '(min-width: 768px) 50vw, 100vw')}
                     alt={generatedContent.title}
                     className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-700"
                     referrerPolicy="no-referrer"
@@ -172,7 +173,7 @@ const GenerateWithMochiPanel = ({
             <div className="w-full h-full flex flex-col">
               <div className="flex-1 bg-white rounded-[3rem] p-4 shadow-2xl overflow-hidden">
                 <img 
-                  src={generatedContent.imageUrl} 
+                  {...responsiveImage(generatedContent.imageUrl, '100vw')}
                   alt={generatedContent.title}
                   className="w-full h-full object-contain rounded-[2rem]"
                   referrerPolicy="no-referrer"
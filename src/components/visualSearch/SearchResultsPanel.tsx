@@ -4,6 +4,7 @@ import type { VisualResult } from '@/services/visualSearchService';
 import VisualResultCard from './VisualResultCard';
 import LoadingSkeleton from './LoadingSkeleton';
 import EmptyState from './EmptyState';
+import { responsiveImage } from '@/lib/utils';
 // Keep originality: User's custom interface for internal data mapping
 export interface SearchResultsPanel {
   title: string;
@@ -138,7 +139,7 @@ const SearchResultsPanel = ({
             <div className="relative group w-full bg-white p-3 rounded-[2.5rem] shadow-2xl border-[6px] border-white/10">
                <img 
                 /* FIX: Cast to any to access 'link' or 'imageUrl' without TS errors */
-                src={(selectedImage as any).imageUrl || (selectedImage as any).link || (selectedImage as any).thumbnail} 
+                {...responsiveImage((selectedImage as any).imageUrl || (selectedImage as any).link || (selectedImage as any).thumbnail, '100vw')}
                 alt={selectedImage.title}
                 referrerPolicy="no-referrer"
                 className="w-full h-auto max-h-[65vh] object-contain rounded-[1.8rem]"
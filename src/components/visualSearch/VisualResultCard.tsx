@@ -1,5 +1,6 @@
 import { Play, Image, Film, ExternalLink } from 'lucide-react';
 import type { VisualResult } from '@/services/visualSearchService';
+import { responsiveImage } from '@/lib/utils';
 
 
 /**
@@ -41,11 +42,12 @@ const VisualResultCard = ({ result, onClick }: VisualResultCardProps) => {
       {/* THUMBNAIL CONTAINER */}
       <div className="relative aspect-[4/3] m-1.2 bg-muted overflow-hidden rounded-[1.6rem]">
         <img
-          src={displayImage}
+          {...responsiveImage(displayImage, '(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw')}
           alt={title}
           referrerPolicy="no-referrer"
           className="w-full h-full object-cover object-center transition-transform duration-700 group-hover:scale-105"
           onError={(e) => { 
+            e.currentTarget.srcset = "";
             e.currentTarget.src = "https://images.unsplash.com/photo-1591160674255-fc8b858ecf3b?w=500&auto=format&fit=crop"; 
           }} 
         />
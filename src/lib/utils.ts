@@ -4,3 +4,20 @@ import { twMerge } from "tailwind-merge";
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs));
 }
+
+// Generated images served by the backend (/api/images/<sha256>) also come as
+// resized WebP/JPEG variants: ?w=<px> returns the smallest one at least that wide
+// (the original until the variants are ready), so cards never download full-size art.
+const GENERATED_IMAGE_RE = /\/api\/images\/[0-9a-f]{64}$/;
+const VARIANT_WIDTHS = [320, 640, 1024];
+
+export function responsiveImage(src: string | undefined, sizes: string) {
+  if (!src || !GENERATED_IMAGE_RE.test(src)) {
+    return { src };
+  }
+  return {
+    src: `${src}?w=640`,
+    srcSet: VARIANT_WIDTHS.map((width) => `${src}?w=${width} ${width}w`).join(", "),
+    sizes,
+  };
+}
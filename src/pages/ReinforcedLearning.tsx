@@ -1,5 +1,5 @@
 import React, { useState, useRef } from 'react';
-import { chatWithMochi, ChatMessage } from '../services/ReinforcedLearningService';
+import { streamChatWithMochi, ChatMessage } from '../services/ReinforcedLearningService';
 import MochiAvatar from '../components/ReinforcedLearning/MochiAvatar';
 import FeedbackBubble from '../components/ReinforcedLearning/FeedbackBubble';
 import InteractionPill from '../components/ReinforcedLearning/InteractionPill';
@@ -64,14 +64,60 @@ export default function ReinforcedLearning() {
     setIsRecording(false);
   };
 
+  // MOCHI VOICE LOGIC: one utterance per sentence so speech can start while the reply streams in
+  const speak = (text: string) => {
+    const synth = window.speechSynthesis;
+    // Clean the text for natural breaths (swapping . for ,)
+    const utterance = new SpeechSynthesisUtterance(cleanTextForNaturalSpeech(text));
+
+    const voices = synth.getVoices();
+    const friendlyVoice = voices.find(v => 
+      v.name.includes('Samantha') || 
+      v.name.includes('Female') || 
+      v.name.includes('Google US English')
+    );
+
+    if (friendlyVoice) utterance.voice = friendlyVoice;
+    utterance.pitch = 1.2; // Playful pitch
+    utterance.rate = 0.9; // Slightly slower for child comprehension
+    synth.speak(utterance);
+    return utterance;
+  };
+
   // FUNCTION: Send Audio File to Backend
   const sendAudioToMochi = async (blob: Blob) => {
 
     setFeedback("Mochi is listening... ✨");
     setIsThinking(true);
 
+    let reply = "";
+    let unspoken = "";
+    let lastUtterance: SpeechSynthesisUtterance | null = null;
+
+    // Speak every finished sentence; keep the rest until more text arrives
+    const speakFinishedSentences = () => {
+      const end = Math.max(unspoken.lastIndexOf('.'), unspoken.lastIndexOf('!'), unspoken.lastIndexOf('?'));
+      if (end === -1) return;
+      lastUtterance = speak(unspoken.slice(0, end + 1));
+      unspoken = unspoken.slice(end + 1);
+    };
+
     try {
-      const res = await chatWithMochi(blob, history);
+      const res = await streamChatWithMochi(blob, history, {
+        onMood: (aiMood) => { if (aiMood) setMood(aiMood); },
+        onDelta: (text) => {
+          reply += text;
+          unspoken += text;
+          setFeedback(reply);
+          speakFinishedSentences();
+        },
+        onReplace: (text) => {
+          window.speechSynthesis.cancel();
+          reply = text;
+          unspoken = text;
+          setFeedback(text);
+        },
+      });
       const { transcription, mochiResponse, mood: aiMood } = res;
 
       setHistory(prev => [
@@ -82,26 +128,16 @@ export default function ReinforcedLearning() {
       
       setFeedback(mochiResponse);
       if (aiMood) setMood(aiMood);
-      
-      // MOCHI VOICE LOGIC
-      const synth = window.speechSynthesis;
-      // 1. Clean the text for natural breaths (swapping . for ,)
-      const naturalText = cleanTextForNaturalSpeech(mochiResponse);
-      const utterance = new SpeechSynthesisUtterance(naturalText);
-
-      const voices = synth.getVoices();
-      const friendlyVoice = voices.find(v => 
-        v.name.includes('Samantha') || 
-        v.name.includes('Female') || 
-        v.name.includes('Google US English')
-      );
-
-      if (friendlyVoice) utterance.voice = friendlyVoice;
-      utterance.pitch = 1.2; // Playful pitch
-      utterance.rate = 0.9; // Slightly slower for child comprehension
-      utterance.onend = () => setIsThinking(false);
-
-      synth.speak(utterance);
+
+      // Nothing streamed (e.g. the model didn't answer in JSON): say the whole reply now
+      if (!reply) unspoken = mochiResponse;
+      if (unspoken.trim()) lastUtterance = speak(unspoken);
+
+      if (lastUtterance && window.speechSynthesis.speaking) {
+        lastUtterance.onend = () => setIsThinking(false);
+      } else {
+        setIsThinking(false);
+      }
 
     } catch (err) {
       console.error(err);
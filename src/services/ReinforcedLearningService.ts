@@ -4,6 +4,8 @@ export interface MochiResponse {
     transcription: string;
     mochiResponse: string;
     mood?: 'HAPPY' | 'CELEBRATING' | 'ENCOURAGING' | 'THINKING';
+    sessionId?: string;
+    sessionReset?: boolean; // the server had lost our session and answered without the earlier turns
 }
 
 export interface ChatMessage {
@@ -13,13 +15,32 @@ export interface ChatMessage {
 
 const API_BASE_URL = 'http://localhost:5000/api';
 
-export const chatWithMochi = async (audioBlob: Blob, history: ChatMessage[]): Promise<MochiResponse> => {
+// The server keeps the conversation; after the first reply we only send its session id
+let sessionId: string | null = null;
+
+// If the server lost the session (evicted, expired, restarted) start a new one
+// from our own history on the next turn instead of carrying on without context
+const rememberSession = (reply: MochiResponse) => {
+    sessionId = reply.sessionReset ? null : reply.sessionId ?? sessionId;
+};
+
+const buildChatForm = (audioBlob: Blob, history: ChatMessage[]): FormData => {
     const formData = new FormData();
     formData.append('audio', audioBlob, 'recording.webm');
-    formData.append('history', JSON.stringify(history));
+    if (sessionId) {
+        formData.append('session_id', sessionId);
+    } else {
+        formData.append('history', JSON.stringify(history));
+    }
+    return formData;
+};
+
+export const chatWithMochi = async (audioBlob: Blob, history: ChatMessage[]): Promise<MochiResponse> => {
+    const formData = buildChatForm(audioBlob, history);
 
     try {
         const response = await axios.post(`${API_BASE_URL}/chat-with-mochi`, formData);
+        rememberSession(response.data);
         return response.data;
 
     } catch(error){
@@ -29,3 +50,55 @@ export const chatWithMochi = async (audioBlob: Blob, history: ChatMessage[]): Pr
 };
 
 
+
+export interface MochiStreamHandlers {
+    onTranscription?: (text: string) => void;
+    onMood?: (mood: MochiResponse['mood']) => void;
+    onDelta?: (text: string) => void;   // next words of Mochi's reply
+    onReplace?: (text: string) => void; // reply was unsafe: say this instead, ignore earlier deltas
+}
+
+// Server-Sent Events variant: resolves with the full reply once the stream is done
+export const streamChatWithMochi = async (
+    audioBlob: Blob,
+    history: ChatMessage[],
+    handlers: MochiStreamHandlers
+): Promise<MochiResponse> => {
+    const response = await fetch(`${API_BASE_URL}/chat-with-mochi/stream`, {
+        method: 'POST',
+        body: buildChatForm(audioBlob, history),
+    });
+    if (!response.ok || !response.body) {
+        throw new Error(`Mochi stream failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let end;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, end);
+            buffer = buffer.slice(end + 2);
+            const event = /^event: (.*)$/m.exec(block)?.[1];
+            const data = JSON.parse(/^data: (.*)$/m.exec(block)?.[1] ?? '{}');
+
+            switch (event) {
+                case 'transcription': handlers.onTranscription?.(data.text); break;
+                case 'mood': handlers.onMood?.(data.mood); break;
+                case 'delta': handlers.onDelta?.(data.text); break;
+                case 'replace': handlers.onReplace?.(data.text); break;
+                case 'error': throw new Error(data.error);
+                case 'done':
+                    rememberSession(data);
+                    return data;
+            }
+        }
+    }
+    throw new Error('Mochi stream ended before the reply was done');
+};